@@ -0,0 +1,22 @@
+import pytest
+from bitrecs.commerce.product import ProductFactory
+from conftest import CATALOGS, context, products, raw_catalog
+
+PARSE_CATALOGS = ["asos_1k", "asos_5k", "asos_10k", "asos_30k", "amazon_5k", "walmart_5k"]
+
+
+@pytest.mark.parametrize("name", PARSE_CATALOGS)
+def bench_try_parse_context_strict(benchmark, name):
+    benchmark.group = "try_parse_context_strict"
+    ctx = context(name)
+    parsed = benchmark(ProductFactory.try_parse_context_strict, ctx)
+    assert len(parsed) == len(products(name))
+
+
+@pytest.mark.parametrize("name", list(CATALOGS))
+def bench_convert(benchmark, name):
+    benchmark.group = "convert"
+    provider, _ = CATALOGS[name]
+    raw = raw_catalog(name)
+    converted = benchmark(ProductFactory.convert, raw, provider)
+    assert len(converted) >= len(products(name))
@@ -0,0 +1,27 @@
+import pytest
+from bitrecs.llms.prompt_factory import PromptFactory
+from conftest import context, products
+
+PROMPT_CATALOGS = ["shopify", "asos_1k", "asos_5k", "asos_30k"]
+
+
+@pytest.mark.parametrize("name", PROMPT_CATALOGS)
+def bench_generate_prompt(benchmark, name):
+    benchmark.group = "generate_prompt"
+    sku = products(name)[0].sku
+    ctx = context(name)
+    prompt = benchmark(lambda: PromptFactory(sku, ctx, num_recs=5).generate_prompt())
+    assert sku in prompt
+
+
+@pytest.mark.parametrize("name", PROMPT_CATALOGS)
+def bench_get_token_count(benchmark, name):
+    benchmark.group = "get_token_count"
+    try:
+        PromptFactory._get_cached_encoding("o200k_base")
+    except Exception as e:
+        pytest.skip(f"tiktoken encoding not available: {e}")
+    prompt = PromptFactory(products(name)[0].sku, context(name), num_recs=5).generate_prompt()
+    PromptFactory.get_token_count(prompt)
+    tokens = benchmark(PromptFactory.get_token_count, prompt)
+    assert tokens > 0
@@ -0,0 +1,43 @@
+import pytest
+from bitrecs.utils import logging as bitrecs_logging
+from bitrecs.utils.response_db import MinerResponseWriter, connect, insert_round
+from conftest import make_request, make_responses, products
+
+
+@pytest.fixture
+def writer(tmp_path, monkeypatch):
+    # Write every round right away instead of batching, so each call measures one full write
+    writer = MinerResponseWriter(str(tmp_path / "miner_responses.db"), batch_size=1, flush_interval=0)
+    monkeypatch.setattr(bitrecs_logging, "get_response_writer", lambda: writer)
+    yield writer
+    writer.stop()
+
+
+@pytest.mark.parametrize("n", [16, 64])
+def bench_log_miner_responses_to_sql(benchmark, writer, n):
+    """Submitting a round on the request path, then the background write until it is on disk"""
+    benchmark.group = "log_miner_responses_to_sql"
+    request = make_request("asos_5k")
+    responses = make_responses(request, n, products("asos_5k"))
+    for r in responses:
+        r.context = request.context
+
+    def log_round():
+        bitrecs_logging.log_miner_responses_to_sql(1, responses)
+        assert writer.flush()
+
+    benchmark(log_round)
+
+
+def bench_insert_round(benchmark, tmp_path):
+    benchmark.group = "log_miner_responses_to_sql"
+    request = make_request("asos_5k")
+    responses = make_responses(request, 16, products("asos_5k"))
+    conn = connect(str(tmp_path / "miner_responses.db"))
+
+    def insert():
+        with conn:
+            return insert_round(conn, 1, "2025-01-01T00:00:00", responses)
+
+    assert benchmark(insert) == 16
+    conn.close()
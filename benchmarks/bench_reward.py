@@ -0,0 +1,26 @@
+import pytest
+from bitrecs.commerce.user_action import UserActionIndex
+from bitrecs.utils.distance import select_most_similar_bitrecs
+from bitrecs.validator.reward import get_rewards
+from conftest import make_request, make_responses, products
+
+
+@pytest.mark.parametrize("name", ["asos_1k", "asos_10k", "walmart_5k"])
+def bench_get_rewards(benchmark, name):
+    benchmark.group = "get_rewards"
+    request = make_request(name)
+    responses = make_responses(request, 16, products(name))
+    actions = UserActionIndex.from_actions(
+        {"hot_key": r.miner_hotkey, "action": "VIEW_PRODUCT", "created_at": "2025-01-01T00:00:00"} for r in responses
+    )
+    rewards = benchmark(get_rewards, request.num_results, request, responses, actions)
+    assert (rewards > 0).all()
+
+
+@pytest.mark.parametrize("n", [4, 16, 64, 256])
+def bench_select_most_similar_bitrecs(benchmark, n):
+    benchmark.group = "select_most_similar_bitrecs"
+    request = make_request("asos_5k")
+    responses = make_responses(request, n, products("asos_5k"))
+    top = benchmark(select_most_similar_bitrecs, responses, 3)
+    assert len(top) == 3
@@ -0,0 +1,92 @@
+"""
+Benchmarks for the request hot path, built on the catalogs bundled in tests/data.
+
+    python -m pytest benchmarks
+
+Every run is saved under benchmarks/.results and compared with the previous one
+(see benchmarks/pytest.ini). Fail on regressions with e.g. --benchmark-compare-fail=median:20%.
+"""
+
+import os
+import json
+import random
+import bittensor as bt
+from dataclasses import asdict
+from datetime import datetime
+from functools import lru_cache
+from typing import List
+from bitrecs.commerce.product import CatalogProvider, Product, ProductFactory
+from bitrecs.protocol import BitrecsRequest
+from bitrecs.utils import constants as CONST
+
+DATA_DIR = os.path.join(CONST.ROOT_DIR, "tests", "data")
+
+CATALOGS = {
+    "amazon_1k": (CatalogProvider.AMAZON, "amazon/fashion/amazon_fashion_sample_1000.json"),
+    "amazon_5k": (CatalogProvider.AMAZON, "amazon/fashion/amazon_fashion_sample_5000.json"),
+    "asos_1k": (CatalogProvider.WOOCOMMERCE, "asos/sample_1k.csv"),
+    "asos_5k": (CatalogProvider.WOOCOMMERCE, "asos/sample_5k.csv"),
+    "asos_10k": (CatalogProvider.WOOCOMMERCE, "asos/sample_10k.csv"),
+    "asos_30k": (CatalogProvider.WOOCOMMERCE, "asos/asos_30k_trimmed.csv"),
+    "walmart_1k": (CatalogProvider.WALMART, "walmart/wallmart_1k_kaggle_trimmed.csv"),
+    "walmart_5k": (CatalogProvider.WALMART, "walmart/wallmart_5k_kaggle_trimmed.csv"),
+    "woocommerce": (CatalogProvider.WOOCOMMERCE, "woocommerce/product_catalog.csv"),
+    "shopify": (CatalogProvider.SHOPIFY, "shopify/electronics/shopify_products.csv"),
+}
+
+
+@lru_cache(maxsize=None)
+def raw_catalog(name: str) -> str:
+    """Store export as the JSON string the converters take"""
+    provider, path = CATALOGS[name]
+    path = os.path.join(DATA_DIR, path)
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    return ProductFactory.tryload_catalog_to_json(provider, path)
+
+
+@lru_cache(maxsize=None)
+def products(name: str) -> List[Product]:
+    provider, _ = CATALOGS[name]
+    return ProductFactory.dedupe(ProductFactory.convert(raw_catalog(name), provider))
+
+
+@lru_cache(maxsize=None)
+def context(name: str) -> str:
+    """Catalog as the validator sends it to miners"""
+    return json.dumps([asdict(p) for p in products(name)], separators=(",", ":"))
+
+
+def make_request(name: str, num_recs: int = 5) -> BitrecsRequest:
+    return BitrecsRequest(
+        created_at=datetime.now().isoformat(),
+        user="",
+        num_results=num_recs,
+        query=products(name)[0].sku,
+        context=context(name),
+        site_key="",
+        results=[""],
+        models_used=[""],
+        miner_uid="",
+        miner_hotkey=""
+    )
+
+
+def make_responses(request: BitrecsRequest, n: int, catalog: List[Product], seed: int = 7) -> List[BitrecsRequest]:
+    """n successful miner responses recommending random catalog SKUs, every fourth shares the same picks"""
+    rng = random.Random(seed)
+    candidates = [p for p in catalog if p.sku != request.query]
+    shared = rng.sample(candidates, request.num_results)
+    responses = []
+    for i in range(n):
+        picks = shared if i % 4 == 0 else rng.sample(candidates, request.num_results)
+        response = request.model_copy()
+        response.context = ""
+        response.results = [json.dumps({"sku": p.sku, "name": p.name, "price": p.price, "reason": "bench"}) for p in picks]
+        response.miner_uid = str(i)
+        response.miner_hotkey = f"5Hotkey{i}"
+        response.models_used = ["bench"]
+        response.dendrite = bt.TerminalInfo(status_code=200, process_time=1.5)
+        responses.append(response)
+    return responses
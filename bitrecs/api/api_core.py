@@ -29,13 +29,22 @@ def get_client_ip(request: Request) -> str:
 
 limiter = Limiter(key_func=get_client_ip)
 
+LOCAL_ONLY_PATHS = ("/ready", "/metrics")
+
+
+def is_local_request(request: Request) -> bool:
+    """Direct loopback connection, used by the auto-updater and a local metrics scraper"""
+    if "x-real-ip" in request.headers or "x-forwarded-for" in request.headers:
+        return False
+    return bool(request.client) and request.client.host in ("127.0.0.1", "::1")
+
 @limiter.limit("120/minute")
 async def filter_allowed_ips(self, request: Request, call_next) -> Response:
     """
     Filters requests based on allowed IPs, handling bypass and rate limiting.
     """
     try:
-        if self.bypass_whitelist:
+        if self.bypass_whitelist or (request.url.path in LOCAL_ONLY_PATHS and is_local_request(request)):
             response = await call_next(request)
             return response
 
@@ -2,6 +2,7 @@ import os
 import json
 import time
 import hmac
+import socket
 import hashlib
 import threading
 import bittensor as bt
@@ -9,16 +10,18 @@ from dataclasses import asdict
 from typing import Callable
 from functools import partial
 from fastapi import FastAPI, HTTPException, Request, APIRouter, Header
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.gzip import GZipMiddleware
 from bitrecs.llms.prompt_factory import PromptFactory
 from bitrecs.utils import constants as CONST
+from bitrecs.utils.metrics import REGISTRY
+from bitrecs.utils.tracing import span, stage
 from bitrecs.commerce.product import ProductFactory
 from bitrecs.protocol import BitrecsRequest
 from bitrecs.api.api_core import filter_allowed_ips, limiter
 from bitrecs.api.utils import (
     api_key_validator, get_proxy_public_key, 
-    json_only_middleware, parse_ip_whitelist
+    json_only_middleware, metrics_middleware, parse_ip_whitelist
 )
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
 from cryptography.exceptions import InvalidSignature
@@ -32,6 +35,21 @@ ForwardFn = Callable[[BitrecsRequest], BitrecsRequest]
 SECRET_KEY_LOCALNET = "change-me"
 
 
+def bind_api_socket(host: str, port: int) -> socket.socket:
+    """
+    Listening socket with SO_REUSEPORT, so a standby validator can bind the API port while the
+    old one still serves it during an update. The kernel spreads new connections over both
+    until the old one closes its socket, so ApiServer only binds once the validator is ready.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, "SO_REUSEPORT"):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
 class ApiServer:
     app: FastAPI
     router: APIRouter
@@ -83,6 +101,7 @@ class ApiServer:
         self.app.middleware("http")(partial(json_only_middleware, self))
         # self.app.middleware('http')(partial(api_key_validator, self))
         self.app.middleware("http")(partial(filter_allowed_ips, self))
+        self.app.middleware("http")(metrics_middleware)
         
         self.app.add_exception_handler(Exception, general_exception_handler)
         
@@ -90,14 +109,19 @@ class ApiServer:
             app=self.app,
             host="0.0.0.0",
             port=api_port,
-            log_level="trace" if bt.logging.__trace_on__ else "critical"
+            log_level="trace" if bt.logging.__trace_on__ else "critical",
+            timeout_graceful_shutdown=CONST.API_DRAIN_TIMEOUT
         )
         self.server = Server(config=self.config)
         self._server_thread = None
+        self._stop_event = threading.Event()
+        self.instance = os.environ.get("BITRECS_INSTANCE", "")
 
         self.router = APIRouter()
         self.router.add_api_route("/ping", self.ping, methods=["GET"])
         self.router.add_api_route("/version", self.version, methods=["GET"])
+        self.router.add_api_route("/ready", self.ready, methods=["GET"])
+        self.router.add_api_route("/metrics", self.metrics, methods=["GET"])
         if self.network == "localnet":
             self.router.add_api_route("/rec", self.generate_product_rec_localnet, methods=["POST"]) 
         elif self.network == "testnet":
@@ -196,6 +220,30 @@ class ApiServer:
         return JSONResponse(status_code=200, content={"detail": "pong", "st": st})
     
     
+    def is_ready(self) -> bool:
+        """Serving requests: startup finished and the request loop runs, with or without active miners"""
+        validator = self.validator
+        return bool(validator.startup_complete.is_set() and getattr(validator, "is_running", False)
+                    and not getattr(validator, "should_exit", True))
+
+
+    async def ready(self, request: Request):
+        ready = self.is_ready()
+        content = {
+            "ready": ready,
+            "instance": self.instance,
+            "pid": os.getpid(),
+            "active_miners": len(self.validator.active_miners),
+            "active": self.validator.active_lock.held,
+            "st": int(time.time())
+        }
+        return JSONResponse(status_code=200 if ready else 503, content=content)
+
+
+    async def metrics(self, request: Request):
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
     async def version(self, request: Request):
         bt.logging.info(f"\033[1;32m API Server version \033[0m")
         st = int(time.time())
@@ -222,9 +270,11 @@ class ApiServer:
 
         try:
           
-            await self.verify_request_localnet(request, x_signature, x_timestamp)
+            with stage("verify_signature"):
+                await self.verify_request_localnet(request, x_signature, x_timestamp)
 
-            store_catalog = ProductFactory.try_parse_context(request.context)
+            with stage("parse_catalog"):
+                store_catalog = ProductFactory.try_parse_context(request.context)
             catalog_size = len(store_catalog)
             bt.logging.trace(f"REQUEST CATALOG SIZE: {catalog_size}")
             if catalog_size < CONST.MIN_CATALOG_SIZE or catalog_size > CONST.MAX_CATALOG_SIZE:
@@ -239,7 +289,8 @@ class ApiServer:
                                     content={"detail": "error - dupe threshold reached", "status_code": 400})
 
             st = time.perf_counter()
-            response = await self.forward_fn(request)
+            with span("api.forward"):
+                response = await self.forward_fn(request)
             total_time = time.perf_counter() - st
 
             if len(response.results) == 0:
@@ -247,25 +298,27 @@ class ApiServer:
                 return JSONResponse(status_code=500,
                                     content={"detail": "error - forward", "status_code": 500})
 
-            final_recs = [json.loads(idx.replace("'", '"')) for idx in response.results]            
-            response_text = "Bitrecs Took {:.2f} seconds to process this request".format(total_time)
-
-            response = {
-                "user": "", 
-                "original_query": response.query,
-                "status_code": "200", #front end widgets expects this do not change
-                "status_text": "OK", #front end widgets expects this do not change
-                "response_text": response_text,
-                "created_at": response.created_at,
-                "results": final_recs,
-                "models_used": response.models_used,
-                "catalog_size": str(catalog_size),
-                "miner_uid": response.miner_uid,
-                "miner_hotkey": response.miner_hotkey,
-                "reasoning": f"Bitrecs AI - {self.network}"
-            }
+            with stage("serialize"):
+                final_recs = [json.loads(idx.replace("'", '"')) for idx in response.results]            
+                response_text = "Bitrecs Took {:.2f} seconds to process this request".format(total_time)
+
+                response = {
+                    "user": "", 
+                    "original_query": response.query,
+                    "status_code": "200", #front end widgets expects this do not change
+                    "status_text": "OK", #front end widgets expects this do not change
+                    "response_text": response_text,
+                    "created_at": response.created_at,
+                    "results": final_recs,
+                    "models_used": response.models_used,
+                    "catalog_size": str(catalog_size),
+                    "miner_uid": response.miner_uid,
+                    "miner_hotkey": response.miner_hotkey,
+                    "reasoning": f"Bitrecs AI - {self.network}"
+                }
             
-            return JSONResponse(status_code=200, content=response)
+                serialized = JSONResponse(status_code=200, content=response)
+            return serialized
         
         except HTTPException as h:
             bt.logging.error(f"\033[31m HTTP ERROR API generate_product_rec_localnet:\033[0m {h}")            
@@ -295,7 +348,8 @@ class ApiServer:
         try:
             st_a = int(time.time())
 
-            await self.verify_request_signature(request, x_signature, x_timestamp)
+            with stage("verify_signature"):
+                await self.verify_request_signature(request, x_signature, x_timestamp)
 
             if len(request.context) > 100_000:
                 tc = PromptFactory.get_token_count(request.context)
@@ -304,7 +358,8 @@ class ApiServer:
                     return JSONResponse(status_code=400,
                                         content={"detail": "error - context too large", "status_code": 400})
 
-            store_catalog = ProductFactory.try_parse_context_strict(request.context)
+            with stage("parse_catalog"):
+                store_catalog = ProductFactory.try_parse_context_strict(request.context)
             catalog_size = len(store_catalog)
             bt.logging.trace(f"REQUEST CATALOG SIZE: {catalog_size}")
             if catalog_size < CONST.MIN_CATALOG_SIZE or catalog_size > CONST.MAX_CATALOG_SIZE:
@@ -312,9 +367,11 @@ class ApiServer:
                 return JSONResponse(status_code=400,
                                     content={"detail": "error - invalid catalog - size", "status_code": 400})
             
-            request.context = json.dumps([asdict(store_catalog) for store_catalog in store_catalog], separators=(',', ':'))
+            with stage("normalize_catalog"):
+                request.context = json.dumps([asdict(store_catalog) for store_catalog in store_catalog], separators=(',', ':'))
             sn_t = time.perf_counter()
-            response = await self.forward_fn(request)
+            with span("api.forward"):
+                response = await self.forward_fn(request)
             subnet_time = time.perf_counter() - sn_t
             response_text = "Bitrecs Subnet {} Took {:.2f} seconds to process this request".format(self.network, subnet_time)
             bt.logging.trace(response_text)
@@ -343,25 +400,27 @@ class ApiServer:
 
             #final_recs = [json.loads(idx.replace("'", '"')) for idx in response.results]
             
-            final_recs = [json.loads(idx) for idx in response.results]
-            response = {
-                "user": "", 
-                "original_query": response.query,
-                "status_code": "200", #front end widgets expects this do not change
-                "status_text": "OK", #front end widgets expects this do not change
-                "response_text": response_text,
-                "created_at": response.created_at,
-                "results": final_recs,
-                "models_used": response.models_used,
-                "catalog_size": str(catalog_size),
-                "miner_uid": response.miner_uid,
-                "miner_hotkey": response.miner_hotkey,
-                "reasoning": f"Bitrecs AI - {self.network}"
-            }
-            et_a = int(time.time())
-            total_duration = et_a - st_a
-            bt.logging.info("\033[1;32m Validator - Processed request in {:.2f} seconds \033[0m".format(total_duration))
-            return JSONResponse(status_code=200, content=response)
+            with stage("serialize"):
+                final_recs = [json.loads(idx) for idx in response.results]
+                response = {
+                    "user": "", 
+                    "original_query": response.query,
+                    "status_code": "200", #front end widgets expects this do not change
+                    "status_text": "OK", #front end widgets expects this do not change
+                    "response_text": response_text,
+                    "created_at": response.created_at,
+                    "results": final_recs,
+                    "models_used": response.models_used,
+                    "catalog_size": str(catalog_size),
+                    "miner_uid": response.miner_uid,
+                    "miner_hotkey": response.miner_hotkey,
+                    "reasoning": f"Bitrecs AI - {self.network}"
+                }
+                et_a = int(time.time())
+                total_duration = et_a - st_a
+                bt.logging.info("\033[1;32m Validator - Processed request in {:.2f} seconds \033[0m".format(total_duration))
+                serialized = JSONResponse(status_code=200, content=response)
+            return serialized
         
         except HTTPException as h:
             bt.logging.error(f"\033[31m HTTP ERROR API generate_product_rec_testnet:\033[0m {h}")            
@@ -391,7 +450,8 @@ class ApiServer:
         try:
             st_a = int(time.time())
 
-            await self.verify_request_signature(request, x_signature, x_timestamp)
+            with stage("verify_signature"):
+                await self.verify_request_signature(request, x_signature, x_timestamp)
 
             if len(request.context) > 100_000:
                 tc = PromptFactory.get_token_count(request.context)
@@ -400,7 +460,8 @@ class ApiServer:
                     return JSONResponse(status_code=400,
                                         content={"detail": "error - context too large", "status_code": 400})
 
-            store_catalog = ProductFactory.try_parse_context_strict(request.context)
+            with stage("parse_catalog"):
+                store_catalog = ProductFactory.try_parse_context_strict(request.context)
             catalog_size = len(store_catalog)
             bt.logging.trace(f"REQUEST CATALOG SIZE: {catalog_size}")
             if catalog_size < CONST.MIN_CATALOG_SIZE or catalog_size > CONST.MAX_CATALOG_SIZE:
@@ -408,9 +469,11 @@ class ApiServer:
                 return JSONResponse(status_code=400,
                                     content={"detail": "error - invalid catalog - size", "status_code": 400})
             
-            request.context = json.dumps([asdict(store_catalog) for store_catalog in store_catalog], separators=(',', ':'))
+            with stage("normalize_catalog"):
+                request.context = json.dumps([asdict(store_catalog) for store_catalog in store_catalog], separators=(',', ':'))
             sn_t = time.perf_counter()
-            response = await self.forward_fn(request)
+            with span("api.forward"):
+                response = await self.forward_fn(request)
             subnet_time = time.perf_counter() - sn_t
             response_text = "Bitrecs Subnet {} Took {:.2f} seconds to process this request".format(self.network, subnet_time)
             bt.logging.trace(response_text)
@@ -420,25 +483,27 @@ class ApiServer:
                 return JSONResponse(status_code=500,
                                     content={"detail": "error - forward", "status_code": 500})         
              
-            final_recs = [json.loads(idx) for idx in response.results]
-            response = {
-                "user": "",
-                "original_query": response.query,
-                "status_code": "200", #front end widgets expects this do not change
-                "status_text": "OK", #front end widgets expects this do not change
-                "response_text": response_text,
-                "created_at": response.created_at,
-                "results": final_recs,
-                "models_used": response.models_used,
-                "catalog_size": str(catalog_size),
-                "miner_uid": response.miner_uid,
-                "miner_hotkey": response.miner_hotkey,
-                "reasoning": f"Bitrecs AI - {self.network}"
-            }
-            et_a = int(time.time())
-            total_duration = et_a - st_a
-            bt.logging.info("\033[1;32m Validator - Processed request in {:.2f} seconds \033[0m".format(total_duration))
-            return JSONResponse(status_code=200, content=response)
+            with stage("serialize"):
+                final_recs = [json.loads(idx) for idx in response.results]
+                response = {
+                    "user": "",
+                    "original_query": response.query,
+                    "status_code": "200", #front end widgets expects this do not change
+                    "status_text": "OK", #front end widgets expects this do not change
+                    "response_text": response_text,
+                    "created_at": response.created_at,
+                    "results": final_recs,
+                    "models_used": response.models_used,
+                    "catalog_size": str(catalog_size),
+                    "miner_uid": response.miner_uid,
+                    "miner_hotkey": response.miner_hotkey,
+                    "reasoning": f"Bitrecs AI - {self.network}"
+                }
+                et_a = int(time.time())
+                total_duration = et_a - st_a
+                bt.logging.info("\033[1;32m Validator - Processed request in {:.2f} seconds \033[0m".format(total_duration))
+                serialized = JSONResponse(status_code=200, content=response)
+            return serialized
         
         except HTTPException as h:
             bt.logging.error(f"\033[31m HTTP ERROR API generate_product_rec_mainnet:\033[0m {h}")            
@@ -452,27 +517,39 @@ class ApiServer:
 
 
     def start(self):
-        """Start the API server in a dedicated thread"""
+        """
+        Start the API server in a dedicated thread. The port is only bound once the validator
+        finished starting up (state loaded, first miner_sync done), so a warming up standby never
+        gets live traffic from the shared port. An empty miner list doesn't hold the bind back.
+        """
         if self._server_thread is not None:
             bt.logging.warning("API server is already running")
             return
 
+        self._stop_event.clear()
+
         def run_server():
-            self.server.run()
+            while not self.validator.startup_complete.is_set():
+                if self._stop_event.wait(1):
+                    return
+            sock = bind_api_socket(self.config.host, self.config.port)
+            bt.logging.info(f"API server accepting requests at {self.config.host}:{self.config.port}")
+            self.server.run(sockets=[sock])
 
         self._server_thread = threading.Thread(target=run_server, daemon=True)
         self._server_thread.start()
-        bt.logging.info(f"API server started at {self.config.host}:{self.config.port}")
+        bt.logging.info(f"API server started, waiting for the validator to be ready")
 
 
     def stop(self):
-        """Stop the API server and cleanup"""
+        """Stop accepting connections, let in-flight requests finish for up to API_DRAIN_TIMEOUT, then cleanup"""
         if self._server_thread is None:
             bt.logging.warning("API server is not running")
             return
         
+        self._stop_event.set()
         self.server.should_exit = True
-        self._server_thread.join(timeout=5)
+        self._server_thread.join(timeout=CONST.API_DRAIN_TIMEOUT + 5)
         if self._server_thread.is_alive():
             bt.logging.warning("API server thread did not stop gracefully")
         self._server_thread = None
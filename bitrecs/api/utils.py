@@ -1,3 +1,4 @@
+import time
 import httpx
 import ipaddress
 import bittensor as bt
@@ -5,6 +6,8 @@ from typing import Any, Union
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 from slowapi.errors import RateLimitExceeded
+from bitrecs.utils.metrics import API_REQUESTS, API_REQUEST_SECONDS
+from bitrecs.utils.tracing import span
     
 
 def get_proxy_public_key(proxy_url: str) -> bytes:
@@ -67,6 +70,27 @@ async def json_only_middleware(self, request: Request, call_next) -> Union[JSONR
     return response
 
 
+async def metrics_middleware(request: Request, call_next) -> Response:
+    """
+    Count recommendation requests by status and observe their end to end latency.
+    Also opens the root span of the request trace, its id is returned as X-Request-ID.
+    """
+    if request.url.path != "/rec":
+        return await call_next(request)
+    st = time.perf_counter()
+    status = "500"
+    try:
+        with span("api.rec", path=request.url.path) as root:
+            response = await call_next(request)
+            status = str(response.status_code)
+            root.set("http.status_code", response.status_code)
+            response.headers["X-Request-ID"] = root.request_id
+        return response
+    finally:
+        API_REQUEST_SECONDS.observe(time.perf_counter() - st)
+        API_REQUESTS.inc(status)
+
+
 def parse_ip_whitelist(whitelist_env: str) -> list[str]:    
     if not whitelist_env or not whitelist_env.strip():
         return []    
@@ -160,6 +160,7 @@ class BaseMinerNeuron(BaseNeuron):
             self.should_exit = True
             if self.thread is not None:
                 self.thread.join(5)
+            self.profiler.close()
             self.is_running = False
             bt.logging.debug("Stopped")
 
@@ -25,6 +25,7 @@ from abc import ABC, abstractmethod
 # Sync calls set weights and also resyncs the metagraph.
 from bitrecs.utils.config import check_config, add_args, config
 from bitrecs.utils.misc import ttl_get_block
+from bitrecs.utils.profiling import Profiler
 from bitrecs import __spec_version__ as spec_version
 from bitrecs.mock import MockSubtensor, MockMetagraph
 
@@ -98,6 +99,9 @@ class BaseNeuron(ABC):
         )
         self.step = 0
 
+        self.profiler = Profiler.from_config(self.config, self.config.neuron.name)
+        self.profiler.start()
+
     @abstractmethod
     async def forward(self, synapse: bt.Synapse) -> bt.Synapse:
         ...
@@ -0,0 +1,65 @@
+from dataclasses import dataclass, field
+from typing import List, Tuple
+import bittensor as bt
+
+
+def axon_key(axon: "bt.AxonInfo") -> tuple:
+    """Fields of an axon that matter for querying and ownership"""
+    return (
+        axon.ip,
+        axon.port,
+        axon.ip_type,
+        axon.hotkey,
+        axon.coldkey,
+        axon.version,
+        getattr(axon, "protocol", 4),
+    )
+
+
+@dataclass(frozen=True)
+class MetagraphSnapshot:
+    """
+    Lightweight copy of the parts of a metagraph needed to detect changes after a sync.
+    Replaces a deepcopy of the whole metagraph (tensors, neurons, axons) on every resync.
+    """
+    hotkeys: Tuple[str, ...]
+    axons: Tuple[tuple, ...]
+    digest: int
+
+    @classmethod
+    def capture(cls, metagraph: "bt.metagraph.Metagraph") -> "MetagraphSnapshot":
+        hotkeys = tuple(metagraph.hotkeys)
+        axons = tuple(axon_key(a) for a in metagraph.axons)
+        return cls(hotkeys=hotkeys, axons=axons, digest=hash((hotkeys, axons)))
+
+
+@dataclass
+class MetagraphChanges:
+    """ Explicit change set between two snapshots """
+    replaced_uids: List[int] = field(default_factory=list)
+    new_uids: List[int] = field(default_factory=list)
+    axon_changed_uids: List[int] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.replaced_uids or self.new_uids or self.axon_changed_uids)
+
+    def __str__(self) -> str:
+        return (f"replaced: {self.replaced_uids}, new: {self.new_uids}, "
+                f"axon changes: {self.axon_changed_uids}")
+
+
+def diff_snapshots(previous: MetagraphSnapshot, current: MetagraphSnapshot) -> MetagraphChanges:
+    """O(n) diff of two snapshots, returns an empty change set when the digests match"""
+    changes = MetagraphChanges()
+    if previous.digest == current.digest:
+        return changes
+
+    shared = min(len(previous.hotkeys), len(current.hotkeys))
+    for uid in range(shared):
+        if previous.hotkeys[uid] != current.hotkeys[uid]:
+            changes.replaced_uids.append(uid)
+        elif previous.axons[uid] != current.axons[uid]:
+            changes.axon_changed_uids.append(uid)
+    changes.new_uids = list(range(shared, len(current.hotkeys)))
+    return changes
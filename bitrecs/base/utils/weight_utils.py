@@ -39,9 +39,7 @@ def normalize_max_weight(
         cumsum = np.cumsum(estimation, 0)
 
         # Determine the index of cutoff
-        estimation_sum = np.array(
-            [(len(values) - i - 1) * estimation[i] for i in range(len(values))]
-        )
+        estimation_sum = (len(values) - np.arange(len(values)) - 1) * estimation
         n_values = (estimation / (estimation_sum + cumsum + epsilon) < limit).sum()
 
         # Determine the cutoff based on the index
@@ -104,22 +102,16 @@ def convert_weights_and_uids_for_emit(
         return [], []  # Nothing to set on chain.
     else:
         max_weight = float(np.max(weights))
-        weights = [
-            float(value) / max_weight for value in weights
-        ]  # max-upscale values (max_weight = 1).
-        bittensor.logging.debug(f"setting on chain max: {max_weight} and weights: {weights}")
-
-    weight_vals = []
-    weight_uids = []
-    for i, (weight_i, uid_i) in enumerate(list(zip(weights, uids))):
-        uint16_val = round(
-            float(weight_i) * int(U16_MAX)
-        )
+        weights = weights.astype(np.float64) / max_weight  # max-upscale values (max_weight = 1).
+        bittensor.logging.debug(f"setting on chain max: {max_weight} over {weights.size} weights")
 
-        # Filter zeros
-        if uint16_val != 0:  # Filter zeros
-            weight_vals.append(uint16_val)
-            weight_uids.append(uid_i)
+    # np.rint rounds half to even, same as the builtin round()
+    uint16_vals = np.rint(weights * int(U16_MAX)).astype(np.int64)
+
+    # Filter zeros
+    keep = uint16_vals != 0
+    weight_vals = uint16_vals[keep].tolist()
+    weight_uids = uids[keep].tolist()
 
     bittensor.logging.debug(f"final params: {weight_uids} : {weight_vals}")
     return weight_uids, weight_vals
@@ -146,8 +138,9 @@ def process_weights_for_netuid(
         metagraph = subtensor.metagraph(netuid)
 
     # Cast weights to floats.
+    uids = np.asarray(uids)
     if not isinstance(weights, np.ndarray) or weights.dtype != np.float32:
-        weights = weights.astype(np.float32)
+        weights = np.asarray(weights, dtype=np.float32)
 
     # Network configuration parameters from an subtensor.
     # These parameters determine the range of acceptable weights for each neuron.
@@ -17,7 +17,6 @@
 # DEALINGS IN THE SOFTWARE.
 
 import os
-import copy
 import numpy as np
 import asyncio
 import argparse
@@ -26,11 +25,10 @@ import bittensor as bt
 import time
 import traceback
 import anyio.to_thread
-import wandb
 import anyio
 from random import SystemRandom
 safe_random = SystemRandom()
-from typing import List, Union, Optional
+from typing import List, Set, Union, Optional
 from dataclasses import dataclass
 from queue import SimpleQueue, Empty
 from bitrecs.base.neuron import BaseNeuron
@@ -38,8 +36,13 @@ from bitrecs.base.utils.weight_utils import (
     process_weights_for_netuid,
     convert_weights_and_uids_for_emit, 
 )
+from bitrecs.base.utils.metagraph_utils import MetagraphSnapshot, diff_snapshots
 from bitrecs.utils import constants as CONST
 from bitrecs.utils.config import add_validator_args
+from bitrecs.utils import tracing
+from bitrecs.utils.metrics import Gauge
+from bitrecs.utils.profiling import ProfiledRequest
+from bitrecs.utils.tracing import Span, current_span, new_id, span, stage
 from bitrecs.api.api_server import ApiServer
 from bitrecs.protocol import BitrecsRequest
 from bitrecs.utils.distance import (
@@ -47,20 +50,23 @@ from bitrecs.utils.distance import (
     rec_list_to_set, 
     select_most_similar_bitrecs
 )
-from bitrecs.validator.reward import get_rewards
+from bitrecs.validator.active_lock import ACTIVE_LOCK_FILE, ActiveLock
+from bitrecs.validator.miner_stats import MinerStatsStore
+from bitrecs.validator.quorum import QuorumFanout
+from bitrecs.validator.reward import get_catalog_validator, CatalogValidator
 from bitrecs.validator.rules import validate_br_request
+from bitrecs.validator.state_store import StateStore, ValidatorState
 from bitrecs.utils.logging import (    
-    read_timestamp, 
-    write_timestamp, 
     log_miner_responses_to_sql,
     write_node_info
 )
-from bitrecs.utils.wandb import WandbHelper
-from bitrecs.commerce.user_action import UserAction
+from bitrecs.commerce.user_action import UserActionIndex
+from bitrecs.utils.version import LocalMetadata
 from dotenv import load_dotenv
 load_dotenv()
 
 api_queue = SimpleQueue() # Queue of SynapseEventPair
+Gauge("bitrecs_api_queue_depth", "API requests waiting for the validator loop", fn=api_queue.qsize)
 
 @dataclass
 class SynapseWithEvent:
@@ -68,11 +74,14 @@ class SynapseWithEvent:
     input_synapse: BitrecsRequest
     event: threading.Event
     output_synapse: BitrecsRequest
+    request_id: str = ""
+    span: Optional[Span] = None # API span the validator loop continues the trace from
 
 
 async def api_forward(synapse: BitrecsRequest) -> BitrecsRequest:
     """ Forward function for API server. """
     bt.logging.trace(f"API FORWARD validator synapse type: {type(synapse)}")
+    parent = current_span()
     synapse_with_event = SynapseWithEvent(
         input_synapse=synapse,
         event=threading.Event(),
@@ -88,7 +97,9 @@ async def api_forward(synapse: BitrecsRequest) -> BitrecsRequest:
             models_used=[""],
             miner_uid="",
             miner_hotkey=""
-        )
+        ),
+        request_id=parent.request_id if parent else new_id(16),
+        span=parent
     )
     api_queue.put(synapse_with_event)
     # Wait until the main thread marks this synapse as processed.
@@ -111,8 +122,9 @@ class BaseValidatorNeuron(BaseNeuron):
     def __init__(self, config=None):
         super().__init__(config=config)
 
-        # Save a copy of the hotkeys to local memory.
-        self.hotkeys = copy.deepcopy(self.metagraph.hotkeys)      
+        # Snapshot the metagraph and keep the hotkeys from it, resync diffs against this snapshot.
+        self.metagraph_snapshot = MetagraphSnapshot.capture(self.metagraph)
+        self.hotkeys = list(self.metagraph_snapshot.hotkeys)
 
         self.dendrite = bt.dendrite(wallet=self.wallet)
         bt.logging.info(f"Dendrite: {self.dendrite}")
@@ -120,6 +132,16 @@ class BaseValidatorNeuron(BaseNeuron):
         # Set up initial scoring weights for validation
         bt.logging.info("Building validation weights.")
         self.scores = np.zeros(self.metagraph.n, dtype=np.float32)
+        self.scores_lock = threading.Lock()
+        self.chain_sync_requested = threading.Event()
+        self.chain_thread: Union[threading.Thread, None] = None
+        self.miner_stats = MinerStatsStore(window=self.config.neuron.stats_window)
+        self.state_store = StateStore(self.config.neuron.full_path, min_interval=CONST.STATE_SAVE_INTERVAL)
+        self.active_lock = ActiveLock(os.path.join(self.config.neuron.full_path, ACTIVE_LOCK_FILE))
+        self.state_loaded = False
+
+        # Restore saved scores before the first sync, which sets weights and saves state.
+        self.load_state()
 
         # Init sync with the network. Updates the metagraph.
         self.sync()
@@ -132,11 +154,18 @@ class BaseValidatorNeuron(BaseNeuron):
             raise Exception("Axon off, not serving ip to chain.")
         
         api_port = int(os.environ.get("VALIDATOR_API_PORT"))
-        if api_port != 7779:
-            raise Exception("API Port must be set to 7779")
+        if api_port != CONST.VALIDATOR_API_PORT:
+            raise Exception(f"API Port must be set to {CONST.VALIDATOR_API_PORT}")
         
         self.api_port = api_port
         self.api_server = None
+        # Set once by the first miner_sync, the API only binds its port after that
+        self.startup_complete = threading.Event()
+        tracing.configure(
+            self.config.tracing.exporter,
+            self.config.tracing.path or os.path.join(self.config.neuron.full_path, "traces.jsonl")
+        )
+        self.local_metadata = LocalMetadata.local_metadata()
         if self.config.api.enabled:            
             self.api_server = ApiServer(
                 api_port=self.api_port,
@@ -154,7 +183,10 @@ class BaseValidatorNeuron(BaseNeuron):
         self.lock = asyncio.Lock()
         self.active_miners: List[int] = []
         self.network = os.environ.get("NETWORK").strip().lower() #localnet / testnet / mainnet        
-        self.user_actions: List[UserAction] = []
+        self.user_actions = UserActionIndex()
+        self.pending_rounds: Set[asyncio.Task] = set()
+        Gauge("bitrecs_active_miners", "Miners selected for requests by miner_sync", fn=lambda: len(self.active_miners))
+        Gauge("bitrecs_pending_rounds", "Rounds still collecting straggler responses", fn=lambda: len(self.pending_rounds))
         
         write_node_info(
             network=self.network,
@@ -172,6 +204,9 @@ class BaseValidatorNeuron(BaseNeuron):
                 bt.logging.error("Wandb project name not set")
                 raise Exception("Wandb project name not set")
             else:
+                # wandb is only imported when enabled, it is one of the slowest imports of the validator
+                import wandb
+                from bitrecs.utils.wandb import WandbHelper
                 wandb_config = {
                     "network": self.network,
                     "neuron_type": self.neuron_type,
@@ -284,6 +319,57 @@ class BaseValidatorNeuron(BaseNeuron):
             return
         
 
+    async def get_api_request(self) -> Optional[SynapseWithEvent]:
+        """Wait for the next API request without blocking the event loop, so background rounds keep running."""
+        while not self.should_exit:
+            try:
+                return await asyncio.to_thread(api_queue.get, True, 0.5)
+            except Empty:
+                continue
+        return None
+
+
+    def start_fanout(self, axons: List[bt.AxonInfo], request: BitrecsRequest, 
+                     num_recs: int, catalog_validator: Optional[CatalogValidator]) -> QuorumFanout:
+        return QuorumFanout(
+            dendrite=self.dendrite,
+            axons=axons,
+            synapse=request,
+            num_recs=num_recs,
+            catalog_validator=catalog_validator,
+            actions=self.user_actions,
+            timeout=min(5, CONST.MAX_DENDRITE_TIMEOUT),
+            quorum=self.config.neuron.quorum_size,
+            min_similarity=self.config.neuron.quorum_similarity
+        )
+
+
+    async def finish_round(self, fanout: QuorumFanout, uids: List[int], step: int, consensus: List[BitrecsRequest] = None,
+                           parent: Optional[Span] = None):
+        """Wait for every miner in the round, then update scores, miner stats and log the responses."""
+        try:
+            with span("validator.finish_round", parent=parent, miners=len(uids)):
+                responses, rewards = await fanout.wait_all()
+                bt.logging.info(f"Scored responses: {rewards}")
+                self.update_scores(rewards, uids)
+                consensus_uids = [uid for uid, r in zip(uids, responses) if any(r is c for c in consensus or [])]
+                self.miner_stats.record_round(uids, responses, rewards, consensus_uids)
+                with span("log_miner_responses_to_sql"):
+                    log_miner_responses_to_sql(step, [r for r in responses if r is not None])
+        except Exception as e:
+            bt.logging.error(f"finish_round failed with exception: {e}")
+            bt.logging.error(traceback.format_exc())
+
+
+    async def record_failed_round(self, fanout: QuorumFanout, uids: List[int]):
+        """Record a round without a valid response in the miner stats, scores are left unchanged."""
+        try:
+            responses, rewards = await fanout.wait_all()
+            self.miner_stats.record_round(uids, responses, rewards)
+        except Exception as e:
+            bt.logging.error(f"record_failed_round failed with exception: {e}")
+
+
     async def main_loop(self):
         """Main loop for the validator."""
         bt.logging.info(
@@ -295,6 +381,8 @@ class BaseValidatorNeuron(BaseNeuron):
         bt.logging.info(f"Validator SAMPLE SIZE: {self.config.neuron.sample_size}")
         try:
             while True:
+                request_span: Optional[Span] = None
+                profiled: Optional[ProfiledRequest] = None
                 try:
                     api_enabled = self.config.api.enabled
                     api_exclusive = self.config.api.exclusive
@@ -302,8 +390,12 @@ class BaseValidatorNeuron(BaseNeuron):
 
                     synapse_with_event: Optional[SynapseWithEvent] = None
                     try:
-                        synapse_with_event = api_queue.get()
-                        bt.logging.info(f"NEW API REQUEST {synapse_with_event.input_synapse.name}")
+                        synapse_with_event = await self.get_api_request()
+                        if synapse_with_event is not None:
+                            bt.logging.info(f"NEW API REQUEST {synapse_with_event.input_synapse.name} request_id: {synapse_with_event.request_id}")
+                            request_span = Span("validator.request", parent=synapse_with_event.span,
+                                                request_id=synapse_with_event.request_id, queue_depth=api_queue.qsize())
+                            profiled = self.profiler.request()
                     except Empty:
                         # No synapse from API server.
                         pass #continue prevents regular val loop
@@ -329,55 +421,39 @@ class BaseValidatorNeuron(BaseNeuron):
                         api_request = synapse_with_event.input_synapse
                         number_of_recs_desired = api_request.num_results
                         
+                        catalog_validator = get_catalog_validator(number_of_recs_desired, api_request)
+                        if not self.user_actions:
+                            bt.logging.warning(f"\033[1;33m WARNING - no actions found for scoring \033[0m")
+
                         st = time.perf_counter()
-                        responses = await self.dendrite.forward(
-                            axons = chosen_axons, 
-                            synapse = api_request,
-                            timeout = min(5, CONST.MAX_DENDRITE_TIMEOUT),
-                            deserialize=False,
-                            run_async=True
-                        )
-                        #TODO: 503 error handling async bug?
-                        any_success = any([r for r in responses if r.is_success])
-                        if not any_success:
-                            bt.logging.error("\033[1;33mRETRY ATTEMPT\033[0m")
-                            responses = await self.dendrite.forward(
-                                axons = chosen_axons, 
-                                synapse = api_request,
-                                timeout = min(5, CONST.MAX_DENDRITE_TIMEOUT),
-                                deserialize=False,
-                                run_async=True
-                            )
+                        with stage("forward", parent=request_span, miners=len(chosen_axons)):
+                            fanout = self.start_fanout(chosen_axons, api_request, number_of_recs_desired, catalog_validator)
+                            quorum_reached = await fanout.wait_for_quorum()
+                            #TODO: 503 error handling async bug?
+                            if not quorum_reached and not fanout.any_success:
+                                bt.logging.error("\033[1;33mRETRY ATTEMPT\033[0m")
+                                fanout = self.start_fanout(chosen_axons, api_request, number_of_recs_desired, catalog_validator)
+                                quorum_reached = await fanout.wait_for_quorum()
                         et = time.perf_counter()
-                        bt.logging.trace(f"Miners responded with {len(responses)} responses in \033[1;32m{et-st:0.4f}\033[0m seconds")                        
-                       
-                        # Adjust the scores based on responses from miners.
-                        rewards = get_rewards(num_recs=number_of_recs_desired,
-                                              ground_truth=api_request,
-                                              responses=responses, actions=self.user_actions)
-                        
-                        if not len(chosen_uids) == len(responses) == len(rewards):
-                            bt.logging.error("MISMATCH in lengths of chosen_uids, responses and rewards")
-                            synapse_with_event.event.set()
-                            continue                                                
+                        bt.logging.trace(f"Miners responded with {fanout.completed}/{len(chosen_axons)} responses in \033[1;32m{et-st:0.4f}\033[0m seconds")
                         
                         # Default - send top score to client
-                        selected_rec = rewards.argmax()
-                        good_indices = np.where(rewards > 0)[0]
-                        if len(good_indices) > 0:
-                            good_responses = [responses[i] for i in good_indices]
-                            bt.logging.info(f"Filtered to {len(good_responses)} from {len(responses)} total responses")
-                            top_k = await self.analyze_similar_requests(number_of_recs_desired, good_responses)
+                        elected : BitrecsRequest = fanout.best_response()
+                        top_k = None
+                        good_responses = fanout.good_responses()
+                        if len(good_responses) > 0:
+                            bt.logging.info(f"Filtered to {len(good_responses)} from {fanout.completed} total responses")
+                            with stage("consensus", parent=request_span):
+                                top_k = await self.analyze_similar_requests(number_of_recs_desired, good_responses)
                             if top_k and 1==1: #Top score now pulled from top_k
-                                winner = safe_random.sample(top_k, 1)[0]
-                                bt.logging.info(f"\033[1;32m Consensus miner: {winner.miner_uid} from {winner.models_used} - batch: {winner.site_key} \033[0m")                                
-                                selected_rec = responses.index(winner)
+                                elected = safe_random.sample(top_k, 1)[0]
+                                bt.logging.info(f"\033[1;32m Consensus miner: {elected.miner_uid} from {elected.models_used} - batch: {elected.site_key} \033[0m")
                         else:
                             bt.logging.error("\033[1;33mZERO rewards - no valid candidates in responses \033[0m")
                             synapse_with_event.event.set()
+                            await self.record_failed_round(fanout, chosen_uids)
                             continue
                     
-                        elected : BitrecsRequest = responses[selected_rec]
                         elected.context = ""
                         elected.user = ""
 
@@ -398,10 +474,14 @@ class BaseValidatorNeuron(BaseNeuron):
                         # Mark the synapse as processed, API will then return to the client
                         synapse_with_event.event.set()
                         self.total_request_in_interval +=1
-                    
-                        bt.logging.info(f"Scored responses: {rewards}")
-                        self.update_scores(rewards, chosen_uids)
-                        log_miner_responses_to_sql(self.step, responses)
+
+                        if quorum_reached:
+                            # Stragglers are still running, score them off the request path
+                            task = asyncio.create_task(self.finish_round(fanout, chosen_uids, self.step, top_k, request_span))
+                            self.pending_rounds.add(task)
+                            task.add_done_callback(self.pending_rounds.discard)
+                        else:
+                            await self.finish_round(fanout, chosen_uids, self.step, top_k, request_span)
                         
                     else:
                         if not api_exclusive: #Regular validator loop  
@@ -412,15 +492,10 @@ class BaseValidatorNeuron(BaseNeuron):
                     if self.should_exit:
                         return
 
-                    try:
-                        if self.step >= 1 and self.step % 5 == 0:
-                            self.sync()
-                      
-                    except Exception as e:
-                        bt.logging.error(traceback.format_exc())
-                        bt.logging.error(f"Failed to sync with exception: {e}")
-                    finally:
-                        self.step += 1
+                    if self.step >= 1 and self.step % 5 == 0:
+                        # Chain I/O runs on the chain worker thread, never on the request path
+                        self.chain_sync_requested.set()
+                    self.step += 1
 
                 except Exception as e:
                     bt.logging.error(f"Main validator RUN loop exception: {e}")
@@ -431,6 +506,10 @@ class BaseValidatorNeuron(BaseNeuron):
                     bt.logging.error("\033[31m Sleeping for 60 seconds ... \033[0m")
                     await asyncio.sleep(60)
                 finally:
+                    if request_span is not None:
+                        request_span.end()
+                    if profiled is not None:
+                        profiled.end()
                     if api_enabled and api_exclusive:
                         bt.logging.info(f"API MODE - forward finished, ready for next request")                        
                     else:
@@ -465,19 +544,48 @@ class BaseValidatorNeuron(BaseNeuron):
             self.should_exit = False
             self.thread = threading.Thread(target=lambda: anyio.run(self.run), daemon=True)
             self.thread.start()
+            self.chain_thread = threading.Thread(target=self.chain_worker, daemon=True, name="chain_sync")
+            self.chain_thread.start()
             self.is_running = True
             bt.logging.debug("Started")
 
+    def chain_worker(self):
+        """
+        Runs sync() (registration check, metagraph resync, set_weights, save_state) off the request path.
+        Syncs when the main loop asks for it or every CHAIN_SYNC_INTERVAL seconds.
+        """
+        while not self.should_exit:
+            self.chain_sync_requested.wait(timeout=CONST.CHAIN_SYNC_INTERVAL)
+            self.chain_sync_requested.clear()
+            if self.should_exit:
+                return
+            st = time.perf_counter()
+            try:
+                self.sync()
+            except Exception as e:
+                bt.logging.error(traceback.format_exc())
+                bt.logging.error(f"Failed to sync with exception: {e}")
+            finally:
+                bt.logging.trace(f"chain sync finished in {time.perf_counter() - st:.2f}s")
+
     def stop_run_thread(self):
         """
         Stops the validator's operations that are running in the background thread.
         """
         if self.is_running:
             bt.logging.debug("Stopping validator in background thread.")
-            self.should_exit = True
+            # Drain the API first, its in-flight requests still need the request loop
             if self.api_server:
                 self.api_server.stop()
+            self.should_exit = True
+            self.chain_sync_requested.set()
             self.thread.join(5)
+            if self.chain_thread is not None:
+                self.chain_thread.join(CONST.CHAIN_THREAD_JOIN_TIMEOUT)
+            self.save_state(force=True)
+            self.active_lock.release()
+            tracing.shutdown()
+            self.profiler.close()
             self.is_running = False
             bt.logging.debug("Stopped")
 
@@ -492,28 +600,55 @@ class BaseValidatorNeuron(BaseNeuron):
         """
         if self.is_running:
             bt.logging.debug("Stopping validator in background thread.")
-            self.should_exit = True
+            # Drain the API first, its in-flight requests still need the request loop
             if self.api_server:
                 self.api_server.stop()
+            self.should_exit = True
+            self.chain_sync_requested.set()
             self.thread.join(5)
+            if self.chain_thread is not None:
+                self.chain_thread.join(CONST.CHAIN_THREAD_JOIN_TIMEOUT)
+            self.save_state(force=True)
+            self.active_lock.release()
+            tracing.shutdown()
+            self.profiler.close()
             self.is_running = False
             bt.logging.debug("Stopped")
 
+    def is_active(self) -> bool:
+        """
+        True for the instance that sets weights and owns the shared local data, False for a standby
+        while the old validator still runs during an update. See ActiveLock.
+        """
+        was_active = self.active_lock.held
+        active = self.active_lock.acquire()
+        if active and not was_active:
+            bt.logging.info(f"Validator instance {os.environ.get('BITRECS_INSTANCE', os.getpid())} is active")
+        return active
+
     def set_weights(self):
         """
         Sets the validator weights to the metagraph hotkeys based on the scores it has received from the miners. The weights determine the trust and incentive level the validator assigns to miner nodes on the network.
         """
+        if not self.is_active():
+            bt.logging.trace("Standby instance, set_weights skipped")
+            return
+
+        # Work on a copy, the request loop keeps updating scores while weights are set.
+        with self.scores_lock:
+            scores = np.copy(self.scores)
+            metagraph = self.metagraph
 
-        # Check if self.scores contains any NaN values and log a warning if it does.
+        # Check if scores contains any NaN values and log a warning if it does.
         bt.logging.info(f"set_weights on chain start")       
-        bt.logging.info(f"Scores: {self.scores}")       
+        bt.logging.info(f"Scores: {scores}")       
 
-        if np.isnan(self.scores).any():
+        if np.isnan(scores).any():
             bt.logging.warning(
                 f"Scores contain NaN values. This may be due to a lack of responses from miners, or a bug in your reward functions."
             )
         
-        if np.all(self.scores == 0):
+        if np.all(scores == 0):
             bt.logging.warning(
                 f"Scores are all zero. This may be due to a lack of responses from miners, or a bug in your reward functions."
             )
@@ -522,7 +657,7 @@ class BaseValidatorNeuron(BaseNeuron):
         # Calculate the average reward for each uid across non-zero values.
         # Replace any NaN values with 0.
         # Compute the norm of the scores
-        norm = np.linalg.norm(self.scores, ord=1, axis=0, keepdims=True)
+        norm = np.linalg.norm(scores, ord=1, axis=0, keepdims=True)
 
         # Check if the norm is zero or contains NaN values
         if np.any(norm == 0) or np.isnan(norm).any():
@@ -531,7 +666,7 @@ class BaseValidatorNeuron(BaseNeuron):
         bt.logging.debug("norm", norm)
         
         # Compute raw_weights safely
-        raw_weights = self.scores / norm         
+        raw_weights = scores / norm         
         
         # Printing type of arr object
         bt.logging.debug("Array is of type: ", type(raw_weights))
@@ -543,7 +678,7 @@ class BaseValidatorNeuron(BaseNeuron):
         bt.logging.debug("Size of array: ", raw_weights.size)
         # Printing type of elements in array
         bt.logging.debug("Array stores elements of type: ", raw_weights.dtype)        
-        bt.logging.debug("uids", str(self.metagraph.uids.tolist()))
+        bt.logging.debug("uids", str(metagraph.uids.tolist()))
         bt.logging.debug("raw_weights", str(raw_weights))
         
         # Process the raw weights to final_weights via subtensor limitations.
@@ -552,11 +687,11 @@ class BaseValidatorNeuron(BaseNeuron):
                 processed_weight_uids,
                 processed_weights,
             ) = process_weights_for_netuid(
-                uids=self.metagraph.uids,
+                uids=metagraph.uids,
                 weights=raw_weights,
                 netuid=self.config.netuid,
                 subtensor=self.subtensor,
-                metagraph=self.metagraph,
+                metagraph=metagraph,
             )
         except Exception as e:
             bt.logging.error(f"process_weights_for_netuid function error: {e}")
@@ -613,35 +748,41 @@ class BaseValidatorNeuron(BaseNeuron):
         """Resyncs the metagraph and updates the hotkeys and moving averages based on the new metagraph."""
         bt.logging.info("resync_metagraph()")
 
-        # Copies state of metagraph before syncing.
-        previous_metagraph = copy.deepcopy(self.metagraph)
+        # Snapshot of the metagraph before syncing, kept from the previous resync.
+        previous_snapshot = self.metagraph_snapshot
 
-        # Sync the metagraph.
-        self.metagraph.sync(subtensor=self.subtensor)
+        # Sync a fresh metagraph and swap it in, the request path never sees a half synced one.
+        metagraph = self.subtensor.metagraph(self.config.netuid)
+        snapshot = MetagraphSnapshot.capture(metagraph)
 
-        # Check if the metagraph axon info has changed.
-        if previous_metagraph.axons == self.metagraph.axons:
-            return
+        # Check if the metagraph hotkeys or axon info have changed.
+        changes = diff_snapshots(previous_snapshot, snapshot)
+        if changes.changed:
+            bt.logging.info(
+                f"Metagraph updated, re-syncing hotkeys, dendrite pool and moving averages - {changes}"
+            )
 
-        bt.logging.info(
-            "Metagraph updated, re-syncing hotkeys, dendrite pool and moving averages"
-        )
-        # Zero out all hotkeys that have been replaced.
-        for uid, hotkey in enumerate(self.hotkeys):
-            if hotkey != self.metagraph.hotkeys[uid]:
-                self.scores[uid] = 0  # hotkey has been replaced
-
-        # Check to see if the metagraph has changed size.
-        # If so, we need to add new hotkeys and moving averages.
-        if len(self.hotkeys) < len(self.metagraph.hotkeys):
-            # Update the size of the moving average scores.
-            new_moving_average = np.zeros((self.metagraph.n))
-            min_len = min(len(self.hotkeys), len(self.scores))
-            new_moving_average[:min_len] = self.scores[:min_len]
-            self.scores = new_moving_average
-
-        # Update the hotkeys.
-        self.hotkeys = copy.deepcopy(self.metagraph.hotkeys)
+        # Resize the scores and swap the metagraph together, update_scores and set_weights
+        # never see a metagraph and a scores array of different sizes.
+        with self.scores_lock:
+            # Zero out all hotkeys that have been replaced.
+            for uid in changes.replaced_uids:
+                if uid < len(self.scores):
+                    self.scores[uid] = 0  # hotkey has been replaced
+                self.miner_stats.reset(uid)
+
+            # Check to see if the metagraph has changed size.
+            # If so, we need to add new hotkeys and moving averages.
+            if len(self.scores) < metagraph.n:
+                # Update the size of the moving average scores.
+                new_moving_average = np.zeros((metagraph.n))
+                new_moving_average[:len(self.scores)] = self.scores
+                self.scores = new_moving_average
+
+            self.metagraph = metagraph
+            self.metagraph_snapshot = snapshot
+            # Update the hotkeys.
+            self.hotkeys = list(snapshot.hotkeys)
 
     def update_scores(self, rewards: np.ndarray, uids: List[int]):
         """Performs exponential moving average on the scores based on the rewards received from the miners."""
@@ -676,49 +817,75 @@ class BaseValidatorNeuron(BaseNeuron):
                 f"cannot be broadcast to uids array of shape {uids_array.shape}"
             )
 
-        # Compute forward pass rewards, assumes uids are mutually exclusive.
-        # shape: [ metagraph.n ]
-        scattered_rewards: np.ndarray = np.zeros_like(self.scores)
-        scattered_rewards[uids_array] = rewards
-        #bt.logging.debug(f"Scattered rewards: {rewards}")
-
-        # Update scores with rewards produced by this step.
-        # shape: [ metagraph.n ]
-        alpha: float = self.config.neuron.moving_average_alpha
-        self.scores: np.ndarray = (
-            alpha * scattered_rewards + (1 - alpha) * self.scores
-        )
+        with self.scores_lock:
+            # Compute forward pass rewards, assumes uids are mutually exclusive.
+            # shape: [ metagraph.n ]
+            scattered_rewards: np.ndarray = np.zeros_like(self.scores)
+            scattered_rewards[uids_array] = rewards
+            #bt.logging.debug(f"Scattered rewards: {rewards}")
+
+            # Update scores with rewards produced by this step.
+            # shape: [ metagraph.n ]
+            alpha: float = self.config.neuron.moving_average_alpha
+            self.scores: np.ndarray = (
+                alpha * scattered_rewards + (1 - alpha) * self.scores
+            )
         bt.logging.debug(f"Updated moving avg scores: {self.scores}")
 
-    def save_state(self):                
-        np.savez(self.config.neuron.full_path + "/state.npz",
-                 step=self.step,
-                 scores=self.scores,
-                 hotkeys=self.hotkeys)        
-        bt.logging.info("Saving validator state.")
-        write_timestamp(time.time())
+    def save_state(self, force: bool = False):
+        if not self.state_loaded:
+            # Never overwrite state.npz with the blank scores the validator starts from
+            bt.logging.trace("State not loaded yet, save_state skipped")
+            return
+        if not self.is_active():
+            bt.logging.trace("Standby instance, save_state skipped")
+            return
+        with self.scores_lock:
+            scores = np.copy(self.scores)
+        state = ValidatorState(
+            step=self.step,
+            scores=scores,
+            hotkeys=list(self.hotkeys),
+            miner_stats=self.miner_stats.to_dict()
+        )
+        try:
+            if self.state_store.save(state, force=force):
+                bt.logging.info("Saving validator state.")
+            else:
+                bt.logging.trace("Validator state unchanged or saved recently, skipped.")
+        except Exception as e:
+            bt.logging.error(f"Failed to save state: {e}")
 
 
     def load_state(self):
         try:
-            if not os.path.exists(self.config.neuron.full_path + "/state.npz"):
+            state = self.state_store.load()
+            if state is None:
                 bt.logging.info("No state found - initializing first step")
                 self.step = 0
                 return
 
-            state = np.load(self.config.neuron.full_path + "/state.npz", allow_pickle=True)
-            self.step = int(state["step"])
-            self.scores = state["scores"]
-            self.hotkeys = state["hotkeys"]
-            
-            ts = read_timestamp()
-            if ts:
-                bt.logging.info(f"ts State last write from {ts}")
-            else:
-                bt.logging.warning("No timestamp found for loaded state")
+            self.step = state.step
+            self.scores = state.scores
+            self.hotkeys = state.hotkeys
+            self.miner_stats.load_dict(state.miner_stats)
+
+            # Zero out hotkeys replaced while the validator was down, resync only diffs from here on.
+            current = self.metagraph_snapshot.hotkeys
+            for uid, hotkey in enumerate(self.hotkeys):
+                if uid < len(current) and uid < len(self.scores) and hotkey != current[uid]:
+                    self.scores[uid] = 0
+                    self.miner_stats.reset(uid)
+            if len(self.scores) < len(current):
+                self.scores = np.concatenate([self.scores, np.zeros(len(current) - len(self.scores), dtype=self.scores.dtype)])
+            self.hotkeys = list(current)
+
+            bt.logging.info(f"State v{state.schema_version} last write from {state.saved_at}")
                 
         except Exception as e:
             bt.logging.error(f"Failed to load state: {e}")
             self.step = 0
+        finally:
+            self.state_loaded = True
 
 
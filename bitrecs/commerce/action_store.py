@@ -0,0 +1,207 @@
+import os
+import json
+import sqlite3
+import requests
+import bittensor as bt
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional
+from bitrecs.commerce.user_action import UserActionIndex
+
+ACTIONS_DB = "user_actions.db"
+ACTION_PAGE_SECONDS = 6 * 3600
+ACTION_INSERT_BATCH = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_actions (
+    hot_key TEXT NOT NULL,
+    action TEXT NOT NULL,
+    sku TEXT,
+    user TEXT,
+    ip TEXT,
+    site_info TEXT,
+    created_at TEXT,
+    day TEXT NOT NULL,
+    UNIQUE (hot_key, action, sku, user, created_at)
+);
+CREATE INDEX IF NOT EXISTS idx_user_actions_day ON user_actions(day);
+CREATE TABLE IF NOT EXISTS action_watermark (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    synced_to INTEGER NOT NULL
+);
+"""
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[object]:
+    """
+    Yield the elements of a top level JSON array as they arrive, holding only the
+    undecoded tail of the stream in memory instead of the whole body.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer, pos, started = "", 0, False
+
+    def more() -> bool:
+        nonlocal buffer, pos
+        for chunk in chunks:
+            if chunk:
+                buffer, pos = buffer[pos:] + chunk, 0
+                return True
+        return False
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            if buffer[pos] == "," and not started:
+                raise ValueError("Expected a JSON array")
+            pos += 1
+        if pos >= len(buffer):
+            if not more():
+                raise ValueError("Unexpected end of JSON array")
+            continue
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if not more():
+                raise
+            continue
+        yield item
+
+
+class UserActionStore:
+    """
+    Local SQLite copy of the storefront actions in the sync window.
+
+    `synced_to` is the end of the last window fetched from the proxy, so each sync only asks
+    for the delta. Duplicate actions on window edges are ignored by the unique key. Missing sku
+    and user are stored as '' since SQLite treats NULLs in a unique key as distinct.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        with self.conn:
+            # Rows written with NULL before they were normalized, those that now collide are duplicates
+            self.conn.execute("UPDATE OR IGNORE user_actions SET sku = COALESCE(sku, ''), user = COALESCE(user, '') "
+                              "WHERE sku IS NULL OR user IS NULL")
+            self.conn.execute("DELETE FROM user_actions WHERE sku IS NULL OR user IS NULL")
+
+
+    def synced_to(self) -> int:
+        row = self.conn.execute("SELECT synced_to FROM action_watermark WHERE id = 0").fetchone()
+        return row[0] if row else 0
+
+
+    def add(self, actions: Iterable[dict], index: Optional[UserActionIndex] = None) -> int:
+        """Insert actions in batches, new ones are also counted in index. Returns how many were new"""
+        added = 0
+        batch = []
+        for action in actions:
+            if not isinstance(action, dict) or not isinstance(action.get("hot_key"), str) or not action.get("action"):
+                continue
+            batch.append(action)
+            if len(batch) >= ACTION_INSERT_BATCH:
+                added += self._insert(batch, index)
+                batch = []
+        if batch:
+            added += self._insert(batch, index)
+        return added
+
+
+    def _insert(self, batch: list, index: Optional[UserActionIndex]) -> int:
+        new = []
+        with self.conn:
+            for a in batch:
+                created_at = str(a.get("created_at") or "")
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO user_actions (hot_key, action, sku, user, ip, site_info, created_at, day) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (a["hot_key"], a["action"], str(a.get("sku") or ""), str(a.get("user") or ""), a.get("ip"), a.get("site_info"),
+                     created_at, created_at[:10])
+                )
+                if cursor.rowcount:
+                    new.append(a)
+        if index is not None:
+            index.add(new)
+        return len(new)
+
+
+    def set_synced_to(self, timestamp: int):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO action_watermark (id, synced_to) VALUES (0, ?) "
+                "ON CONFLICT(id) DO UPDATE SET synced_to = excluded.synced_to", (timestamp,)
+            )
+
+
+    def evict_before(self, day: str) -> int:
+        with self.conn:
+            return self.conn.execute("DELETE FROM user_actions WHERE day < ?", (day,)).rowcount
+
+
+    def load_index(self) -> UserActionIndex:
+        """Rebuild the index from disk, used on startup instead of refetching the window"""
+        index = UserActionIndex()
+        cursor = self.conn.execute("SELECT hot_key, action, created_at FROM user_actions")
+        while True:
+            rows = cursor.fetchmany(ACTION_INSERT_BATCH)
+            if not rows:
+                break
+            index.add({"hot_key": h, "action": a, "created_at": c} for h, a, c in rows)
+        return index
+
+
+    def close(self):
+        self.conn.close()
+
+
+def fetch_actions_page(proxy_url: str, dt_from: int, dt_to: int, timeout: float = 30) -> Iterator[dict]:
+    """Stream one window of actions from the proxy"""
+    with requests.get(f"{proxy_url}/miner/stats/from/{dt_from}/to/{dt_to}", timeout=timeout, stream=True) as r:
+        r.raise_for_status()
+        r.encoding = r.encoding or "utf-8"
+        yield from iter_json_array(r.iter_content(chunk_size=65536, decode_unicode=True))
+
+
+def sync_user_actions(
+    store: UserActionStore,
+    index: UserActionIndex,
+    start_date: datetime,
+    end_date: datetime,
+    page_seconds: int = ACTION_PAGE_SECONDS
+) -> int:
+    """
+    Fetch actions between the watermark (or start_date) and end_date in pages of page_seconds,
+    persist them and add them to index, then drop everything before start_date from both.
+    The watermark moves after every page so an interrupted sync resumes where it stopped.
+    Returns the number of new actions.
+    """
+    proxy_url = os.environ.get("BITRECS_PROXY_URL")
+    if not proxy_url:
+        bt.logging.warning("BITRECS_PROXY_URL is not set. Cannot sync user actions.")
+        return 0
+    proxy_url = proxy_url.removesuffix("/")
+
+    dt_start = int(start_date.timestamp())
+    dt_end = int(end_date.timestamp())
+    dt_from = max(store.synced_to(), dt_start)
+    added = 0
+    while dt_from < dt_end:
+        dt_to = min(dt_from + page_seconds, dt_end)
+        added += store.add(fetch_actions_page(proxy_url, dt_from, dt_to), index)
+        store.set_synced_to(dt_to)
+        dt_from = dt_to
+
+    cutoff_day = datetime.fromtimestamp(dt_start, tz=timezone.utc).strftime("%Y-%m-%d")
+    evicted = store.evict_before(cutoff_day)
+    index.evict_before(cutoff_day)
+    bt.logging.trace(f"User actions sync added {added} evicted {evicted} total {len(index)}")
+    return added
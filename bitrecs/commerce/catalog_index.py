@@ -0,0 +1,161 @@
+import re
+import json
+import zlib
+import hashlib
+import threading
+import numpy as np
+import bittensor as bt
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import List, Optional
+from bitrecs.commerce.product import Product, ProductFactory
+from bitrecs.utils.metrics import register_cache
+
+EMBEDDING_DIM = 512
+MAX_CACHED_INDEXES = 8
+RE_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def catalog_hash(context: str) -> str:
+    """Stable hash of a raw catalog context string"""
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()
+
+
+def _features(text: str) -> List[str]:
+    """
+    Word unigrams plus character trigrams of each word.
+    Trigrams make the vectors tolerant to plurals and variant suffixes (Hoodie / Hoodies)
+    """
+    features = []
+    for word in RE_TOKEN.findall(text.lower()):
+        features.append(word)
+        padded = f"#{word}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+def embed_texts(texts: List[str], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Hashing-trick embeddings for a list of texts.
+    Each feature is hashed with crc32 into one of `dim` buckets with a signed count,
+    rows are L2 normalized so a dot product is the cosine similarity.
+    """
+    rows, cols, signs = [], [], []
+    for row, text in enumerate(texts):
+        for feature in _features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            rows.append(row)
+            cols.append(h % dim)
+            signs.append(1.0 if (h >> 31) & 1 else -1.0)
+
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    if rows:
+        np.add.at(vectors, (np.asarray(rows), np.asarray(cols)), np.asarray(signs, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class CatalogIndex:
+    """
+    Brute-force vector index over a store catalog used to shortlist candidates for a query SKU.
+    Vectors are built on first use so the SKU lookup alone stays cheap.
+    """
+
+    def __init__(self, products: List[Product], dim: int = EMBEDDING_DIM):
+        self.products = products
+        self.dim = dim
+        self.sku_lookup = {p.sku.lower().strip(): i for i, p in enumerate(products)}
+        self._vectors: Optional[np.ndarray] = None
+        self._vectors_lock = threading.Lock()
+
+
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._vectors is None:
+            with self._vectors_lock:
+                if self._vectors is None:
+                    self._vectors = embed_texts([p.name for p in self.products], self.dim)
+        return self._vectors
+
+
+    def get_product(self, sku: str) -> Optional[Product]:
+        idx = self.sku_lookup.get(sku.lower().strip())
+        return None if idx is None else self.products[idx]
+
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+
+    def top_k(self, sku: str, k: int) -> Optional[List[Product]]:
+        """
+        Return the k products most similar to `sku`, in catalog order.
+        The query product itself is kept so the prompt can still resolve its name.
+        Returns None if the SKU is not in the catalog.
+        """
+        idx = self.sku_lookup.get(sku.lower().strip())
+        if idx is None:
+            return None
+        if k >= len(self.products) - 1:
+            return list(self.products)
+
+        scores = self.vectors @ self.vectors[idx]
+        scores[idx] = -np.inf
+        candidates = np.argpartition(-scores, k)[:k]
+        keep = np.sort(np.append(candidates, idx))
+        return [self.products[i] for i in keep]
+
+
+_index_cache: "OrderedDict[str, CatalogIndex]" = OrderedDict()
+_index_lock = threading.Lock()
+_index_stats = {"hits": 0, "misses": 0}
+register_cache("catalog_index", lambda: (_index_stats["hits"], _index_stats["misses"]))
+
+
+def get_catalog_index(context: str) -> CatalogIndex:
+    """
+    Return the CatalogIndex for a raw catalog context, building it on first use.
+    Indexes are cached by catalog hash, least recently used are evicted first.
+    """
+    key = catalog_hash(context)
+    with _index_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_stats["hits"] += 1
+            _index_cache.move_to_end(key)
+            return index
+        _index_stats["misses"] += 1
+
+    products = ProductFactory.try_parse_context_strict(context)
+    index = CatalogIndex(products)
+    with _index_lock:
+        _index_cache[key] = index
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > MAX_CACHED_INDEXES:
+            _index_cache.popitem(last=False)
+    bt.logging.trace(f"CatalogIndex built {key[:12]} with {len(index)} products")
+    return index
+
+
+def shortlist_context(sku: str, context: str, k: int, num_recs: int = 0) -> str:
+    """
+    Shrink a catalog context to the top k candidates for `sku`, never fewer than num_recs
+    so the LLM can still return num_recs valid SKUs besides the query item.
+    Falls back to the original context if the SKU is unknown or the catalog is already small.
+    """
+    if k <= 0:
+        return context
+    k = max(k, num_recs)
+    try:
+        index = get_catalog_index(context)
+        candidates = index.top_k(sku, k)
+        if candidates is None:
+            bt.logging.warning(f"shortlist_context SKU {sku} not found in catalog, using full context")
+            return context
+        if len(candidates) == len(index):
+            return context
+        return json.dumps([asdict(p) for p in candidates], separators=(',', ':'))
+    except Exception as e:
+        bt.logging.error(f"shortlist_context Exception: {e}")
+        return context
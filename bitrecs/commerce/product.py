@@ -2,7 +2,6 @@ import os
 import re
 import json
 import bittensor as bt
-import pandas as pd
 import operator
 import bitrecs.utils.constants as CONST
 from abc import abstractmethod
@@ -50,6 +49,8 @@ class ProductFactory:
                 bt.logging.error(f"File not found: {file_path}")
                 raise FileNotFoundError(f"File not found: {file_path}")
             
+            import pandas as pd
+            
             df = pd.read_csv(file_path)
             #WooCommerce Format
             columns = ["ID", "Type", "SKU", "Name", "Published", "Description", "In stock?", "Stock", "Regular price", "Categories"]
@@ -356,6 +357,8 @@ class ShopifyConverter(BaseConverter):
                 bt.logging.error(f"File not found: {file_path}")
                 raise FileNotFoundError(f"File not found: {file_path}")
             
+            import pandas as pd
+            
             df = pd.read_csv(file_path)
             # Select relevant columns
             columns = [
@@ -506,6 +509,8 @@ class WalmartConverter(BaseConverter):
                 bt.logging.error(f"File not found: {file_path}")
                 raise FileNotFoundError(f"File not found: {file_path}")
             
+            import pandas as pd
+            
             df = pd.read_csv(file_path)            
             columns = ["UNIQUE_ID", "PRODUCT_NAME", "LIST_PRICE", "SALE_PRICE", "BRAND", "ITEM_NUMBER", "GTIN", "CATEGORY", "IN_STOCK"]            
             df = df[[c for c in columns if c in df.columns]]            
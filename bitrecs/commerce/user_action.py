@@ -4,6 +4,8 @@ import requests
 from enum import Enum
 from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass, field
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Union
 
 
 class ActionType(Enum):
@@ -99,5 +101,68 @@ class UserAction:
         end_date = datetime.now(timezone.utc) - timedelta(days=30)
         start_date = end_date - timedelta(days=30)
         return start_date, end_date
-        
-        
\ No newline at end of file
+
+
+class UserActionIndex:
+    """
+    Per-miner action counts, keyed by lowercased hotkey then ActionType name.
+
+    Actions are ingested once per sync instead of being filtered for every miner on every
+    request. Counts are also kept per day so actions leaving the sync window can be
+    subtracted with evict_before, without re-reading the remaining actions.
+    """
+
+    def __init__(self):
+        self.totals: Dict[str, Counter] = defaultdict(Counter)
+        self.days: Dict[str, Dict[str, Counter]] = defaultdict(lambda: defaultdict(Counter))
+        self.size = 0
+
+
+    @classmethod
+    def from_actions(cls, actions: Iterable[Union[dict, UserAction]]) -> "UserActionIndex":
+        index = cls()
+        index.add(actions)
+        return index
+
+
+    def add(self, actions: Iterable[Union[dict, UserAction]]) -> int:
+        """Count new actions, returns how many were added"""
+        added = 0
+        for action in actions:
+            if isinstance(action, UserAction):
+                hot_key, name, created_at = action.hot_key, action.action, action.created_at
+            else:
+                hot_key, name, created_at = action.get("hot_key"), action.get("action"), action.get("created_at")
+            if not isinstance(hot_key, str) or not name:
+                continue
+            hot_key = hot_key.lower()
+            self.totals[hot_key][name] += 1
+            self.days[str(created_at or "")[:10]][hot_key][name] += 1
+            added += 1
+        self.size += added
+        return added
+
+
+    def evict_before(self, day: str) -> int:
+        """Subtract every action created before day (YYYY-MM-DD), returns how many were removed"""
+        removed = 0
+        for old_day in [d for d in self.days if d < day]:
+            for hot_key, counts in self.days.pop(old_day).items():
+                total = self.totals[hot_key]
+                total.subtract(counts)
+                removed += sum(counts.values())
+                if not +total:
+                    del self.totals[hot_key]
+                else:
+                    self.totals[hot_key] = +total
+        self.size -= removed
+        return removed
+
+
+    def get(self, hot_key: str) -> Dict[str, int]:
+        """Counts by ActionType name for a miner, empty if it has no actions"""
+        return self.totals.get(hot_key.lower(), {}) if hot_key else {}
+
+
+    def __len__(self) -> int:
+        return self.size
@@ -0,0 +1,153 @@
+import time
+import asyncio
+import threading
+import bittensor as bt
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from queue import SimpleQueue, Empty
+from typing import Dict, List, Tuple
+from bitrecs.llms.factory import LLM, LLMFactory
+
+BATCHABLE_SERVERS = (LLM.VLLM, LLM.OLLAMA_LOCAL)
+
+
+@dataclass
+class BatchItem:
+    """ A single prompt waiting to be sent to the LLM server """
+    model: str
+    system_prompt: str
+    temp: float
+    user_prompt: str
+    future: Future = field(default_factory=Future)
+
+    @property
+    def key(self) -> Tuple[str, str, float, str]:
+        return (self.model, self.system_prompt, self.temp, self.user_prompt)
+
+
+class LLMBatcher:
+    """
+    Micro-batching scheduler for local LLM servers (vLLM / Ollama).
+
+    Prompts that arrive within `window_ms` of each other are collected into one batch.
+    Identical prompts (same catalog and query from several validators) are collapsed into a single
+    completion, each remaining prompt is sent as its own independent `query_llm` call on a thread
+    pool of `max_batch_size` workers. The window only buys deduplication, it does not build a
+    batched request for the server. Results are handed back to each caller.
+    """
+
+    def __init__(self, server: LLM, window_ms: int = 50, max_batch_size: int = 8):
+        if window_ms <= 0:
+            raise ValueError("window_ms must be positive")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.server = server
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.queue: SimpleQueue = SimpleQueue()
+        self.executor = ThreadPoolExecutor(max_workers=max_batch_size, thread_name_prefix="llm_batch")
+        self.should_exit = False
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+
+    async def submit(self, model: str, system_prompt: str, temp: float, user_prompt: str) -> str:
+        """Queue a prompt and wait for its completion without blocking the event loop"""
+        item = BatchItem(model=model, system_prompt=system_prompt, temp=temp, user_prompt=user_prompt)
+        with self.lock:
+            if self.should_exit:
+                raise RuntimeError("LLMBatcher stopped")
+            self.queue.put(item)
+        return await asyncio.wrap_future(item.future)
+
+
+    def stop(self):
+        with self.lock:
+            self.should_exit = True
+        self.thread.join(5)
+        # Cancelled completions fail their callers in _resolve, prompts never collected are failed here
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        pending = []
+        while True:
+            try:
+                pending.append(self.queue.get_nowait())
+            except Empty:
+                break
+        self._fail(pending, RuntimeError("LLMBatcher stopped"))
+
+
+    def _collect(self) -> List[BatchItem]:
+        try:
+            batch = [self.queue.get(timeout=0.5)]
+        except Empty:
+            return []
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+
+    def _run(self):
+        while not self.should_exit:
+            batch = self._collect()
+            if batch:
+                self._dispatch(batch)
+
+
+    def _dispatch(self, batch: List[BatchItem]):
+        groups: Dict[Tuple[str, str, float, str], List[BatchItem]] = {}
+        for item in batch:
+            groups.setdefault(item.key, []).append(item)
+        bt.logging.trace(f"LLMBatcher dispatching {len(batch)} prompts as {len(groups)} sequences")
+
+        for (model, system_prompt, temp, user_prompt), items in groups.items():
+            try:
+                completion = self.executor.submit(
+                    LLMFactory.query_llm,
+                    server=self.server,
+                    model=model,
+                    system_prompt=system_prompt,
+                    temp=temp,
+                    user_prompt=user_prompt
+                )
+            except RuntimeError as e:
+                # The executor was shut down by stop() while this batch was being collected
+                self._fail(items, e)
+                continue
+            completion.add_done_callback(partial(self._resolve, items))
+
+
+    @staticmethod
+    def _fail(items: List[BatchItem], error: BaseException):
+        for item in items:
+            try:
+                item.future.set_exception(error)
+            except InvalidStateError:
+                continue
+
+
+    @staticmethod
+    def _resolve(items: List[BatchItem], completion: Future):
+        if completion.cancelled():
+            LLMBatcher._fail(items, RuntimeError("LLMBatcher stopped"))
+            return
+        error = completion.exception()
+        for item in items:
+            # A caller that stopped waiting cancels its own future, the rest of the group still gets the result
+            if item.future.done():
+                continue
+            try:
+                if error is not None:
+                    item.future.set_exception(error)
+                else:
+                    item.future.set_result(completion.result())
+            except InvalidStateError:
+                continue
@@ -2,12 +2,7 @@ import os
 import bittensor as bt
 from enum import Enum
 
-from bitrecs.llms.gemini import Gemini
-from bitrecs.llms.llama_local import OllamaLocal
-from bitrecs.llms.open_router import OpenRouter
-from bitrecs.llms.chat_gpt import ChatGPT
-from bitrecs.llms.vllm_router import vLLM
-from bitrecs.llms.chutes import Chutes
+# Provider clients are imported when first queried, so a neuron only loads the SDK it uses
 
 
 class LLM(Enum):
@@ -80,6 +75,7 @@ class OllamaLocalInterface:
              bt.logging.error("OLLAMA_LOCAL_URL not set.")        
     
     def query(self, user_prompt) -> str:
+        from bitrecs.llms.llama_local import OllamaLocal
         llm = OllamaLocal(ollama_url=self.OLLAMA_LOCAL_URL, model=self.model, 
                           system_prompt=self.system_prompt, temp=self.temp)
         return llm.ask_ollama(user_prompt)
@@ -95,6 +91,7 @@ class OpenRouterInterface:
             raise ValueError("OPENROUTER_API_KEY is not set")
     
     def query(self, user_prompt) -> str:
+        from bitrecs.llms.open_router import OpenRouter
         router = OpenRouter(self.OPENROUTER_API_KEY, model=self.model, 
                             system_prompt=self.system_prompt, temp=self.temp)
         return router.call_open_router(user_prompt)
@@ -110,6 +107,7 @@ class ChatGPTInterface:
             raise ValueError("CHATGPT_API_KEY is not set")
         
     def query(self, user_prompt) -> str:
+        from bitrecs.llms.chat_gpt import ChatGPT
         router = ChatGPT(self.CHATGPT_API_KEY, model=self.model, 
                          system_prompt=self.system_prompt, temp=self.temp)
         return router.call_chat_gpt(user_prompt)
@@ -125,6 +123,7 @@ class VllmInterface:
             raise ValueError("VLLM_API_KEY is not set")
     
     def query(self, user_prompt) -> str:
+        from bitrecs.llms.vllm_router import vLLM
         router = vLLM(key=self.VLLM_API_KEY, model=self.model, 
                       system_prompt=self.system_prompt, temp=self.temp)
         return router.call_vllm(user_prompt)
@@ -140,6 +139,7 @@ class GeminiInterface:
             raise ValueError("GEMINI_API_KEY is not set")
         
     def query(self, user_prompt) -> str:
+        from bitrecs.llms.gemini import Gemini
         router = Gemini(self.GEMINI_API_KEY, model=self.model, 
                          system_prompt=self.system_prompt, temp=self.temp)
         return router.call_gemini(user_prompt)
@@ -155,6 +155,7 @@ class ChutesInterface:
             raise ValueError("CHUTES_API_KEY is not set")
         
     def query(self, user_prompt) -> str:
+        from bitrecs.llms.chutes import Chutes
         router = Chutes(self.CHUTES_API_KEY, model=self.model, 
                          system_prompt=self.system_prompt, temp=self.temp)        
         return router.call_chutes(user_prompt)
\ No newline at end of file
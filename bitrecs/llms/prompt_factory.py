@@ -1,6 +1,6 @@
 import re
 import json
-import tiktoken
+import json_repair
 import bittensor as bt
 import bitrecs.utils.constants as CONST
 from functools import lru_cache
@@ -8,6 +8,8 @@ from typing import List, Optional
 from datetime import datetime
 from bitrecs.commerce.user_profile import UserProfile
 from bitrecs.commerce.product import ProductFactory
+from bitrecs.commerce.catalog_index import CatalogIndex
+from bitrecs.utils.metrics import register_cache
 
 class PromptFactory:
 
@@ -206,6 +208,7 @@ class PromptFactory:
     @staticmethod
     @lru_cache(maxsize=4)
     def _get_cached_encoding(encoding_name: str):
+        import tiktoken
         return tiktoken.get_encoding(encoding_name)
     
     
@@ -238,4 +241,54 @@ class PromptFactory:
         except Exception as e:
             bt.logging.error(str(e))
             return []
-    
\ No newline at end of file
+
+
+    @staticmethod
+    def normalize_llm_results(items: list,
+                              catalog: Optional[CatalogIndex] = None,
+                              query: str = "",
+                              num_recs: int = 0) -> List[str]:
+        """
+        Single pass over the parsed output of tryparse_llm.
+        Cleans name/reason, drops items with a missing, duplicate or query SKU and
+        (when a catalog is given) SKUs that do not exist in the catalog, then serializes each item once.
+
+        """
+        results = []
+        seen = set()
+        query_key = query.lower().strip()
+        for item in items:
+            try:
+                if isinstance(item, str):
+                    item = json_repair.loads(item)
+                if not isinstance(item, dict) or "name" not in item:
+                    bt.logging.error(f"Item missing 'name' key: {item}")
+                    continue
+
+                sku = str(item.get("sku", "")).strip()
+                key = sku.lower()
+                if not key or key == query_key or key in seen:
+                    bt.logging.warning(f"Dropping empty, query or duplicate SKU: {sku}")
+                    continue
+                if catalog is not None:
+                    product = catalog.get_product(sku)
+                    if product is None:
+                        bt.logging.warning(f"Dropping SKU not found in catalog: {sku}")
+                        continue
+                    sku = product.sku
+
+                seen.add(key)
+                item["sku"] = sku
+                item["name"] = CONST.RE_PRODUCT_NAME.sub("", str(item["name"]))
+                if "reason" in item:
+                    item["reason"] = CONST.RE_REASON.sub("", str(item["reason"]))
+                results.append(json.dumps(item, separators=(',', ':')))
+                if num_recs and len(results) >= num_recs:
+                    break
+            except Exception as e:
+                bt.logging.error(f"Failed to normalize LLM result: {item}, error: {e}")
+                continue
+        return results
+
+
+register_cache("token_encoding", lambda: tuple(PromptFactory._get_cached_encoding.cache_info()[:2]))
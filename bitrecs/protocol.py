@@ -20,6 +20,8 @@
 import pydantic
 import bittensor as bt
 
+_required_fields_cache: dict = {}
+
 class BitrecsRequest(bt.Synapse):
     created_at: str | None
     user: str | None
@@ -34,6 +36,17 @@ class BitrecsRequest(bt.Synapse):
     models_used: list | None
     miner_uid: str | None
     miner_hotkey: str | None
+
+    def get_required_fields(self):
+        """
+        Cached per class, bt.Synapse rebuilds the JSON schema for every field in to_headers.
+        """
+        cls = self.__class__
+        required = _required_fields_cache.get(cls)
+        if required is None:
+            required = cls.model_json_schema().get("required", [])
+            _required_fields_cache[cls] = required
+        return required
     
 
     def to_dict(self) -> dict:
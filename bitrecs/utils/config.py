@@ -62,7 +62,7 @@ def check_config(cls, config: "bt.Config"):
     if not config.neuron.dont_save_events:
         # Add custom event logger for the events.
         events_logger = setup_events_logger(
-            config.neuron.full_path, config.neuron.events_retention_size
+            config.neuron.full_path, config.neuron.events_retention_size, config.neuron.events_backup_count
         )
         bt.logging.register_primary_logger(events_logger.name)
 
@@ -97,11 +97,18 @@ def add_args(cls, parser):
 
     parser.add_argument(
         "--neuron.events_retention_size",
-        type=str,
+        type=int,
         help="Events retention size.",
         default=2 * 1024 * 1024 * 1024,  # 2 GB
     )
 
+    parser.add_argument(
+        "--neuron.events_backup_count",
+        type=int,
+        help="Number of rotated events.log files to keep.",
+        default=10,
+    )
+
     parser.add_argument(
         "--neuron.dont_save_events",
         action="store_true",
@@ -116,6 +123,41 @@ def add_args(cls, parser):
         default=False,
     )
 
+    parser.add_argument(
+        "--profile.window",
+        type=float,
+        help="If > 0, sample all threads for this many seconds and write collapsed stacks to neuron.full_path/profiles.",
+        default=0,
+    )
+
+    parser.add_argument(
+        "--profile.delay",
+        type=float,
+        help="Seconds after startup before the --profile.window starts.",
+        default=0,
+    )
+
+    parser.add_argument(
+        "--profile.every_n",
+        type=int,
+        help="If > 0, sample every Nth request in the validator main loop or miner forward.",
+        default=0,
+    )
+
+    parser.add_argument(
+        "--profile.interval",
+        type=float,
+        help="Seconds between stack samples.",
+        default=0.005,
+    )
+
+    parser.add_argument(
+        "--profile.flush_every",
+        type=int,
+        help="Rewrite the request profile after this many profiled requests.",
+        default=20,
+    )
+
     # parser.add_argument(
     #     "--wandb.offline",
     #     action="store_true",
@@ -171,6 +213,27 @@ def add_miner_args(cls, parser):
         help="Which LLM model to use",
     )
 
+    parser.add_argument(
+        "--llm.context_top_k",
+        type=int,
+        default=0,
+        help="If > 0, only the top K catalog candidates for the query SKU are sent to the LLM (0 sends the full catalog).",
+    )
+
+    parser.add_argument(
+        "--llm.batch_window_ms",
+        type=int,
+        default=0,
+        help="If > 0, requests arriving within this window are batched into one submission to a local VLLM/OLLAMA_LOCAL server.",
+    )
+
+    parser.add_argument(
+        "--llm.batch_max_size",
+        type=int,
+        default=8,
+        help="Maximum number of prompts per batch sent to the local LLM server.",
+    )
+
 
 
 def add_validator_args(cls, parser):
@@ -204,6 +267,41 @@ def add_validator_args(cls, parser):
         default=16,
     )
 
+    parser.add_argument(
+        "--neuron.quorum_size",
+        type=int,
+        help="Answer the API client once this many valid, mutually similar miner responses arrived (0, the default, waits for all miners).",
+        default=0,
+    )
+
+    parser.add_argument(
+        "--neuron.quorum_similarity",
+        type=float,
+        help="Minimum Jaccard similarity of the closest pair of responses required to reach quorum.",
+        default=0.5,
+    )
+
+    parser.add_argument(
+        "--neuron.stats_window",
+        type=int,
+        help="Number of recent rounds kept per miner for latency, success and consensus stats.",
+        default=100,
+    )
+
+    parser.add_argument(
+        "--neuron.exploration_epsilon",
+        type=float,
+        help="Probability that a selection slot goes to a random miner instead of the best expected one.",
+        default=0.1,
+    )
+
+    parser.add_argument(
+        "--neuron.probe_concurrency",
+        type=int,
+        help="Maximum number of miner liveness probes in flight during miner_sync.",
+        default=32,
+    )
+
     parser.add_argument(
         "--neuron.disable_set_weights",
         action="store_true",
@@ -270,6 +368,57 @@ def add_validator_args(cls, parser):
         default=False,
     )  
 
+    parser.add_argument(
+        "--retention.days",
+        type=int,
+        help="Days of miner responses kept in the local database before they are rolled up, 0 keeps everything.",
+        default=14,
+    )
+
+    parser.add_argument(
+        "--retention.max_rows",
+        type=int,
+        help="Maximum number of miner responses kept in the local database, 0 for no limit.",
+        default=1_000_000,
+    )
+
+    parser.add_argument(
+        "--retention.wandb_runs",
+        type=int,
+        help="Number of local wandb run directories to keep, 0 keeps all.",
+        default=5,
+    )
+
+    parser.add_argument(
+        "--r2.upload_format",
+        type=str,
+        choices=["sqlite", "ndjson-gz-v1"],
+        help="Format of r2 uploads: sqlite snapshots of the whole database or incremental gzip NDJSON segments.",
+        default="sqlite",
+    )
+
+    parser.add_argument(
+        "--r2.prune_uploaded",
+        action="store_true",
+        help="Delete miner responses from the local database once their ndjson-gz-v1 segment was uploaded to r2.",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--tracing.exporter",
+        type=str,
+        choices=["none", "stdout", "file"],
+        help="Export request traces as OTLP JSON lines to stdout or a file.",
+        default="none",
+    )
+
+    parser.add_argument(
+        "--tracing.path",
+        type=str,
+        help="Trace file for --tracing.exporter file, defaults to traces.jsonl in the neuron directory.",
+        default="",
+    )
+
 
 def config(cls):
     """
@@ -19,6 +19,15 @@ Constants:
     VERSION_CHECK_INTERVAL (int): Length of seconds between version checks.
     CATALOG_DUPE_THRESHOLD (float): Threshold for duplicate products in a catalog.
     R2_SYNC_INTERVAL (int): Length of seconds between R2 syncs.
+    R2_SEGMENT_MAX_ROWS (int): Maximum number of miner responses in one uploaded R2 segment.
+    R2_MAX_SEGMENTS_PER_SYNC (int): Maximum number of segments uploaded in one R2 sync.
+    RETENTION_INTERVAL (int): Length of seconds between local data retention runs.
+    CHAIN_SYNC_INTERVAL (int): Length of seconds between background chain syncs when no sync was requested.
+    CHAIN_THREAD_JOIN_TIMEOUT (int): Length of seconds the validator waits for a running chain sync when it stops.
+    VALIDATOR_API_PORT (int): Port the validator API listens on.
+    API_DRAIN_TIMEOUT (int): Length of seconds in-flight API requests get to finish when the validator stops.
+    VALIDATOR_READY_TIMEOUT (int): Length of seconds the auto-updater waits for a new validator to be ready.
+    STATE_SAVE_INTERVAL (int): Minimum length of seconds between validator state writes.
     RE_PRODUCT_NAME (Pattern): Regular expression to match valid product names.
     RE_REASON (Pattern): Regular expression to match valid reasons.
     CONVERSION_SCORING_ENABLED (bool): Flag to enable conversion scoring.
@@ -38,6 +47,15 @@ ACTION_SYNC_INTERVAL = 14400
 VERSION_CHECK_INTERVAL = 1200
 CATALOG_DUPE_THRESHOLD = 0.05
 R2_SYNC_INTERVAL = 3600
+R2_SEGMENT_MAX_ROWS = 50_000
+R2_MAX_SEGMENTS_PER_SYNC = 10
+RETENTION_INTERVAL = 3600
+CHAIN_SYNC_INTERVAL = 300
+CHAIN_THREAD_JOIN_TIMEOUT = 30
+STATE_SAVE_INTERVAL = 60
+VALIDATOR_API_PORT = 7779
+API_DRAIN_TIMEOUT = 30
+VALIDATOR_READY_TIMEOUT = 900
 RE_PRODUCT_NAME = re.compile(r"[^A-Za-z0-9 |-]")
 RE_REASON = re.compile(r"[^A-Za-z0-9 ]")
 CONVERSION_SCORING_ENABLED = False
\ No newline at end of file
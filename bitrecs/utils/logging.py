@@ -2,20 +2,18 @@ import json
 import os
 import logging
 import bittensor as bt
-import pandas as pd
-import sqlite3
 from datetime import datetime, timezone
 from typing_extensions import List
 from logging.handlers import RotatingFileHandler
 from bitrecs.protocol import BitrecsRequest
+from bitrecs.utils.response_db import get_response_writer
 
 EVENTS_LEVEL_NUM = 38
 DEFAULT_LOG_BACKUP_COUNT = 10
-SCHEMA_UPDATE_CUTOFF = datetime(2025, 7, 5, tzinfo=timezone.utc)
 TIMESTAMP_FILE = 'timestamp.txt'
 NODE_INFO_FILE = 'node_info.json'
 
-def setup_events_logger(full_path, events_retention_size):
+def setup_events_logger(full_path, events_retention_size, backup_count=DEFAULT_LOG_BACKUP_COUNT):
     logging.addLevelName(EVENTS_LEVEL_NUM, "EVENT")
 
     logger = logging.getLogger("event")
@@ -35,7 +33,7 @@ def setup_events_logger(full_path, events_retention_size):
     file_handler = RotatingFileHandler(
         os.path.join(full_path, "events.log"),
         maxBytes=events_retention_size,
-        backupCount=DEFAULT_LOG_BACKUP_COUNT,
+        backupCount=backup_count,
     )
     file_handler.setFormatter(formatter)
     file_handler.setLevel(EVENTS_LEVEL_NUM)
@@ -128,69 +126,9 @@ def read_timestamp():
 #         pass
 
 
-def update_table_schema(conn: sqlite3.Connection, required_columns: list) -> None:
-    """Update table schema to include any missing columns before cutoff date."""
-    if datetime.now(timezone.utc) > SCHEMA_UPDATE_CUTOFF:
-        return
-        
-    cursor = conn.cursor()
-    # Get existing columns
-    cursor.execute("PRAGMA table_info(miner_responses)")
-    existing_columns = {row[1] for row in cursor.fetchall()}
-    
-    # Add any missing columns
-    for col in required_columns:
-        if col not in existing_columns:
-            bt.logging.info(f"Adding missing column: {col}")
-            alter_sql = f'ALTER TABLE miner_responses ADD COLUMN "{col}" TEXT'
-            cursor.execute(alter_sql)
-    conn.commit()
-
-
 def log_miner_responses_to_sql(step: int, responses: List[BitrecsRequest]) -> None:
+    """Queue a round of miner responses for the background SQLite writer"""
     try:
-        frames = []
-        for response in responses:
-            if not isinstance(response, BitrecsRequest):
-                bt.logging.warning(f"Skipping invalid response type: {type(response)}")
-                continue
-            data = {
-                **response.to_headers(),
-                **response.to_dict()
-            }
-            df = pd.json_normalize(data)          
-            frames.append(df)
-        final = pd.concat(frames)
-
-        if len(final) > 0:
-            utc_now = datetime.now(timezone.utc)
-            created_at = utc_now.strftime("%Y-%m-%d %H:%M:%S")            
-            db_path = os.path.join(os.getcwd(), 'miner_responses.db')            
-            conn = sqlite3.connect(db_path)
-            try:
-                final['step'] = step
-                final['created_at'] = created_at                
-                dtype_dict = {col: 'TEXT' for col in final.columns}                
-                cursor = conn.cursor()
-                
-                # Check if table exists
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='miner_responses';")
-                table_exists = cursor.fetchone() is not None
-                
-                if not table_exists:
-                    final.to_sql('miner_responses', conn, index=False, dtype=dtype_dict)
-                else:
-                    # Update schema if needed
-                    update_table_schema(conn, list(final.columns))
-                    final.to_sql('miner_responses', conn, index=False, if_exists='append', dtype=dtype_dict)
-                conn.commit()
-            except sqlite3.Error as e:
-                bt.logging.error(f"SQLite error: {e}")
-                conn.rollback()
-            finally:
-                conn.close()
-
-        bt.logging.info(f"Miner responses logged {len(final)}")
+        get_response_writer().submit(step, responses)
     except Exception as e:
         bt.logging.error(f"Error in logging miner responses: {str(e)}")
-        bt.logging.error(f"Columns in dataframe: {list(final.columns)}")
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+In-process metrics rendered in the Prometheus text format.
+
+Kept dependency free and cheap enough to stay on in production: an observation is a
+bisect and a few additions under a per-metric lock. Values that already live elsewhere
+(queue depth, active miners, cache statistics) are read through callbacks at scrape time.
+"""
+
+import math
+import time
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(n, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for n, v in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, "Metric"] = {}
+
+
+    def register(self, metric: "Metric") -> "Metric":
+        self.metrics[metric.name] = metric
+        return metric
+
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self.metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# {metric.name} failed: {e!r}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 fn: Optional[Callable[[], object]] = None, registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        self.lock = threading.Lock()
+        self.values: Dict[Labels, float] = {}
+        if registry is not None:
+            registry.register(self)
+
+
+    def samples(self) -> Dict[Labels, float]:
+        """Current values by label values, from the callback if there is one"""
+        if self.fn is None:
+            with self.lock:
+                return dict(self.values)
+        value = self.fn()
+        if isinstance(value, dict):
+            return {k if isinstance(k, tuple) else (k,): v for k, v in value.items()}
+        return {(): value}
+
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in sorted(self.samples().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        with self.lock:
+            self.values[labels] = value
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Labels):
+        self.histogram = histogram
+        self.labels = labels
+
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class Histogram(Metric):
+    """Fixed bucket histogram, counts per bucket are cumulated when rendered"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Optional[Registry] = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry=registry)
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[Labels, list] = {}
+
+
+    def observe(self, value: float, *labels: str):
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                # bucket counts, then +Inf, sum
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+
+    def time(self, *labels: str) -> _Timer:
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self, labels)
+
+
+    def count(self, *labels: str) -> int:
+        with self.lock:
+            series = self.series.get(labels)
+            return sum(series[:-1]) if series else 0
+
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self.lock:
+            series = {k: list(v) for k, v in self.series.items()}
+        names = self.labelnames + ("le",)
+        for labels, counts in sorted(series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(counts[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+_caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+
+def register_cache(name: str, info: Callable[[], Tuple[int, int]]):
+    """Report a cache in the hit/miss counters, info returns (hits, misses)"""
+    _caches[name] = info
+
+
+def _cache_counts(position: int) -> Dict[Labels, float]:
+    counts = {}
+    for name, info in list(_caches.items()):
+        counts[(name,)] = info()[position]
+    return counts
+
+
+API_REQUESTS = Counter("bitrecs_api_requests_total", "Recommendation requests handled by the API", ("status",))
+API_REQUEST_SECONDS = Histogram("bitrecs_api_request_seconds", "End to end latency of recommendation requests")
+STAGE_SECONDS = Histogram("bitrecs_stage_seconds", "Latency of each stage of a recommendation request", ("stage",))
+CACHE_HITS = Counter("bitrecs_cache_hits_total", "Cache hits", ("cache",), fn=lambda: _cache_counts(0))
+CACHE_MISSES = Counter("bitrecs_cache_misses_total", "Cache misses", ("cache",), fn=lambda: _cache_counts(1))
+RESPONSES_DROPPED = Counter("bitrecs_response_writer_dropped_total", "Miner response rounds the writer dropped", ("reason",))
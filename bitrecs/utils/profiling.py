@@ -0,0 +1,234 @@
+"""
+Opt-in sampling profiler for the validator and miner hot paths.
+
+A background thread snapshots the Python stacks with sys._current_frames() every `interval`
+seconds and counts them as collapsed stacks, one "thread;root;...;leaf count" line per unique
+stack. That is the input format of flamegraph.pl, inferno and speedscope.
+
+Two modes, both off by default and enabled through the --profile.* config group:
+    window: sample every thread for `window` seconds, starting `delay` seconds after startup.
+    every_n: sample the handling thread while every Nth request runs in main_loop / Miner.forward.
+        Requests are async, so other work interleaved on the same event loop thread is sampled too.
+"""
+
+import os
+import sys
+import time
+import threading
+import bittensor as bt
+from collections import Counter
+from typing import Dict, Optional
+
+
+def frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame) -> str:
+    """Stack of frame as root;...;leaf"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class StackSampler:
+    """Counts collapsed stacks of the watched threads, or of every thread with all_threads"""
+
+    def __init__(self, interval: float = 0.005, all_threads: bool = False):
+        self.interval = interval
+        self.all_threads = all_threads
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.watched: Dict[int, int] = {}
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+
+    def watch(self, thread_id: int):
+        with self.lock:
+            self.watched[thread_id] = self.watched.get(thread_id, 0) + 1
+
+
+    def unwatch(self, thread_id: int):
+        with self.lock:
+            count = self.watched.get(thread_id, 0) - 1
+            if count > 0:
+                self.watched[thread_id] = count
+            else:
+                self.watched.pop(thread_id, None)
+
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack_sampler", daemon=True)
+        self._thread.start()
+
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1)
+            self._thread = None
+
+
+    def sample(self):
+        own = threading.get_ident()
+        with self.lock:
+            targets = None if self.all_threads else set(self.watched)
+        if targets is not None and not targets:
+            return
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or (targets is not None and thread_id not in targets):
+                continue
+            stack = f"{names.get(thread_id, thread_id)};{collapse(frame)}"
+            with self.lock:
+                self.stacks[stack] += 1
+                self.samples += 1
+
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                bt.logging.error(f"Stack sampler failed: {e}")
+
+
+    def write(self, path: str, reset: bool = False) -> int:
+        """Write the collapsed stacks to path, returns the number of samples written"""
+        with self.lock:
+            stacks = self.stacks if reset else Counter(self.stacks)
+            samples = self.samples
+            if reset:
+                self.stacks, self.samples = Counter(), 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(tmp, path)
+        return samples
+
+
+class ProfiledRequest:
+    """Samples the calling thread until end()"""
+
+    def __init__(self, profiler: "Profiler"):
+        self.profiler = profiler
+        self.thread_id = threading.get_ident()
+        self.ended = False
+        profiler.request_sampler.watch(self.thread_id)
+
+
+    def end(self):
+        if self.ended:
+            return
+        self.ended = True
+        self.profiler.request_sampler.unwatch(self.thread_id)
+        self.profiler.request_done()
+
+
+class Profiler:
+    def __init__(self, out_dir: str, name: str, window: float = 0, delay: float = 0,
+                 every_n: int = 0, interval: float = 0.005, flush_every: int = 20):
+        self.out_dir = out_dir
+        self.name = name
+        self.window = window
+        self.delay = delay
+        self.every_n = every_n
+        self.flush_every = max(1, flush_every)
+        self.requests = 0
+        self.profiled = 0
+        self.lock = threading.Lock()
+        self.window_sampler = StackSampler(interval, all_threads=True)
+        self.request_sampler = StackSampler(interval)
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        self.window_path = os.path.join(out_dir, f"{name}_window_{stamp}.collapsed")
+        self.request_path = os.path.join(out_dir, f"{name}_requests_{stamp}.collapsed")
+        self._window_timer: Optional[threading.Timer] = None
+
+
+    @classmethod
+    def from_config(cls, config: "bt.Config", name: str) -> "Profiler":
+        profile = config.profile
+        return cls(
+            out_dir=os.path.join(config.neuron.full_path, "profiles"),
+            name=name,
+            window=profile.window,
+            delay=profile.delay,
+            every_n=profile.every_n,
+            interval=profile.interval,
+            flush_every=profile.flush_every
+        )
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 or self.every_n > 0
+
+
+    def start(self):
+        if self.every_n > 0:
+            self.request_sampler.start()
+            bt.logging.info(f"Profiling every {self.every_n} requests to {self.request_path}")
+        if self.window > 0:
+            self._window_timer = threading.Timer(self.delay, self._run_window)
+            self._window_timer.daemon = True
+            self._window_timer.start()
+            bt.logging.info(f"Profiling {self.window}s after {self.delay}s to {self.window_path}")
+
+
+    def _run_window(self):
+        self.window_sampler.start()
+        self._window_timer = threading.Timer(self.window, self._end_window)
+        self._window_timer.daemon = True
+        self._window_timer.start()
+
+
+    def _end_window(self):
+        self.window_sampler.stop()
+        samples = self.window_sampler.write(self.window_path)
+        bt.logging.info(f"Profile window done, {samples} samples written to {self.window_path}")
+
+
+    def request(self) -> Optional[ProfiledRequest]:
+        """Start sampling this thread if the request is an Nth one, the caller ends it"""
+        if self.every_n <= 0:
+            return None
+        with self.lock:
+            self.requests += 1
+            if self.requests % self.every_n:
+                return None
+        return ProfiledRequest(self)
+
+
+    def request_done(self):
+        with self.lock:
+            self.profiled += 1
+            flush = self.profiled % self.flush_every == 0
+        if flush:
+            self.request_sampler.write(self.request_path)
+
+
+    def close(self):
+        """Stop sampling and write what was collected"""
+        if self._window_timer is not None:
+            self._window_timer.cancel()
+        if self.window_sampler.running:
+            self._end_window()
+        if self.every_n > 0:
+            self.request_sampler.stop()
+            if self.request_sampler.samples:
+                self.request_sampler.write(self.request_path)
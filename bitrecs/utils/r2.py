@@ -3,15 +3,35 @@ import time
 import requests
 import json
 import secrets
+import sqlite3
+import tempfile
 import bittensor as bt
 from urllib.parse import urlparse
 from typing import Any, Dict, Tuple
 from datetime import datetime
-from dataclasses import asdict, dataclass, field
+from dataclasses import asdict, dataclass, field, replace
 from substrateinterface import Keypair
 from bitrecs.utils import constants as CONST
+from bitrecs.utils.response_db import (
+    connect,
+    export_segment,
+    get_watermark,
+    prune_uploaded,
+    response_db_path,
+    set_watermark
+)
 SERVICE_URL = os.environ.get("BITRECS_PROXY_URL").removesuffix("/")
 
+# Upload formats, sent in the signed upload request so the proxy and downstream consumers can tell them apart.
+# sqlite: a consistent snapshot of the whole miner_responses.db, the original contract.
+# ndjson-gz-v1: gzip NDJSON segments of the responses after the upload watermark, one object per response.
+R2_FORMAT_SQLITE = "sqlite"
+R2_FORMAT_NDJSON_GZ_V1 = "ndjson-gz-v1"
+R2_CONTENT_TYPES = {
+    R2_FORMAT_SQLITE: "application/x-sqlite3",
+    R2_FORMAT_NDJSON_GZ_V1: "application/gzip",
+}
+
 
 @dataclass
 class ValidatorUploadRequest:
@@ -21,6 +41,9 @@ class ValidatorUploadRequest:
     step: str = field(default_factory=str)
     llm_provider: str = field(default_factory=str)
     llm_model: str = field(default_factory=str)
+    upload_format: str = field(default=R2_FORMAT_SQLITE)
+    segment_from: int = field(default=0) # segments hold response ids > segment_from
+    segment_to: int = field(default=0) # and <= segment_to
 
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
@@ -88,15 +111,86 @@ def get_r2_upload_url(report: ValidatorUploadRequest, keypair: Keypair) -> str:
         return ""
 
 
-def put_r2_upload(request: ValidatorUploadRequest, keypair: Keypair) -> bool:
+def put_r2_upload(request: ValidatorUploadRequest, keypair: Keypair, upload_format: str = R2_FORMAT_SQLITE,
+                  prune: bool = False) -> bool:
+    """
+    Upload miner responses in upload_format.
+    sqlite uploads a snapshot of the whole database. ndjson-gz-v1 uploads the responses added since
+    the last confirmed upload as segments, each signed with its own id range, the watermark only moves
+    after R2 accepted the segment and uploaded rows are then pruned locally when prune is set.
+    """
     if not request or not keypair:
         return False    
+    if upload_format not in R2_CONTENT_TYPES:
+        bt.logging.error(f"Unknown R2 upload format: {upload_format}")
+        return False
     
-    data_file = os.path.join(CONST.ROOT_DIR, "miner_responses.db")
+    data_file = response_db_path()
     if not os.path.exists(data_file):
         bt.logging.error(f"Miner response file does not exist: {data_file}")
         return False
-    
+
+    if upload_format == R2_FORMAT_SQLITE:
+        return put_r2_snapshot(request, keypair, data_file)
+
+    conn = connect(data_file)
+    try:
+        for _ in range(CONST.R2_MAX_SEGMENTS_PER_SYNC):
+            watermark = get_watermark(conn)
+            segment = os.path.join(os.path.dirname(data_file), f"miner_responses_{watermark}.ndjson.gz")
+            try:
+                last_id, count = export_segment(conn, segment, watermark, CONST.R2_SEGMENT_MAX_ROWS)
+                if count == 0:
+                    bt.logging.trace(f"No new miner responses since {watermark}")
+                    return True
+                segment_request = replace(request,
+                                          created_at=datetime.now().isoformat(),
+                                          upload_format=upload_format,
+                                          segment_from=watermark,
+                                          segment_to=last_id)
+                if not put_r2_file(segment_request, keypair, segment):
+                    return False
+            finally:
+                if os.path.exists(segment):
+                    os.remove(segment)
+
+            set_watermark(conn, last_id)
+            bt.logging.info(f"Uploaded {count} miner responses {watermark + 1}-{last_id}")
+            if prune:
+                pruned = prune_uploaded(conn, last_id)
+                bt.logging.trace(f"Pruned {pruned} uploaded miner responses")
+            if count < CONST.R2_SEGMENT_MAX_ROWS:
+                break
+        return True
+    except sqlite3.Error as e:
+        bt.logging.error(f"Miner response export failed: {str(e)}")
+        return False
+    finally:
+        conn.close()
+
+
+def put_r2_snapshot(request: ValidatorUploadRequest, keypair: Keypair, data_file: str) -> bool:
+    """Upload a consistent copy of the database, the writer keeps writing to the WAL meanwhile"""
+    fd, snapshot = tempfile.mkstemp(prefix="miner_responses_", suffix=".db", dir=os.path.dirname(data_file))
+    os.close(fd)
+    try:
+        source = connect(data_file)
+        target = sqlite3.connect(snapshot)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        snapshot_request = replace(request, upload_format=R2_FORMAT_SQLITE, segment_from=0, segment_to=0)
+        return put_r2_file(snapshot_request, keypair, snapshot)
+    except sqlite3.Error as e:
+        bt.logging.error(f"Miner response snapshot failed: {str(e)}")
+        return False
+    finally:
+        os.remove(snapshot)
+
+
+def put_r2_file(request: ValidatorUploadRequest, keypair: Keypair, path: str) -> bool:
     signed_url = get_r2_upload_url(request, keypair)
     if not is_valid_url(signed_url):
         bt.logging.error("Failed to get signed URL")
@@ -104,20 +198,18 @@ def put_r2_upload(request: ValidatorUploadRequest, keypair: Keypair) -> bool:
     
     bt.logging.trace("STARTING UPLOAD -----------------------------------------")
     try:
-        with open(data_file, 'rb') as f:
-            file_data = f.read()
-            
         headers = {
-            'Content-Type': 'application/x-sqlite3',
-            'Content-Length': str(len(file_data))
+            'Content-Type': R2_CONTENT_TYPES[request.upload_format],
+            'Content-Length': str(os.path.getsize(path))
         }        
         
-        response = requests.put(
-            signed_url, 
-            data=file_data,
-            headers=headers,
-            timeout=30
-        )
+        with open(path, 'rb') as f:
+            response = requests.put(
+                signed_url, 
+                data=f,
+                headers=headers,
+                timeout=30
+            )
         
         if response.status_code in (200, 201):
             bt.logging.info("Successfully uploaded to R2")
@@ -137,4 +229,4 @@ def put_r2_upload(request: ValidatorUploadRequest, keypair: Keypair) -> bool:
         return False
     except Exception as e:        
         bt.logging.error(f"Unexpected error: {str(e)}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,491 @@
+import os
+import ast
+import gzip
+import json
+import time
+import atexit
+import sqlite3
+import threading
+import json_repair
+import bittensor as bt
+from datetime import datetime, timezone
+from queue import Queue, Empty, Full
+from typing import Dict, List, Optional, Tuple
+from bitrecs.protocol import BitrecsRequest
+from bitrecs.utils.metrics import RESPONSES_DROPPED
+
+MINER_RESPONSES_DB = 'miner_responses.db'
+WRITER_BATCH_SIZE = 64
+WRITER_FLUSH_INTERVAL = 2.0
+WRITER_MAX_QUEUE = 10_000
+WRITER_RETRY_MAX = 60.0
+WRITER_WRITE_ATTEMPTS = 5
+WRITER_WRITE_BACKOFF = 0.5
+SCHEMA_VERSION = 3
+EXPORT_BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    step INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    request_created_at TEXT,
+    user TEXT,
+    query TEXT,
+    site_key TEXT,
+    num_results INTEGER,
+    context TEXT
+);
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    request_id INTEGER NOT NULL REFERENCES requests(id),
+    step INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    miner_uid INTEGER,
+    miner_hotkey TEXT,
+    models_used TEXT,
+    num_results INTEGER,
+    status_code INTEGER,
+    process_time REAL,
+    body_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS recommendations (
+    response_id INTEGER NOT NULL REFERENCES responses(id),
+    rank INTEGER NOT NULL,
+    sku TEXT,
+    name TEXT,
+    price TEXT,
+    reason TEXT,
+    PRIMARY KEY (response_id, rank)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_requests_step ON requests(step);
+CREATE INDEX IF NOT EXISTS idx_requests_created_at ON requests(created_at);
+CREATE INDEX IF NOT EXISTS idx_responses_request_id ON responses(request_id);
+CREATE INDEX IF NOT EXISTS idx_responses_step ON responses(step);
+CREATE INDEX IF NOT EXISTS idx_responses_miner_uid ON responses(miner_uid);
+CREATE INDEX IF NOT EXISTS idx_responses_created_at ON responses(created_at);
+CREATE INDEX IF NOT EXISTS idx_recommendations_sku ON recommendations(sku);
+CREATE TABLE IF NOT EXISTS upload_watermark (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    response_id INTEGER NOT NULL,
+    uploaded_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_miner_stats (
+    day TEXT NOT NULL,
+    miner_uid INTEGER NOT NULL,
+    miner_hotkey TEXT NOT NULL,
+    responses INTEGER NOT NULL,
+    successes INTEGER NOT NULL,
+    total_process_time REAL NOT NULL,
+    recommendations INTEGER NOT NULL,
+    PRIMARY KEY (day, miner_uid, miner_hotkey)
+) WITHOUT ROWID;
+"""
+
+# Read-only view with the main columns of the old wide table, for existing queries and exports
+LEGACY_VIEW = """
+CREATE VIEW IF NOT EXISTS miner_responses AS
+SELECT
+    r.step AS step,
+    r.created_at AS created_at,
+    r.miner_uid AS miner_uid,
+    r.miner_hotkey AS miner_hotkey,
+    r.models_used AS models_used,
+    r.num_results AS num_results,
+    r.status_code AS bt_header_dendrite_status_code,
+    r.process_time AS bt_header_dendrite_process_time,
+    r.body_hash AS computed_body_hash,
+    q.query AS query,
+    q.site_key AS site_key,
+    q.user AS user,
+    (SELECT json_group_array(json_object('sku', c.sku, 'name', c.name, 'price', c.price, 'reason', c.reason))
+       FROM recommendations c WHERE c.response_id = r.id) AS results
+FROM responses r JOIN requests q ON q.id = r.request_id
+"""
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_recommendations(results) -> List[Tuple[Optional[str], ...]]:
+    """(sku, name, price, reason) for each result, results may be JSON strings or dicts"""
+    parsed = []
+    for item in results or []:
+        if isinstance(item, str):
+            item = json_repair.loads(item)
+        if not isinstance(item, dict):
+            continue
+        parsed.append(tuple(None if item.get(k) is None else str(item.get(k)) for k in ("sku", "name", "price", "reason")))
+    return parsed
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    """
+    Create or upgrade the normalized schema, migrating an old wide miner_responses table if there is one.
+    Every statement in SCHEMA is idempotent so upgrades re-run the whole script.
+    Version 2 adds the upload watermark and AUTOINCREMENT ids, so pruned ids are never reused.
+    Version 3 adds the daily_miner_stats rollup table.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    if version == 0:
+        # Only takes effect on an empty database, older ones are switched by retention.compact
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    with conn:
+        if version == 1:
+            conn.execute("DROP VIEW IF EXISTS miner_responses")
+            for table in ("requests", "responses"):
+                _rebuild_autoincrement(conn, table)
+        for statement in SCHEMA.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+        legacy = conn.execute("SELECT type FROM sqlite_master WHERE name = 'miner_responses'").fetchone()
+        if legacy and legacy[0] == "table":
+            migrate_legacy_table(conn)
+            conn.execute("DROP TABLE miner_responses")
+        conn.execute(LEGACY_VIEW)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _rebuild_autoincrement(conn: sqlite3.Connection, table: str):
+    sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+    if "AUTOINCREMENT" in sql:
+        return
+    sql = sql.replace(f"CREATE TABLE {table}", f"CREATE TABLE {table}_v2", 1)
+    conn.execute(sql.replace("id INTEGER PRIMARY KEY", "id INTEGER PRIMARY KEY AUTOINCREMENT", 1))
+    conn.execute(f"INSERT INTO {table}_v2 SELECT * FROM {table}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_v2 RENAME TO {table}")
+
+
+def migrate_legacy_table(conn: sqlite3.Connection, chunk_size: int = 1000):
+    """Copy rows of the old one-row-per-response TEXT table into requests, responses and recommendations"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(miner_responses)")}
+
+    def col(name: str) -> str:
+        return f'"{name}"' if name in columns else "NULL"
+
+    cursor = conn.execute(
+        f"SELECT {col('step')}, {col('created_at')}, {col('user')}, {col('query')}, {col('site_key')}, "
+        f"{col('num_results')}, {col('context')}, {col('miner_uid')}, {col('miner_hotkey')}, {col('models_used')}, "
+        f"{col('bt_header_dendrite_status_code')}, {col('bt_header_dendrite_process_time')}, "
+        f"{col('computed_body_hash')}, {col('results')} FROM miner_responses"
+    )
+    request_ids: Dict[Tuple, int] = {}
+    migrated = 0
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        for (step, created_at, user, query, site_key, num_results, context, miner_uid, miner_hotkey,
+             models_used, status_code, process_time, body_hash, results) in rows:
+            key = (step, created_at, query)
+            request_id = request_ids.get(key)
+            if request_id is None:
+                request_id = conn.execute(
+                    "INSERT INTO requests (step, created_at, user, query, site_key, num_results, context) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (_to_int(step) or 0, created_at or "", user, query, site_key, _to_int(num_results), context)
+                ).lastrowid
+                request_ids[key] = request_id
+            response_id = conn.execute(
+                "INSERT INTO responses (request_id, step, created_at, miner_uid, miner_hotkey, models_used, "
+                "num_results, status_code, process_time, body_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (request_id, _to_int(step) or 0, created_at or "", _to_int(miner_uid), miner_hotkey, models_used,
+                 _to_int(num_results), _to_int(status_code), _to_float(process_time), body_hash)
+            ).lastrowid
+            recs = []
+            if results:
+                try:
+                    recs = parse_recommendations(ast.literal_eval(results))
+                except (ValueError, SyntaxError):
+                    recs = []
+            conn.executemany(
+                "INSERT INTO recommendations (response_id, rank, sku, name, price, reason) VALUES (?, ?, ?, ?, ?, ?)",
+                [(response_id, rank, *rec) for rank, rec in enumerate(recs)]
+            )
+            migrated += 1
+    bt.logging.info(f"Migrated {migrated} miner responses to the normalized schema")
+
+
+def get_watermark(conn: sqlite3.Connection) -> int:
+    """Id of the last response confirmed as uploaded, 0 if nothing was uploaded yet"""
+    row = conn.execute("SELECT response_id FROM upload_watermark WHERE id = 0").fetchone()
+    return row[0] if row else 0
+
+
+def set_watermark(conn: sqlite3.Connection, response_id: int):
+    with conn:
+        conn.execute(
+            "INSERT INTO upload_watermark (id, response_id, uploaded_at) VALUES (0, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET response_id = excluded.response_id, uploaded_at = excluded.uploaded_at",
+            (response_id, datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"))
+        )
+
+
+def export_segment(conn: sqlite3.Connection, path: str, after_id: int, max_rows: int) -> Tuple[int, int]:
+    """
+    Write responses with id > after_id as gzip NDJSON to path, one object per response with its
+    request fields and recommendations. Rows are streamed from the cursor, never held all in memory.
+    Returns (last response id written, rows written).
+    """
+    cursor = conn.execute(
+        "SELECT r.id, r.step, r.created_at, r.miner_uid, r.miner_hotkey, r.models_used, r.num_results, "
+        "r.status_code, r.process_time, r.body_hash, q.request_created_at, q.user, q.query, q.site_key "
+        "FROM responses r JOIN requests q ON q.id = r.request_id WHERE r.id > ? ORDER BY r.id LIMIT ?",
+        (after_id, max_rows)
+    )
+    fields = [d[0] for d in cursor.description]
+    last_id, written = after_id, 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            recs: Dict[int, list] = {}
+            for response_id, sku, name, price, reason in conn.execute(
+                "SELECT response_id, sku, name, price, reason FROM recommendations "
+                "WHERE response_id BETWEEN ? AND ? ORDER BY response_id, rank", (ids[0], ids[-1])
+            ):
+                recs.setdefault(response_id, []).append({"sku": sku, "name": name, "price": price, "reason": reason})
+            for row in rows:
+                record = dict(zip(fields, row))
+                record["results"] = recs.get(row[0], [])
+                f.write(json.dumps(record, separators=(',', ':')))
+                f.write("\n")
+            last_id = ids[-1]
+            written += len(rows)
+    return last_id, written
+
+
+def prune_uploaded(conn: sqlite3.Connection, up_to_id: int) -> int:
+    """Delete responses up to and including up_to_id, their recommendations and requests left without responses"""
+    with conn:
+        conn.execute("DELETE FROM recommendations WHERE response_id <= ?", (up_to_id,))
+        deleted = conn.execute("DELETE FROM responses WHERE id <= ?", (up_to_id,)).rowcount
+        conn.execute("DELETE FROM requests WHERE id NOT IN (SELECT DISTINCT request_id FROM responses)")
+    return deleted
+
+
+def insert_round(conn: sqlite3.Connection, step: int, created_at: str, responses: List[BitrecsRequest]) -> int:
+    """Insert one validator round as a request row plus its responses and recommendations, returns responses written"""
+    responses = [r for r in responses if isinstance(r, BitrecsRequest)]
+    if not responses:
+        return 0
+    first = responses[0]
+    context = next((r.context for r in responses if r.context), first.context)
+    request_id = conn.execute(
+        "INSERT INTO requests (step, created_at, request_created_at, user, query, site_key, num_results, context) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (step, created_at, first.created_at, first.user, first.query, first.site_key, first.num_results, context)
+    ).lastrowid
+
+    recommendations = []
+    for response in responses:
+        dendrite = response.dendrite
+        response_id = conn.execute(
+            "INSERT INTO responses (request_id, step, created_at, miner_uid, miner_hotkey, models_used, "
+            "num_results, status_code, process_time, body_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (request_id, step, created_at, _to_int(response.miner_uid), response.miner_hotkey,
+             str(response.models_used) if response.models_used else None, response.num_results,
+             _to_int(dendrite.status_code) if dendrite else None,
+             _to_float(dendrite.process_time) if dendrite else None,
+             response.computed_body_hash)
+        ).lastrowid
+        recommendations.extend(
+            (response_id, rank, *rec) for rank, rec in enumerate(parse_recommendations(response.results))
+        )
+    conn.executemany(
+        "INSERT INTO recommendations (response_id, rank, sku, name, price, reason) VALUES (?, ?, ?, ?, ?, ?)",
+        recommendations
+    )
+    return len(responses)
+
+
+class MinerResponseWriter:
+    """
+    Background writer for miner responses.
+
+    Callers only enqueue, a single thread owns one WAL mode SQLite connection and writes
+    queued rounds in one transaction once `batch_size` responses are pending or `flush_interval`
+    seconds passed since the first pending round. The queue holds at most `max_queue` rounds,
+    newer rounds are dropped with a warning while the database can't be opened or written.
+    A batch that hits a locked or busy database is retried with backoff, it is only dropped after
+    a non-transient error or `WRITER_WRITE_ATTEMPTS` tries. Drops are counted in
+    bitrecs_response_writer_dropped_total.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = WRITER_BATCH_SIZE, flush_interval: float = WRITER_FLUSH_INTERVAL,
+                 max_queue: int = WRITER_MAX_QUEUE):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: Queue = Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.pending = 0
+        self.pending_lock = threading.Condition()
+        self.should_exit = False
+        self.exit_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="response_writer")
+        self.thread.start()
+
+
+    def submit(self, step: int, responses: List[BitrecsRequest]):
+        """Queue a round of responses, returns immediately"""
+        created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            self.queue.put_nowait((step, created_at, responses))
+        except Full:
+            self.dropped += 1
+            RESPONSES_DROPPED.inc("queue_full")
+            bt.logging.warning(f"Miner response queue full, dropped round {step} ({self.dropped} dropped)")
+            return
+        with self.pending_lock:
+            self.pending += 1
+
+
+    def flush(self, timeout: float = 10) -> bool:
+        """Block until every queued round is written, returns False on timeout"""
+        deadline = time.monotonic() + timeout
+        with self.pending_lock:
+            while self.pending > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.pending_lock.wait(remaining)
+        return True
+
+
+    def stop(self, timeout: float = 10):
+        self.flush(timeout)
+        self.should_exit = True
+        self.exit_event.set()
+        self.thread.join(timeout)
+
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        ensure_schema(conn)
+        return conn
+
+
+    def _run(self):
+        conn: Optional[sqlite3.Connection] = None
+        retry = 1.0
+        try:
+            while not self.should_exit:
+                if conn is None:
+                    try:
+                        conn = self._connect()
+                        retry = 1.0
+                    except Exception as e:
+                        bt.logging.error(f"Miner response writer can't open {self.db_path}: {e!r}, retrying in {retry:.0f}s")
+                        self.exit_event.wait(retry)
+                        retry = min(retry * 2, WRITER_RETRY_MAX)
+                        continue
+                try:
+                    batch = self._collect()
+                    if batch:
+                        self._write(conn, batch)
+                except Exception as e:
+                    bt.logging.error(f"Miner response writer failed: {e!r}")
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+    def _collect(self) -> List[Tuple[int, str, List[BitrecsRequest]]]:
+        try:
+            batch = [self.queue.get(timeout=0.5)]
+        except Empty:
+            return []
+        rows = len(batch[0][2])
+        deadline = time.monotonic() + self.flush_interval
+        while rows < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except Empty:
+                break
+            batch.append(item)
+            rows += len(item[2])
+        return batch
+
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Tuple[int, str, List[BitrecsRequest]]]):
+        try:
+            delay = WRITER_WRITE_BACKOFF
+            for attempt in range(1, WRITER_WRITE_ATTEMPTS + 1):
+                try:
+                    written = 0
+                    # The transaction rolls back on error, so a retry writes the whole batch again
+                    with conn:
+                        for step, created_at, responses in batch:
+                            written += insert_round(conn, step, created_at, responses)
+                    bt.logging.info(f"Miner responses logged {written}")
+                    return
+                except Exception as e:
+                    if is_transient_error(e) and attempt < WRITER_WRITE_ATTEMPTS:
+                        bt.logging.warning(f"Miner response write failed ({e}), retry {attempt} in {delay:.1f}s")
+                        self.exit_event.wait(delay)
+                        delay = min(delay * 2, WRITER_RETRY_MAX)
+                        continue
+                    self.dropped += len(batch)
+                    RESPONSES_DROPPED.inc("write_error", amount=len(batch))
+                    bt.logging.error(f"Error in logging miner responses, dropped {len(batch)} rounds "
+                                     f"after {attempt} attempts: {str(e)}")
+                    return
+        finally:
+            with self.pending_lock:
+                self.pending -= len(batch)
+                self.pending_lock.notify_all()
+
+
+def is_transient_error(e: Exception) -> bool:
+    """SQLite errors worth retrying, another connection holds the write lock"""
+    if not isinstance(e, sqlite3.OperationalError):
+        return False
+    message = str(e).lower()
+    return "locked" in message or "busy" in message
+
+
+def response_db_path() -> str:
+    return os.path.join(os.getcwd(), MINER_RESPONSES_DB)
+
+
+def connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """Connection for readers and maintenance jobs, the writer thread keeps its own"""
+    conn = sqlite3.connect(db_path or response_db_path(), timeout=30)
+    ensure_schema(conn)
+    return conn
+
+
+_writer: Optional[MinerResponseWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_response_writer() -> MinerResponseWriter:
+    """Process wide writer for miner_responses.db in the working directory, started on first use"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = MinerResponseWriter(response_db_path())
+            atexit.register(_writer.stop)
+        return _writer
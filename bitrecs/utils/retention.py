@@ -0,0 +1,128 @@
+import os
+import glob
+import shutil
+import sqlite3
+import bittensor as bt
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from bitrecs.utils.response_db import connect, get_watermark
+
+INCREMENTAL_VACUUM_PAGES = 2000
+
+
+@dataclass
+class RetentionPolicy:
+    """ Limits for local validator data, 0 disables a limit """
+    max_age_days: int = 14
+    max_rows: int = 1_000_000
+    wandb_runs: int = 5
+    keep_unuploaded: bool = False
+
+
+@dataclass
+class RetentionResult:
+    rolled_up: int = 0
+    deleted: int = 0
+    freed_pages: int = 0
+    wandb_runs_removed: int = 0
+
+
+def prune_cutoff(conn: sqlite3.Connection, policy: RetentionPolicy, now: Optional[datetime] = None) -> int:
+    """Highest response id to remove under the age and row limits, 0 if nothing has to go"""
+    cutoff_id = 0
+    if policy.max_age_days > 0:
+        now = now or datetime.now(timezone.utc)
+        cutoff = (now - timedelta(days=policy.max_age_days)).strftime("%Y-%m-%d %H:%M:%S")
+        row = conn.execute("SELECT MAX(id) FROM responses WHERE created_at < ?", (cutoff,)).fetchone()
+        cutoff_id = row[0] or 0
+    if policy.max_rows > 0:
+        row = conn.execute(
+            "SELECT id FROM responses ORDER BY id DESC LIMIT 1 OFFSET ?", (policy.max_rows,)
+        ).fetchone()
+        if row:
+            cutoff_id = max(cutoff_id, row[0])
+    if policy.keep_unuploaded:
+        cutoff_id = min(cutoff_id, get_watermark(conn))
+    return cutoff_id
+
+
+def rollup_and_prune(conn: sqlite3.Connection, cutoff_id: int) -> RetentionResult:
+    """
+    Fold responses up to cutoff_id into daily_miner_stats and delete them with their
+    recommendations and orphaned requests, in one transaction.
+    """
+    result = RetentionResult()
+    if cutoff_id <= 0:
+        return result
+    with conn:
+        result.rolled_up = conn.execute(
+            "INSERT INTO daily_miner_stats (day, miner_uid, miner_hotkey, responses, successes, "
+            "total_process_time, recommendations) "
+            "SELECT substr(r.created_at, 1, 10), COALESCE(r.miner_uid, -1), COALESCE(r.miner_hotkey, ''), COUNT(*), "
+            "SUM(r.status_code = 200), COALESCE(SUM(r.process_time), 0), "
+            "SUM((SELECT COUNT(*) FROM recommendations c WHERE c.response_id = r.id)) "
+            "FROM responses r WHERE r.id <= ? GROUP BY 1, 2, 3 "
+            "ON CONFLICT(day, miner_uid, miner_hotkey) DO UPDATE SET "
+            "responses = responses + excluded.responses, "
+            "successes = successes + excluded.successes, "
+            "total_process_time = total_process_time + excluded.total_process_time, "
+            "recommendations = recommendations + excluded.recommendations",
+            (cutoff_id,)
+        ).rowcount
+        conn.execute("DELETE FROM recommendations WHERE response_id <= ?", (cutoff_id,))
+        result.deleted = conn.execute("DELETE FROM responses WHERE id <= ?", (cutoff_id,)).rowcount
+        conn.execute("DELETE FROM requests WHERE id NOT IN (SELECT DISTINCT request_id FROM responses)")
+    return result
+
+
+def compact(conn: sqlite3.Connection, pages: int = INCREMENTAL_VACUUM_PAGES) -> int:
+    """
+    Return free pages to the filesystem. Databases created before incremental auto vacuum
+    get one full VACUUM to switch modes, afterwards at most `pages` pages are freed per call.
+    """
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if freelist == 0:
+        return 0
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return freelist
+    # execute() steps a statement without result columns once, which frees a single page
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    return freelist - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def prune_wandb_runs(wandb_dir: str, keep: int) -> int:
+    """Remove all but the newest `keep` local wandb run directories, never the active run"""
+    if keep <= 0 or not os.path.isdir(wandb_dir):
+        return 0
+    latest = os.path.realpath(os.path.join(wandb_dir, "latest-run"))
+    runs = sorted(
+        (p for p in glob.glob(os.path.join(wandb_dir, "*run-*")) if os.path.isdir(p) and not os.path.islink(p)),
+        key=os.path.getmtime,
+        reverse=True
+    )
+    removed = 0
+    for path in runs[keep:]:
+        if os.path.realpath(path) == latest:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
+
+
+def apply_retention(db_path: str, policy: RetentionPolicy, wandb_dir: Optional[str] = None) -> RetentionResult:
+    """Run the whole policy, blocking, meant for a worker thread"""
+    result = RetentionResult()
+    if os.path.exists(db_path):
+        conn = connect(db_path)
+        try:
+            result = rollup_and_prune(conn, prune_cutoff(conn, policy))
+            result.freed_pages = compact(conn)
+        finally:
+            conn.close()
+    if wandb_dir:
+        result.wandb_runs_removed = prune_wandb_runs(wandb_dir, policy.wandb_runs)
+    bt.logging.trace(f"Retention: {result}")
+    return result
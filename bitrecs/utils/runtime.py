@@ -1,8 +1,11 @@
+import time
+import random
 import asyncio
+import bittensor as bt
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timedelta
-from typing import Optional, Dict
-from functools import wraps
-from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
 from functools import wraps
 
 
@@ -35,4 +38,128 @@ def execute_periodically(period: timedelta):
 
         return wrapper
 
-    return decorator
\ No newline at end of file
+    return decorator
+
+@dataclass
+class JobStats:
+    runs: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    skipped: int = 0
+    last_started: float = 0.0
+    last_duration: float = 0.0
+    total_duration: float = 0.0
+    last_error: str = ""
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    func: Callable
+    interval: float
+    timeout: Optional[float] = None
+    jitter: float = 0.1
+    blocking: bool = False
+    stats: JobStats = field(default_factory=JobStats)
+    running: Optional[asyncio.Future] = None
+
+    def next_delay(self) -> float:
+        spread = self.interval * self.jitter
+        return max(0.0, self.interval + random.uniform(-spread, spread))
+
+
+class JobScheduler:
+    """
+    Runs periodic jobs on one event loop, each in its own task.
+
+    Every job is started with a small random delay and then rescheduled every `interval`
+    seconds plus or minus `jitter` (a fraction of the interval), so jobs do not fire together.
+    A run is abandoned after `timeout` seconds, and a run is skipped while the previous one of
+    the same job is still going (a timed out blocking job keeps its executor thread until it
+    returns). Blocking callables run in the scheduler's thread pool. Coroutines run on the
+    loop and must offload their own blocking calls.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.jobs: Dict[str, PeriodicJob] = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.tasks: List[asyncio.Task] = []
+        self.stopped = asyncio.Event()
+
+
+    def add(self, name: str, func: Callable, interval: float, timeout: Optional[float] = None,
+            jitter: float = 0.1, blocking: bool = False) -> PeriodicJob:
+        if name in self.jobs:
+            raise ValueError(f"Job {name} already scheduled")
+        job = PeriodicJob(name=name, func=func, interval=interval, timeout=timeout, jitter=jitter, blocking=blocking)
+        self.jobs[name] = job
+        return job
+
+
+    async def run_once(self, job: PeriodicJob) -> bool:
+        """Run a job now unless it is still running, returns False if it was skipped"""
+        if job.running is not None and not job.running.done():
+            job.stats.skipped += 1
+            bt.logging.warning(f"Job {job.name} still running, skipping this run")
+            return False
+
+        loop = asyncio.get_running_loop()
+        if job.blocking:
+            job.running = loop.run_in_executor(self.executor, job.func)
+        else:
+            job.running = asyncio.ensure_future(job.func())
+        job.stats.runs += 1
+        job.stats.last_started = time.time()
+        st = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(job.running), timeout=job.timeout)
+        except asyncio.TimeoutError:
+            job.stats.timeouts += 1
+            job.stats.last_error = f"timed out after {job.timeout}s"
+            if not job.blocking:
+                job.running.cancel()
+            bt.logging.error(f"Job {job.name} timed out after {job.timeout}s")
+        except asyncio.CancelledError:
+            job.running.cancel()
+            raise
+        except Exception as e:
+            job.stats.failures += 1
+            job.stats.last_error = repr(e)
+            bt.logging.error(f"Job {job.name} failed: {e!r}")
+        finally:
+            job.stats.last_duration = time.perf_counter() - st
+            job.stats.total_duration += job.stats.last_duration
+        return True
+
+
+    async def _loop(self, job: PeriodicJob):
+        await asyncio.sleep(random.uniform(0, min(1.0, job.interval * job.jitter)))
+        while not self.stopped.is_set():
+            await self.run_once(job)
+            try:
+                await asyncio.wait_for(self.stopped.wait(), timeout=job.next_delay())
+            except asyncio.TimeoutError:
+                pass
+
+
+    async def run(self):
+        """Run every job until stop() is called"""
+        self.tasks = [asyncio.create_task(self._loop(job), name=f"job_{job.name}") for job in self.jobs.values()]
+        try:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        finally:
+            for task in self.tasks:
+                task.cancel()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+    def stop(self, cancel: bool = False):
+        """Stop after the running jobs finish, or right away with cancel"""
+        self.stopped.set()
+        if cancel:
+            for task in self.tasks:
+                task.cancel()
+
+
+    def metrics(self) -> Dict[str, dict]:
+        return {name: asdict(job.stats) for name, job in self.jobs.items()}
@@ -0,0 +1,201 @@
+"""
+Lightweight request tracing.
+
+A request gets a trace id when it enters the API. Spans nest through a context variable
+inside a thread or task. Across the api_queue the parent span travels on SynapseWithEvent,
+so the validator loop, the dendrite calls and the scoring that follow end up in the same trace.
+
+Spans opened with a `stage` also feed the bitrecs_stage_seconds histogram, so the metrics
+and the traces time the same blocks. Without an exporter, spans are only timed and never
+recorded. Exported spans are OTLP JSON, one export request per line. That is the format the
+OpenTelemetry collector's otlpjsonfile receiver reads.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import bittensor as bt
+from contextvars import ContextVar
+from typing import IO, Optional
+from bitrecs.utils.metrics import STAGE_SECONDS
+
+_current: ContextVar[Optional["Span"]] = ContextVar("bitrecs_span", default=None)
+
+
+def new_id(size: int = 8) -> str:
+    return os.urandom(size).hex()
+
+
+def current_span() -> Optional["Span"]:
+    return _current.get()
+
+
+class SpanExporter:
+    def export(self, span: "Span"):
+        raise NotImplementedError
+
+
+    def shutdown(self):
+        pass
+
+
+class OtlpJsonExporter(SpanExporter):
+    """Writes each finished span as an OTLP JSON export request line, flushed when a trace root ends"""
+
+    def __init__(self, stream: IO[str], service_name: str = "bitrecs-validator", close: bool = False):
+        self.stream = stream
+        self.close = close
+        self.lock = threading.Lock()
+        self.resource = {"attributes": [_attribute("service.name", service_name)]}
+
+
+    def export(self, span: "Span"):
+        line = json.dumps({"resourceSpans": [{
+            "resource": self.resource,
+            "scopeSpans": [{"scope": {"name": "bitrecs"}, "spans": [span.to_otlp()]}]
+        }]}, separators=(",", ":"))
+        with self.lock:
+            self.stream.write(line + "\n")
+            if span.parent_id is None:
+                self.stream.flush()
+
+
+    def shutdown(self):
+        with self.lock:
+            self.stream.flush()
+            if self.close:
+                self.stream.close()
+
+
+_exporter: Optional[SpanExporter] = None
+
+
+def configure(exporter: str = "none", path: str = "", service_name: str = "bitrecs-validator"):
+    """Set the span exporter: none, stdout or file (OTLP JSON lines appended to path)"""
+    global _exporter
+    shutdown()
+    if exporter == "stdout":
+        _exporter = OtlpJsonExporter(sys.stdout, service_name)
+    elif exporter == "file":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        _exporter = OtlpJsonExporter(open(path, "a", encoding="utf-8", buffering=1 << 16), service_name, close=True)
+    elif exporter not in ("none", "", None):
+        raise ValueError(f"Unknown tracing exporter: {exporter}")
+    if _exporter is not None:
+        bt.logging.info(f"Tracing enabled, exporting spans to {exporter} {path}")
+
+
+def set_exporter(exporter: Optional[SpanExporter]):
+    global _exporter
+    _exporter = exporter
+
+
+def shutdown():
+    global _exporter
+    if _exporter is not None:
+        _exporter.shutdown()
+        _exporter = None
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class Span:
+    """
+    A timed block, a child of `parent` or of the current span. The trace id of a root
+    span is the request id. Use as a context manager, or call end() for blocks that
+    do not nest cleanly.
+    """
+    __slots__ = ("name", "stage", "trace_id", "span_id", "parent_id", "attributes",
+                 "start_ns", "end_ns", "perf", "error", "token")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, stage: Optional[str] = None, **attributes):
+        if parent is None:
+            parent = _current.get()
+        self.name = name
+        self.stage = stage
+        self.trace_id = parent.trace_id if parent is not None else new_id(16)
+        self.span_id = new_id(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.perf = time.perf_counter()
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self.token = None
+
+
+    @property
+    def request_id(self) -> str:
+        return self.trace_id
+
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.end_ns:
+            return
+        duration = time.perf_counter() - self.perf
+        self.end_ns = self.start_ns + int(duration * 1e9)
+        if error is not None:
+            self.error = repr(error)
+        if self.stage is not None:
+            STAGE_SECONDS.observe(duration, self.stage)
+        exporter = _exporter
+        if exporter is not None:
+            try:
+                exporter.export(self)
+            except Exception as e:
+                bt.logging.error(f"Span export failed: {e}")
+
+
+    def __enter__(self) -> "Span":
+        self.token = _current.set(self)
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            _current.reset(self.token)
+        except ValueError:
+            # Exited in a different context than it was entered in
+            pass
+        self.end(exc_val)
+        return False
+
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def span(name: str, parent: Optional[Span] = None, **attributes) -> Span:
+    """Context manager for a nested span"""
+    return Span(name, parent, **attributes)
+
+
+def stage(name: str, parent: Optional[Span] = None, **attributes) -> Span:
+    """Span for one stage of a request, also observed in bitrecs_stage_seconds"""
+    return Span(name, parent, stage=name, **attributes)
@@ -1,9 +1,11 @@
 
+import time
 import socket
+import asyncio
 import bittensor as bt
 import numpy as np
 import random
-from typing import List
+from typing import Dict, List
 
 
 def check_uid_availability(
@@ -28,6 +30,56 @@ def check_uid_availability(
     return True
 
 
+_mask_cache: Dict[tuple, np.ndarray] = {}
+MAX_CACHED_MASKS = 16
+
+
+def _cached_mask(metagraph: "bt.metagraph.Metagraph", name: str, build) -> np.ndarray:
+    """
+    Masks are rebuilt only when the metagraph object, its block or its size changes,
+    so they are computed once per metagraph sync instead of once per call.
+    """
+    block = getattr(metagraph, "block", -1)
+    key = (id(metagraph), name, int(block), len(metagraph.axons))
+    mask = _mask_cache.get(key)
+    if mask is None:
+        if len(_mask_cache) >= MAX_CACHED_MASKS:
+            _mask_cache.clear()
+        mask = build()
+        _mask_cache[key] = mask
+    return mask
+
+
+def serving_mask(metagraph: "bt.metagraph.Metagraph") -> np.ndarray:
+    """Boolean mask over uids with a serving axon"""
+    return _cached_mask(
+        metagraph, "serving",
+        lambda: np.fromiter((a.is_serving for a in metagraph.axons), dtype=bool, count=len(metagraph.axons))
+    )
+
+
+def availability_mask(metagraph: "bt.metagraph.Metagraph", vpermit_tao_limit: int) -> np.ndarray:
+    """Vectorized check_uid_availability over every uid"""
+    def build():
+        permit = np.asarray(metagraph.validator_permit, dtype=bool)
+        stake = np.asarray(metagraph.S, dtype=float)
+        return serving_mask(metagraph) & ~(permit & (stake > vpermit_tao_limit))
+    return _cached_mask(metagraph, f"available:{vpermit_tao_limit}", build)
+
+
+def stake_limit_mask(metagraph: "bt.metagraph.Metagraph", stake_limit: float) -> np.ndarray:
+    """Serving uids with stake at or below stake_limit"""
+    def build():
+        stake = np.asarray(metagraph.S, dtype=float)
+        return serving_mask(metagraph) & (stake <= stake_limit)
+    return _cached_mask(metagraph, f"stake:{stake_limit}", build)
+
+
+def _sample(uids: np.ndarray, k: int) -> np.ndarray:
+    """Sample k uids without replacement, O(k) in the number of uids drawn"""
+    return uids[random.sample(range(len(uids)), k)]
+
+
 def get_random_miner_uids(self, k: int, exclude: List[int] = None) -> np.ndarray:
     """Returns k available random uids from the metagraph.
     Args:
@@ -38,33 +90,21 @@ def get_random_miner_uids(self, k: int, exclude: List[int] = None) -> np.ndarray
     Notes:
         If `k` is larger than the number of available `uids`, set `k` to the number of available `uids`.
     """
-    candidate_uids = []
-    avail_uids = []
-
-    for uid in range(self.metagraph.n.item()):
-        uid_is_available = check_uid_availability(
-            self.metagraph, uid, self.config.neuron.vpermit_tao_limit
-        )
-        uid_is_not_excluded = exclude is None or uid not in exclude
-
-        if uid_is_available:
-            avail_uids.append(uid)
-            if uid_is_not_excluded:
-                candidate_uids.append(uid)
+    avail_uids = np.flatnonzero(availability_mask(self.metagraph, self.config.neuron.vpermit_tao_limit))
+    if exclude:
+        candidate_uids = avail_uids[~np.isin(avail_uids, exclude)]
+    else:
+        candidate_uids = avail_uids
     # If k is larger than the number of available uids, set k to the number of available uids.
     k = min(k, len(avail_uids))
 
-    bt.logging.trace(f"\033[32m get_random_uids - pre candidate_uids: {candidate_uids} from k {k} \033[0m")
+    bt.logging.trace(f"\033[32m get_random_uids - pre candidate_uids: {candidate_uids.tolist()} from k {k} \033[0m")
 
     # Check if candidate_uids contain enough for querying, if not grab all avaliable uids
-    available_uids = candidate_uids
     if len(candidate_uids) < k:
-        available_uids += random.sample(
-            [uid for uid in avail_uids if uid not in candidate_uids],
-            k - len(candidate_uids),
-        )
-    uids = np.array(random.sample(available_uids, k))
-    return uids
+        excluded = np.setdiff1d(avail_uids, candidate_uids)
+        candidate_uids = np.concatenate([candidate_uids, _sample(excluded, k - len(candidate_uids))])
+    return _sample(candidate_uids, k)
 
     
 
@@ -74,31 +114,19 @@ def get_random_miner_uids2(self,
     excluded_ips: set = None) -> list[int]:    
     """Fetch random miners that meet criteria."""
 
-    avail_uids = []   
-    for uid in range(self.metagraph.n.item()):
-        if not self.metagraph.axons[uid].is_serving:
-            continue
-        # if self.metagraph.validator_permit[uid] and self.metagraph.S[uid] > 1000:
-        #     continue
-        # if self.metagraph.S[uid] == 0:
-        #     continue
-        # if excluded_coldkeys and self.metagraph.axons[uid].coldkey in excluded_coldkeys:
-        #     continue
-        # if excluded_ips and self.metagraph.axons[uid].ip in excluded_ips:
-        #     continue
-    
-        avail_uids.append(uid)
+    avail_uids = np.flatnonzero(serving_mask(self.metagraph))
+    # if excluded_coldkeys / excluded_ips are needed, build them as masks next to serving_mask
 
-    bt.logging.trace(f"\033[32m pre candidate_uids: {avail_uids} from k {k} \033[0m")
+    bt.logging.trace(f"\033[32m pre candidate_uids: {avail_uids.tolist()} from k {k} \033[0m")
 
     # Check if candidate_uids contain enough for querying, if not grab all avaliable uids
     if 0 < len(avail_uids) < k:
         bt.logging.warning(
             f"Requested {k} uids but only {len(avail_uids)} were available. To disable this warning reduce the sample size (--neuron.sample_size)"
         )
-        return np.array(avail_uids).astype(int).tolist()
+        return avail_uids.astype(int).tolist()
     elif len(avail_uids) >= k:
-        return np.array(random.sample(avail_uids, k)).astype(int).tolist()
+        return _sample(avail_uids, k).astype(int).tolist()
     else:
         return []
 
@@ -137,4 +165,35 @@ def ping_miner_uid(self, uid, port=8091, timeout=5) -> bool:
 
     finally:        
         if 'sock' in locals():
-            sock.close()
\ No newline at end of file
+            sock.close()
+
+
+async def probe_miner_uids(self, uids: List[int], timeout: float = 3, concurrency: int = 32) -> Dict[int, float]:
+    """
+    Open a TCP connection to every uid's axon concurrently, at most `concurrency` at a time.
+    Returns the connect round trip time in seconds for each uid that answered.
+    """
+    ignored = ["localhost", "127.0.0.1", "0.0.0.0"]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def probe(uid: int):
+        axon = self.metagraph.axons[uid]
+        if axon.ip in ignored:
+            return uid, None
+        async with semaphore:
+            st = time.perf_counter()
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(axon.ip, int(axon.port)), timeout)
+            except Exception as e:
+                bt.logging.trace(f"probe uid {uid} failed: {type(e).__name__}")
+                return uid, None
+            rtt = time.perf_counter() - st
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+            return uid, rtt
+
+    results = await asyncio.gather(*[probe(uid) for uid in uids])
+    return {uid: rtt for uid, rtt in results if rtt is not None}
@@ -1,12 +1,147 @@
+import os
+import time
+import asyncio
+import threading
 import subprocess
 import bitrecs.utils.constants as CONST
 
 from shlex import split
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
 from importlib.metadata import version
 from bitrecs import __spec_version__ as spec_version
 from bitrecs import __version__ as this_version
-    
+
+REMOTE_HEAD_CMD = "git ls-remote origin -h refs/heads/main"
+REMOTE_HEAD_TIMEOUT = 15
+
+
+def git_dir(root=CONST.ROOT_DIR) -> str:
+    """Path of the git directory, following the `gitdir:` file used by worktrees and submodules"""
+    path = os.path.join(root, ".git")
+    if os.path.isfile(path):
+        with open(path) as f:
+            content = f.read().strip()
+        if content.startswith("gitdir:"):
+            path = os.path.join(root, content[len("gitdir:"):].strip())
+    return path
+
+
+def read_git_head(root=CONST.ROOT_DIR) -> Optional[str]:
+    """Current commit from .git/HEAD and the refs it points to, no git process needed"""
+    try:
+        gdir = git_dir(root)
+        with open(os.path.join(gdir, "HEAD")) as f:
+            head = f.read().strip()
+        if not head.startswith("ref:"):
+            return head if len(head) == 40 else None
+        ref = head[len("ref:"):].strip()
+        ref_path = os.path.join(gdir, ref)
+        if os.path.exists(ref_path):
+            with open(ref_path) as f:
+                commit = f.read().strip()
+            return commit if len(commit) == 40 else None
+        packed = os.path.join(gdir, "packed-refs")
+        if os.path.exists(packed):
+            with open(packed) as f:
+                for line in f:
+                    parts = line.strip().split()
+                    if len(parts) == 2 and parts[1] == ref and len(parts[0]) == 40:
+                        return parts[0]
+    except OSError:
+        pass
+    return None
+
+
+class RemoteHeadCache:
+    """
+    Remote main commit, refreshed with `git ls-remote` at most once per `ttl` seconds,
+    failed lookups are retried after `retry` seconds. Only the first get waits for git, to seed
+    the cache at startup, after that a stale value is returned while a background thread refreshes
+    it. refresh_async runs git as an asyncio subprocess so the event loop keeps running.
+    """
+
+    def __init__(self, ttl: float = CONST.VERSION_CHECK_INTERVAL, retry: float = 60):
+        self.ttl = ttl
+        self.retry = retry
+        self.value: Optional[str] = None
+        self.expires_at = 0.0
+        self.seeded = False
+        self.seed_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.refresh_thread: Optional[threading.Thread] = None
+
+
+    def stale(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+    def _store(self, output: Optional[bytes]) -> Optional[str]:
+        self.seeded = True
+        parts = output.decode().strip().split() if output else []
+        if parts and len(parts[0]) == 40:
+            self.value = parts[0]
+            self.expires_at = time.monotonic() + self.ttl
+        else:
+            self.expires_at = time.monotonic() + min(self.retry, self.ttl)
+        return self.value
+
+
+    def get(self) -> Optional[str]:
+        """Last known remote head, the first call blocks for one lookup, None if it failed"""
+        if not self.seeded:
+            with self.seed_lock:
+                if not self.seeded:
+                    return self.refresh()
+        with self.lock:
+            if self.stale() and (self.refresh_thread is None or not self.refresh_thread.is_alive()):
+                self.refresh_thread = threading.Thread(target=self.refresh, name="remote_head", daemon=True)
+                self.refresh_thread.start()
+            return self.value
+
+
+    def refresh(self) -> Optional[str]:
+        """Blocking lookup with git ls-remote"""
+        try:
+            result = subprocess.run(split(REMOTE_HEAD_CMD), check=True, capture_output=True,
+                                    cwd=CONST.ROOT_DIR, timeout=REMOTE_HEAD_TIMEOUT)
+            output = result.stdout
+        except (subprocess.SubprocessError, OSError):
+            output = None
+        with self.lock:
+            return self._store(output)
+
+
+    async def refresh_async(self) -> Optional[str]:
+        if not self.stale():
+            return self.value
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *split(REMOTE_HEAD_CMD), cwd=CONST.ROOT_DIR,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+            )
+            try:
+                stdout, _ = await asyncio.wait_for(process.communicate(), timeout=REMOTE_HEAD_TIMEOUT)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise
+            with self.lock:
+                return self._store(stdout if process.returncode == 0 else None)
+        except (asyncio.TimeoutError, OSError):
+            with self.lock:
+                return self._store(None)
+
+
+remote_head_cache = RemoteHeadCache()
+
+
+@lru_cache(maxsize=1)
+def bittensor_version() -> str:
+    return version("bittensor")
+
+
 @dataclass
 class LocalMetadata:
     """Metadata associated with the local neuron instance"""
@@ -35,43 +170,42 @@ class LocalMetadata:
 
     @staticmethod
     def local_metadata() -> "LocalMetadata":
-        """Extract the version as current git commit hash"""
+        """
+        Extract the version as current git commit hash.
+        The local head is read from .git, the remote head is the last value in remote_head_cache.
+        Only the first call waits for the network, to seed the cache at startup.
+        """
         commit_hash = "head error"
         remote_commit_hash = "remote head error"
-        bittensor_version = "metadata exception"        
+        bittensor_version_str = "metadata exception"        
         try:
-            bittensor_version = version("bittensor")
-            result = subprocess.run(
-                split("git rev-parse HEAD"),
-                check=True,
-                capture_output=True,
-                cwd=CONST.ROOT_DIR,
-            )
-            commit = result.stdout.decode().strip()
-            assert len(commit) == 40, f"Invalid commit hash: {commit}"
+            bittensor_version_str = bittensor_version()
+            commit = read_git_head()
+            assert commit, "Invalid commit hash"
             commit_hash = commit[:16]
 
-            # Get remote commit hash
-            result = subprocess.run(
-                split("git ls-remote origin -h refs/heads/main"),
-                check=True,
-                capture_output=True,
-                cwd=CONST.ROOT_DIR,
-            )
-            remote_commit = result.stdout.decode().strip().split()[0]
-            assert len(remote_commit) == 40, f"Invalid remote commit hash: {remote_commit}"
+            remote_commit = remote_head_cache.get()
+            assert remote_commit, "Invalid remote commit hash"
             remote_commit_hash = remote_commit[:16]
 
         except Exception as e:
-            commit_hash = "exception unknown"
+            if commit_hash == "head error":
+                commit_hash = "exception unknown"
 
         return LocalMetadata(
             head=commit_hash,
             remote_head=remote_commit_hash,
-            btversion=bittensor_version,
+            btversion=bittensor_version_str,
             version=this_version,
             spec=spec_version
         )
+
+
+    @staticmethod
+    async def local_metadata_async() -> "LocalMetadata":
+        """Same as local_metadata, refreshing a stale remote head without blocking the event loop"""
+        await remote_head_cache.refresh_async()
+        return LocalMetadata.local_metadata()
     
 
     @staticmethod
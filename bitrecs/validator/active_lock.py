@@ -0,0 +1,53 @@
+import os
+import fcntl
+import threading
+from typing import Optional
+
+ACTIVE_LOCK_FILE = "active.lock"
+
+
+class ActiveLock:
+    """
+    Marks the one validator instance that sets weights and owns the shared local data.
+
+    During a zero downtime update the old validator and its standby run side by side with the
+    same hotkey and data directory. Only the instance holding an exclusive flock on the lock file
+    sets weights, saves state, uploads to R2 and runs retention. The standby takes the lock over
+    once the old process exits, the kernel releases it even if that process dies.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd: Optional[int] = None
+        self.lock = threading.Lock()
+
+
+    @property
+    def held(self) -> bool:
+        return self.fd is not None
+
+
+    def acquire(self) -> bool:
+        """Try to take the lock without waiting, True while this instance holds it"""
+        with self.lock:
+            if self.fd is not None:
+                return True
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            os.ftruncate(fd, 0)
+            os.write(fd, str(os.getpid()).encode())
+            self.fd = fd
+            return True
+
+
+    def release(self):
+        with self.lock:
+            if self.fd is None:
+                return
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
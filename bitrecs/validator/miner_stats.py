@@ -0,0 +1,172 @@
+import threading
+import numpy as np
+from collections import deque
+from dataclasses import dataclass, field
+from random import SystemRandom
+from typing import Deque, Dict, List, Optional
+from bitrecs.protocol import BitrecsRequest
+from bitrecs.utils import constants as CONST
+safe_random = SystemRandom()
+
+DEFAULT_STATS_WINDOW = 100
+
+
+@dataclass
+class RoundOutcome:
+    """ What a single miner did in a single validator round """
+    latency: float
+    success: bool
+    valid: bool
+    consensus: bool
+
+
+@dataclass
+class MinerStats:
+    """ Rolling window of round outcomes for one UID """
+    window: int = DEFAULT_STATS_WINDOW
+    outcomes: Deque[RoundOutcome] = field(default_factory=deque)
+
+    def add(self, outcome: RoundOutcome):
+        self.outcomes.append(outcome)
+        while len(self.outcomes) > self.window:
+            self.outcomes.popleft()
+
+    @property
+    def rounds(self) -> int:
+        return len(self.outcomes)
+
+    def latency_percentile(self, q: float) -> float:
+        if not self.outcomes:
+            return 0.0
+        return float(np.percentile([o.latency for o in self.outcomes], q))
+
+    @property
+    def success_rate(self) -> float:
+        return self._rate("success")
+
+    @property
+    def schema_failure_rate(self) -> float:
+        """Share of rounds where the miner answered but the result was rejected"""
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for o in self.outcomes if o.success and not o.valid) / len(self.outcomes)
+
+    @property
+    def valid_rate(self) -> float:
+        return self._rate("valid")
+
+    @property
+    def consensus_rate(self) -> float:
+        return self._rate("consensus")
+
+    def _rate(self, name: str) -> float:
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for o in self.outcomes if getattr(o, name)) / len(self.outcomes)
+
+    def summary(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "p50": round(self.latency_percentile(50), 4),
+            "p90": round(self.latency_percentile(90), 4),
+            "success_rate": round(self.success_rate, 4),
+            "schema_failure_rate": round(self.schema_failure_rate, 4),
+            "consensus_rate": round(self.consensus_rate, 4)
+        }
+
+
+class MinerStatsStore:
+    """
+    Per-UID rolling stats updated from every scored round, used to pick the miners to query.
+
+    Expected utility of a miner is valid_rate * (0.5 + 0.5 * consensus_rate) discounted by its p90 latency
+    relative to the dendrite timeout. UIDs without history get utility 1.0 so new miners are tried first.
+    Written from the validator loop thread and read from miner_sync, so access is guarded by a lock.
+    """
+
+    def __init__(self, window: int = DEFAULT_STATS_WINDOW):
+        self.window = window
+        self.stats: Dict[int, MinerStats] = {}
+        self.lock = threading.Lock()
+
+
+    def record_round(self, uids: List[int], responses: List[Optional[BitrecsRequest]],
+                     rewards: np.ndarray, consensus_uids: List[int] = None):
+        consensus = set(consensus_uids or [])
+        with self.lock:
+            for uid, response, score in zip(uids, responses, rewards):
+                uid = int(uid)
+                success = response is not None and response.is_success
+                latency = CONST.MAX_DENDRITE_TIMEOUT
+                if success and response.dendrite.process_time is not None:
+                    latency = float(response.dendrite.process_time)
+                outcome = RoundOutcome(latency=latency, success=success, valid=score > 0, consensus=uid in consensus)
+                self.stats.setdefault(uid, MinerStats(window=self.window)).add(outcome)
+
+
+    def reset(self, uid: int):
+        """Forget a UID, used when its hotkey was replaced"""
+        with self.lock:
+            self.stats.pop(int(uid), None)
+
+
+    def to_dict(self) -> Dict[str, List[list]]:
+        """Plain JSON-able form, {uid: [[latency, success, valid, consensus], ...]}"""
+        with self.lock:
+            return {
+                str(uid): [[o.latency, o.success, o.valid, o.consensus] for o in stats.outcomes]
+                for uid, stats in self.stats.items()
+            }
+
+
+    def load_dict(self, data: Dict[str, List[list]]):
+        """Restore stats saved with to_dict"""
+        with self.lock:
+            self.stats = {}
+            for uid, outcomes in data.items():
+                stats = MinerStats(window=self.window)
+                for latency, success, valid, consensus in outcomes:
+                    stats.add(RoundOutcome(latency=float(latency), success=bool(success),
+                                           valid=bool(valid), consensus=bool(consensus)))
+                self.stats[int(uid)] = stats
+
+
+    def get(self, uid: int) -> Optional[MinerStats]:
+        """Snapshot of one UID's stats, safe to read while rounds are being recorded"""
+        with self.lock:
+            stats = self.stats.get(int(uid))
+            if stats is None:
+                return None
+            return MinerStats(window=stats.window, outcomes=deque(stats.outcomes))
+
+
+    def expected_utility(self, uid: int) -> float:
+        with self.lock:
+            return self._expected_utility(uid)
+
+
+    def _expected_utility(self, uid: int) -> float:
+        stats = self.stats.get(int(uid))
+        if stats is None or stats.rounds == 0:
+            return 1.0
+        latency_factor = 1.0 / (1.0 + stats.latency_percentile(90) / CONST.MAX_DENDRITE_TIMEOUT)
+        return stats.valid_rate * (0.5 + 0.5 * stats.consensus_rate) * latency_factor
+
+
+    def rank(self, uids: List[int], k: int, epsilon: float = 0.1, rtts: Dict[int, float] = None) -> List[int]:
+        """
+        Order candidate uids for selection.
+        The first k are the top-k by expected utility (ties broken by probe round trip time), with each
+        slot given to a random lower ranked uid with probability epsilon. The rest follow in order as fallbacks.
+        """
+        rtts = rtts or {}
+        with self.lock:
+            ordered = sorted(set(int(u) for u in uids),
+                             key=lambda u: (-self._expected_utility(u), rtts.get(u, float("inf"))))
+        k = min(k, len(ordered))
+        explore = sum(1 for _ in range(k) if safe_random.random() < epsilon)
+        explore = min(explore, len(ordered) - k)
+        picked = ordered[:k - explore]
+        if explore > 0:
+            picked += safe_random.sample(ordered[k - explore:], explore)
+        return picked + [u for u in ordered if u not in picked]
@@ -0,0 +1,119 @@
+import asyncio
+import numpy as np
+import bittensor as bt
+from typing import Dict, List, Optional, Set, Tuple
+from bitrecs.commerce.user_action import UserActionIndex
+from bitrecs.protocol import BitrecsRequest
+from bitrecs.utils.tracing import span, stage
+from bitrecs.utils.distance import (
+    calculate_jaccard_distance,
+    rec_list_to_set,
+    select_most_similar_sets
+)
+from bitrecs.validator.reward import CatalogValidator, reward
+
+
+class QuorumFanout:
+    """
+    Sends a request to every axon at once and scores each response as soon as it arrives.
+
+    wait_for_quorum returns once `quorum` valid responses are in and the most similar pair
+    among them reaches `min_similarity` (Jaccard), so the client can be answered without
+    waiting for the slowest miner. Stragglers keep running until wait_all, which returns
+    every response and reward in axon order for scoring.
+    """
+
+    def __init__(
+        self,
+        dendrite: bt.dendrite,
+        axons: List[bt.AxonInfo],
+        synapse: BitrecsRequest,
+        num_recs: int,
+        catalog_validator: Optional[CatalogValidator],
+        actions: UserActionIndex = None,
+        timeout: float = 5,
+        quorum: int = 3,
+        min_similarity: float = 0.5
+    ):
+        self.dendrite = dendrite
+        self.synapse = synapse
+        self.num_recs = num_recs
+        self.catalog_validator = catalog_validator
+        self.actions = actions
+        self.timeout = timeout
+        self.quorum = max(2, quorum) if quorum > 0 else 0
+        self.min_similarity = min_similarity
+        self.responses: List[Optional[BitrecsRequest]] = [None] * len(axons)
+        self.rewards = np.zeros(len(axons), dtype=float)
+        self.arrivals: List[int] = []
+        self.sku_sets: Dict[int, Set[str]] = {}
+        self.tasks = [asyncio.create_task(self._query(i, axon)) for i, axon in enumerate(axons)]
+
+
+    async def _query(self, index: int, axon: bt.AxonInfo) -> int:
+        with span("dendrite.call", hotkey=axon.hotkey):
+            response = await self.dendrite.call(
+                target_axon=axon,
+                synapse=self.synapse.model_copy(),
+                timeout=self.timeout,
+                deserialize=False
+            )
+        self.responses[index] = response
+        if self.catalog_validator is not None:
+            with stage("reward"):
+                self.rewards[index] = reward(self.num_recs, self.catalog_validator, response, self.actions)
+        if self.rewards[index] > 0:
+            self.sku_sets[index] = rec_list_to_set(response.results)
+        self.arrivals.append(index)
+        return index
+
+
+    @property
+    def completed(self) -> int:
+        return len(self.arrivals)
+
+
+    @property
+    def any_success(self) -> bool:
+        return any(r.is_success for r in self.responses if r is not None)
+
+
+    def good_responses(self) -> List[BitrecsRequest]:
+        """Responses with a positive reward, in arrival order"""
+        return [self.responses[i] for i in self.arrivals if self.rewards[i] > 0]
+
+
+    def best_response(self) -> BitrecsRequest:
+        return self.responses[int(self.rewards.argmax())]
+
+
+    def has_consensus(self) -> bool:
+        good = [i for i in self.arrivals if self.rewards[i] > 0 and self.sku_sets.get(i)]
+        if self.quorum == 0 or len(good) < self.quorum:
+            return False
+        sets = [self.sku_sets[i] for i in good]
+        best_pair = select_most_similar_sets(sets, 2)
+        if len(best_pair) < 2:
+            return False
+        similarity = 1 - calculate_jaccard_distance(sets[best_pair[0]], sets[best_pair[1]])
+        return similarity >= self.min_similarity
+
+
+    async def wait_for_quorum(self) -> bool:
+        """
+        Wait until consensus is reached or every miner has answered.
+        Returns True if the quorum was reached before all responses were in.
+        """
+        pending = set(self.tasks)
+        while pending:
+            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if pending and self.has_consensus():
+                bt.logging.info(f"\033[1;32m Quorum reached with {self.completed}/{len(self.tasks)} responses \033[0m")
+                return True
+        return False
+
+
+    async def wait_all(self) -> Tuple[List[BitrecsRequest], np.ndarray]:
+        """Collect the stragglers, returns responses and rewards in axon order"""
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        return list(self.responses), self.rewards
@@ -21,10 +21,10 @@ import json
 import traceback
 import numpy as np
 import bittensor as bt
-import jsonschema
 import json_repair
-from typing import List
-from bitrecs.commerce.user_action import UserAction, ActionType
+from functools import lru_cache
+from typing import List, Optional, Union
+from bitrecs.commerce.user_action import UserAction, UserActionIndex, ActionType
 from bitrecs.protocol import BitrecsRequest
 from bitrecs.commerce.product import Product, ProductFactory
 from bitrecs.utils import constants as CONST
@@ -50,16 +50,10 @@ class CatalogValidator:
         return sku.lower().strip() in self.sku_set
 
 
-def validate_result_schema(num_recs: int, results: list) -> bool:
-    """
-    Ensure results from Miner match the required schema
-    """
-    if num_recs < 1 or num_recs > CONST.MAX_RECS_PER_REQUEST:
-        return False
-    if len(results) != num_recs:
-        bt.logging.error("Error validate_result_schema num_recs mismatch")
-        return False
-    
+@lru_cache(maxsize=1)
+def result_schema_validator():
+    """jsonschema is imported and the schema checked once, on the first validation"""
+    import jsonschema
     schema = {
         "type": "object",
         "properties": {
@@ -70,18 +64,34 @@ def validate_result_schema(num_recs: int, results: list) -> bool:
         },
         "required": ["sku", "name", "price", "reason"],
     }
+    validator_cls = jsonschema.validators.validator_for(schema)
+    validator_cls.check_schema(schema)
+    return validator_cls(schema)
 
+
+def validate_result_schema(num_recs: int, results: list) -> bool:
+    """
+    Ensure results from Miner match the required schema
+    """
+    if num_recs < 1 or num_recs > CONST.MAX_RECS_PER_REQUEST:
+        return False
+    if len(results) != num_recs:
+        bt.logging.error("Error validate_result_schema num_recs mismatch")
+        return False
+    
+    validator = result_schema_validator()
+    from jsonschema.exceptions import ValidationError
     count = 0
     for item in results:
         try:            
             #thing = json.loads(item)
             thing = json_repair.loads(item)
-            jsonschema.validate(thing, schema)           
+            validator.validate(thing)
             count += 1
         except json.decoder.JSONDecodeError as e:            
             bt.logging.trace(f"JSON JSONDecodeError ERROR: {e}")
             break
-        except jsonschema.exceptions.ValidationError as e:            
+        except ValidationError as e:            
             bt.logging.trace(f"JSON ValidationError ERROR: {e}")
             break
         except Exception as e:            
@@ -91,7 +101,7 @@ def validate_result_schema(num_recs: int, results: list) -> bool:
     return count == len(results)
 
 
-def calculate_miner_boost(hotkey: str, actions: List[UserAction]) -> float:
+def calculate_miner_boost(hotkey: str, actions: Union[UserActionIndex, List[UserAction]]) -> float:
     """
     Reward miners who generate positive actions on ecommerce sites
 
@@ -99,25 +109,27 @@ def calculate_miner_boost(hotkey: str, actions: List[UserAction]) -> float:
     try:
         if not actions or len(actions) == 0:
             return 0.0
+        if not isinstance(actions, UserActionIndex):
+            actions = UserActionIndex.from_actions(actions)
 
-        miner_actions = [a for a in actions if a["hot_key"].lower() == hotkey.lower()]
-        if len(miner_actions) == 0:
+        counts = actions.get(hotkey)
+        if len(counts) == 0:
             bt.logging.trace(f"Miner {hotkey} has no actions")
             return 0.0
 
-        views = [v for v in miner_actions if v["action"] == ActionType.VIEW_PRODUCT.name]
-        add_to_carts = [a for a in miner_actions if a["action"] == ActionType.ADD_TO_CART.name]
-        purchases = [p for p in miner_actions if p["action"] == ActionType.PURCHASE.name]        
+        views = counts.get(ActionType.VIEW_PRODUCT.name, 0)
+        add_to_carts = counts.get(ActionType.ADD_TO_CART.name, 0)
+        purchases = counts.get(ActionType.PURCHASE.name, 0)
 
-        if len(views) == 0 and len(add_to_carts) == 0 and len(purchases) == 0:
+        if views == 0 and add_to_carts == 0 and purchases == 0:
             bt.logging.trace(f"Miner {hotkey} has no parsed actions - skipping boost")
             return 0.0
         
-        vf = ACTION_WEIGHTS[ActionType.VIEW_PRODUCT.value] * len(views)
-        af = ACTION_WEIGHTS[ActionType.ADD_TO_CART.value] * len(add_to_carts)
-        pf = ACTION_WEIGHTS[ActionType.PURCHASE.value] * len(purchases)
+        vf = ACTION_WEIGHTS[ActionType.VIEW_PRODUCT.value] * views
+        af = ACTION_WEIGHTS[ActionType.ADD_TO_CART.value] * add_to_carts
+        pf = ACTION_WEIGHTS[ActionType.PURCHASE.value] * purchases
         total_boost = vf + af + pf
-        bt.logging.trace(f"Miner {hotkey} total_boost: {total_boost} from views: ({len(views)}) add_to_carts: ({len(add_to_carts)}) purchases: ({len(purchases)})")
+        bt.logging.trace(f"Miner {hotkey} total_boost: {total_boost} from views: ({views}) add_to_carts: ({add_to_carts}) purchases: ({purchases})")
 
         # miner has no actions this round
         if total_boost == 0:
@@ -138,7 +150,7 @@ def reward(
     num_recs: int, 
     catalog_validator: CatalogValidator, 
     response: BitrecsRequest,
-    actions: List[UserAction]
+    actions: Union[UserActionIndex, List[UserAction]]
 ) -> float:
     """
     Score the Miner's response to the BitrecsRequest 
@@ -231,11 +243,27 @@ def reward(
         return 0.0
 
 
+def get_catalog_validator(num_recs: int, ground_truth: BitrecsRequest) -> Optional[CatalogValidator]:
+    """
+    Parse the request catalog once and build the validator used to score every response.
+    Returns None if the request is not scoreable.
+    """
+    if num_recs < 1 or num_recs > CONST.MAX_RECS_PER_REQUEST:
+        bt.logging.error(f"Invalid number of recommendations: {num_recs}")
+        return None
+    
+    store_catalog : list[Product] = ProductFactory.try_parse_context_strict(ground_truth.context)
+    if len(store_catalog) < CONST.MIN_CATALOG_SIZE or len(store_catalog) > CONST.MAX_CATALOG_SIZE:
+        bt.logging.error(f"Invalid catalog size: {len(store_catalog)}")
+        return None
+    return CatalogValidator(store_catalog)
+
+
 def get_rewards(
     num_recs: int,
     ground_truth: BitrecsRequest,
     responses: List[BitrecsRequest],
-    actions: List[UserAction] = None
+    actions: Union[UserActionIndex, List[UserAction]] = None
 ) -> np.ndarray:
     """
     Returns an array of rewards for the given query and responses.
@@ -244,21 +272,15 @@ def get_rewards(
     - num_recs (int): The number of results expected per miner response.
     - ground_truth (BitrecsRequest): The original ground truth which contains the catalog and query
     - responses (List[float]): A list of responses from the miners.
-    - actions (List[UserAction]): A list of user actions across all miners. 
+    - actions (UserActionIndex): Indexed user actions across all miners. 
 
     Returns:
     - np.ndarray: An array of rewards for the given query and responses.
     """
 
-    if num_recs < 1 or num_recs > CONST.MAX_RECS_PER_REQUEST:
-        bt.logging.error(f"Invalid number of recommendations: {num_recs}")
-        return np.zeros(len(responses), dtype=float)
-    
-    store_catalog : list[Product] = ProductFactory.try_parse_context_strict(ground_truth.context)
-    if len(store_catalog) < CONST.MIN_CATALOG_SIZE or len(store_catalog) > CONST.MAX_CATALOG_SIZE:
-        bt.logging.error(f"Invalid catalog size: {len(store_catalog)}")
+    catalog_validator = get_catalog_validator(num_recs, ground_truth)
+    if catalog_validator is None:
         return np.zeros(len(responses), dtype=float)
-    catalog_validator = CatalogValidator(store_catalog)
     
     if not actions or len(actions) == 0:
         bt.logging.warning(f"\033[1;33m WARNING - no actions found in get_rewards \033[0m")
@@ -266,5 +288,3 @@ def get_rewards(
     return np.array(
         [reward(num_recs, catalog_validator, response, actions) for response in responses], dtype=float
     )
-
-
@@ -0,0 +1,129 @@
+import io
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import numpy as np
+import bittensor as bt
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+STATE_SCHEMA_VERSION = 1
+STATE_FILE = "state.npz"
+
+
+@dataclass
+class ValidatorState:
+    """ Everything the validator needs to resume after a restart """
+    step: int
+    scores: np.ndarray
+    hotkeys: List[str]
+    miner_stats: Dict[str, List[list]] = field(default_factory=dict)
+    saved_at: float = 0.0
+    schema_version: int = STATE_SCHEMA_VERSION
+
+
+class StateStore:
+    """
+    Versioned validator state on disk.
+
+    The state is written as an npz of plain arrays (no pickled objects) to a temp file,
+    fsynced and renamed over the previous one, so a crash leaves either the old or the new
+    state, never a partial file. The save time lives inside the state instead of a separate
+    timestamp file. Saves are skipped when nothing but the step changed and limited to one per
+    `min_interval` seconds unless forced. The chain worker, SIGUSR1 and shutdown can save at the same
+    time, so saves are serialized and every writer gets its own temp file.
+    """
+
+    def __init__(self, directory: str, min_interval: float = 60):
+        self.path = os.path.join(directory, STATE_FILE)
+        self.min_interval = min_interval
+        self.last_digest: Optional[str] = None
+        self.last_save = 0.0
+        self.lock = threading.Lock()
+
+
+    @staticmethod
+    def digest(state: ValidatorState) -> str:
+        """Digest of the state used to skip unchanged saves, the step advances every request so it is left out"""
+        h = hashlib.sha256()
+        h.update(np.ascontiguousarray(state.scores, dtype=np.float64).tobytes())
+        h.update("\n".join(state.hotkeys).encode())
+        h.update(json.dumps(state.miner_stats, sort_keys=True).encode())
+        return h.hexdigest()
+
+
+    def save(self, state: ValidatorState, force: bool = False) -> bool:
+        """Returns True if the state was written"""
+        with self.lock:
+            now = time.time()
+            if not force and now - self.last_save < self.min_interval:
+                return False
+            digest = self.digest(state)
+            if digest == self.last_digest:
+                return False
+
+            state.saved_at = now
+            buffer = io.BytesIO()
+            np.savez(
+                buffer,
+                schema_version=np.array(STATE_SCHEMA_VERSION),
+                saved_at=np.array(state.saved_at),
+                step=np.array(state.step),
+                scores=np.asarray(state.scores, dtype=np.float32),
+                hotkeys=np.array(state.hotkeys, dtype=str),
+                miner_stats=np.array(json.dumps(state.miner_stats, separators=(',', ':')))
+            )
+            fd, tmp_path = tempfile.mkstemp(prefix=STATE_FILE + ".", suffix=".tmp",
+                                            dir=os.path.dirname(self.path) or ".")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(buffer.getvalue())
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._fsync_dir()
+
+            self.last_digest = digest
+            self.last_save = now
+            return True
+
+
+    def load(self) -> Optional[ValidatorState]:
+        """
+        Load the saved state, None if there is none.
+        Files written before the schema version existed (step, scores, hotkeys) load as version 0.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with np.load(self.path, allow_pickle=False) as data:
+            version = int(data["schema_version"]) if "schema_version" in data else 0
+            if version > STATE_SCHEMA_VERSION:
+                raise ValueError(f"State schema version {version} is newer than supported {STATE_SCHEMA_VERSION}")
+            state = ValidatorState(
+                step=int(data["step"]),
+                scores=np.array(data["scores"], dtype=np.float32),
+                hotkeys=[str(h) for h in data["hotkeys"]],
+                miner_stats=json.loads(str(data["miner_stats"])) if "miner_stats" in data else {},
+                saved_at=float(data["saved_at"]) if "saved_at" in data else os.path.getmtime(self.path),
+                schema_version=version
+            )
+        self.last_digest = self.digest(state)
+        return state
+
+
+    def _fsync_dir(self):
+        try:
+            fd = os.open(os.path.dirname(self.path) or ".", os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            bt.logging.trace(f"StateStore directory fsync skipped: {e}")
@@ -21,17 +21,17 @@ import sys
 import time
 import typing
 import asyncio
-import json
-import json_repair
 import bittensor as bt
 import bitrecs.utils.constants as CONST
 from typing import List
 from datetime import datetime, timedelta, timezone
 from bitrecs.base.miner import BaseMinerNeuron
 from bitrecs.commerce.user_profile import UserProfile
+from bitrecs.commerce.catalog_index import get_catalog_index, shortlist_context
 from bitrecs.protocol import BitrecsRequest
 from bitrecs.llms.prompt_factory import PromptFactory
 from bitrecs.llms.factory import LLM, LLMFactory
+from bitrecs.llms.batcher import BATCHABLE_SERVERS, LLMBatcher
 from bitrecs.utils.runtime import execute_periodically
 from bitrecs.utils.uids import best_uid
 from bitrecs.utils.version import LocalMetadata
@@ -46,7 +46,9 @@ async def do_work(user_prompt: str,
                   model: str,
                   system_prompt="You are a helpful assistant.", 
                   profile : UserProfile = None,
-                  debug_prompts=False) -> List[str]:
+                  debug_prompts=False,
+                  context_top_k: int = 0,
+                  batcher: LLMBatcher = None) -> List[str]:
     """
     Miner work is done here.
     This function is invoked by the API validator to generate recommendations.
@@ -62,6 +64,8 @@ async def do_work(user_prompt: str,
         system_prompt (str): The system prompt for the LLM.
         profile (UserProfile): The user profile to use when generating recommendations.
         debug_prompts (bool): Whether to log debug information about the prompts.
+        context_top_k (int): If > 0, shortlist the catalog to the top K candidates for the query before prompting.
+        batcher (LLMBatcher): Optional micro-batcher used to share the local LLM server with co-arriving requests.
 
     Returns:
         typing.List[str]: A list of product recommendations generated by the miner.
@@ -72,6 +76,11 @@ async def do_work(user_prompt: str,
     bt.logging.info(f"do_work LLM model: {model}")  
     bt.logging.trace(f"do_work profile: {profile}")
 
+    if context_top_k > 0:
+        st = time.perf_counter()
+        context = shortlist_context(user_prompt, context, context_top_k, num_recs)
+        bt.logging.info(f"do_work context shortlist top {context_top_k} in {time.perf_counter() - st:.4f}s")
+
     factory = PromptFactory(sku=user_prompt,
                             context=context, 
                             num_recs=num_recs,                                                         
@@ -79,10 +88,15 @@ async def do_work(user_prompt: str,
                             profile=profile)
     prompt = factory.generate_prompt()
     try:
-        llm_response = LLMFactory.query_llm(server=server, 
-                                            model=model, 
-                                            system_prompt=system_prompt, 
-                                            temp=0.0, user_prompt=prompt)
+        if batcher:
+            llm_response = await batcher.submit(model=model,
+                                                system_prompt=system_prompt,
+                                                temp=0.0, user_prompt=prompt)
+        else:
+            llm_response = LLMFactory.query_llm(server=server, 
+                                                model=model, 
+                                                system_prompt=system_prompt, 
+                                                temp=0.0, user_prompt=prompt)
         if not llm_response or len(llm_response) < 10:
             bt.logging.error("LLM response is empty.")
             return []
@@ -150,10 +164,28 @@ class Miner(BaseMinerNeuron):
             bt.logging.info(f"\033[1;32m 🐸 You are the BEST performing miner in the subnet, keep it up!\033[0m")
 
         self.total_request_in_interval = 0
+
+        self.batcher = None
+        batch_window_ms = self.config.llm.batch_window_ms
+        if batch_window_ms > 0:
+            if self.llm_provider in BATCHABLE_SERVERS:
+                self.batcher = LLMBatcher(server=self.llm_provider,
+                                          window_ms=batch_window_ms,
+                                          max_batch_size=self.config.llm.batch_max_size)
+                bt.logging.info(f"\033[1;35m LLM batching enabled: {batch_window_ms}ms window, max {self.config.llm.batch_max_size}\033[0m")
+            else:
+                bt.logging.warning(f"LLM batching is only supported for local servers, ignored for {self.llm_provider}")
         
         if(self.config.logging.trace):
             bt.logging.trace(f"TRACE ENABLED Miner {self.uid} - {self.llm_provider} - {self.model}")
-    
+
+
+    def stop_run_thread(self):
+        super().stop_run_thread()
+        if self.batcher is not None:
+            self.batcher.stop()
+            self.batcher = None
+
 
     async def forward(
         self, synapse: BitrecsRequest
@@ -168,6 +200,15 @@ class Miner(BaseMinerNeuron):
             bitrecs.protocol.BitrecsRequest: The synapse object with the recs - same object modified with updated fields.
 
         """
+        profiled = self.profiler.request()
+        try:
+            return await self.generate_recs(synapse)
+        finally:
+            if profiled is not None:
+                profiled.end()
+
+
+    async def generate_recs(self, synapse: BitrecsRequest) -> BitrecsRequest:
         bt.logging.info(f"MINER {self.uid} FORWARD PASS {synapse.query}")
 
         results = []
@@ -187,7 +228,9 @@ class Miner(BaseMinerNeuron):
                                     server=server, 
                                     model=model, 
                                     profile=user_profile,
-                                    debug_prompts=debug_prompts)            
+                                    debug_prompts=debug_prompts,
+                                    context_top_k=self.config.llm.context_top_k,
+                                    batcher=self.batcher)            
             bt.logging.info(f"LLM {self.model} - Results: count ({len(results)})")
         except Exception as e:
             bt.logging.error(f"\033[31mFATAL ERROR calling do_work: {e!r} \033[0m")
@@ -199,29 +242,20 @@ class Miner(BaseMinerNeuron):
         created_at = utc_now.strftime("%Y-%m-%dT%H:%M:%S")
 
         #Do some cleanup - schema is validated in the reward function
-        final_results = []
-        for item in results:
-            try:
-                item_str = str(item)
-                try:
-                    dictionary_item = json.loads(item_str)
-                except json.JSONDecodeError:
-                    repaired = json_repair.repair_json(item_str)
-                    dictionary_item = json.loads(repaired)
-                
-                if "name" not in dictionary_item:
-                    bt.logging.error(f"Item missing 'name' key: {dictionary_item}")
-                    continue
-                dictionary_item["name"] = CONST.RE_PRODUCT_NAME.sub("", str(dictionary_item["name"]))
-
-                if "reason" in dictionary_item:
-                    dictionary_item["reason"] = CONST.RE_REASON.sub("", str(dictionary_item["reason"]))
-                
-                recommendation = json.dumps(dictionary_item, separators=(',', ':'))
-                final_results.append(recommendation)
-            except Exception as e:
-                bt.logging.error(f"Failed to parse LLM result: {item}, error: {e}")
-                continue
+        catalog = None
+        try:
+            catalog = get_catalog_index(context)
+            if len(catalog) == 0:
+                bt.logging.warning("Empty catalog index, skipping SKU validation")
+                catalog = None
+        except Exception as e:
+            bt.logging.error(f"Failed to index catalog, skipping SKU validation: {e}")
+        final_results = PromptFactory.normalize_llm_results(results, 
+                                                            catalog=catalog, 
+                                                            query=query, 
+                                                            num_recs=num_recs)
+        if len(final_results) != len(results):
+            bt.logging.warning(f"Dropped {len(results) - len(final_results)} invalid results")
         
         output_synapse=BitrecsRequest(
             name=synapse.name, 
@@ -403,7 +437,7 @@ class Miner(BaseMinerNeuron):
     async def version_sync(self):
         bt.logging.trace(f"Version sync ran at {int(time.time())}")
         try:
-            self.local_metadata = LocalMetadata.local_metadata()
+            self.local_metadata = await LocalMetadata.local_metadata_async()
             self.local_metadata.uid = self.uid
             self.local_metadata.hotkey = self.wallet.hotkey.ss58_address
             local_head = self.local_metadata.head
@@ -19,19 +19,23 @@
 
 import os
 import time
+import signal
+import numpy as np
 import bittensor as bt
 import asyncio
-from datetime import timedelta
 from bitrecs.base.validator import BaseValidatorNeuron
 from bitrecs.commerce.user_action import UserAction
+from bitrecs.commerce.action_store import ACTIONS_DB, UserActionStore, sync_user_actions
 from bitrecs.utils.r2 import ValidatorUploadRequest
-from bitrecs.utils.runtime import execute_periodically
-from bitrecs.utils.uids import get_random_miner_uids2, ping_miner_uid
+from bitrecs.utils.runtime import JobScheduler
+from bitrecs.utils.uids import probe_miner_uids, stake_limit_mask
 from bitrecs.utils.version import LocalMetadata
 from bitrecs.validator import forward
 from bitrecs.protocol import BitrecsRequest
 from bitrecs.utils import constants as CONST
-from bitrecs.utils.r2 import put_r2_upload
+from bitrecs.utils.r2 import R2_FORMAT_NDJSON_GZ_V1, put_r2_upload
+from bitrecs.utils.response_db import response_db_path
+from bitrecs.utils.retention import RetentionPolicy, apply_retention
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -48,8 +52,8 @@ class Validator(BaseValidatorNeuron):
     def __init__(self, config=None):
         super(Validator, self).__init__(config=config)
 
-        self.load_state()
         self.total_request_in_interval = 0
+        self.action_store = None
         if not os.environ.get("BITRECS_PROXY_URL"):
             bt.logging.warning("BITRECS_PROXY_URL environment variable is not set. Proxy functionality will be disabled.")
         else:
@@ -70,11 +74,10 @@ class Validator(BaseValidatorNeuron):
         return await forward(self, pr)
     
      
-    @execute_periodically(timedelta(seconds=CONST.VERSION_CHECK_INTERVAL))
     async def version_sync(self):
         bt.logging.trace(f"Version sync ran at {int(time.time())}")
         try:
-            self.local_metadata = LocalMetadata.local_metadata()
+            self.local_metadata = await LocalMetadata.local_metadata_async()
             self.local_metadata.uid = self.uid
             self.local_metadata.hotkey = self.wallet.hotkey.ss58_address
             local_head = self.local_metadata.head
@@ -91,83 +94,84 @@ class Validator(BaseValidatorNeuron):
         return
     
 
-    @execute_periodically(timedelta(seconds=CONST.MINER_BATTERY_INTERVAL))
     async def miner_sync(self):
+        """
+            Refreshes the active miners. The first run completes startup, even if it found no miners,
+            so the API binds its port.
+        """
+        try:
+            await self.select_active_miners()
+        finally:
+            self.startup_complete.set()
+
+
+    async def select_active_miners(self):
         """
             Checks the miners in the metagraph for connectivity and updates the active miners list.
         """
         bt.logging.trace(f"\033[1;32m Validator miner_sync running {int(time.time())}.\033[0m")
         bt.logging.trace(f"neuron.sample_size: {self.config.neuron.sample_size}")
         bt.logging.trace(f"vpermit_tao_limit: {self.config.neuron.vpermit_tao_limit}")
-        bt.logging.trace(f"block {self.subtensor.block} on step {self.step}")        
+        bt.logging.trace(f"block {self.metagraph.block} on step {self.step}")        
         
         #available_uids = get_random_miner_uids(self, k=self.config.neuron.sample_size, exclude=excluded)
-        available_uids = get_random_miner_uids2(self, k=self.config.neuron.sample_size)
-        available_uids = [123, 124, 211, 125, 151, 148, 148, 130, 134, 153, 212, 118, 104, 155]
-        bt.logging.trace(f"get_random_uids: {available_uids}")
+        stake_limit = float(self.config.neuron.vpermit_tao_limit)
+        eligible = stake_limit_mask(self.metagraph, stake_limit).copy()
+        for uid in (0, self.uid):
+            if uid < len(eligible):
+                eligible[uid] = False
+        eligible_uids = np.flatnonzero(eligible).astype(int).tolist()
+        bt.logging.trace(f"eligible_uids: {eligible_uids}")
         
-        chosen_uids = available_uids
-        bt.logging.trace(f"chosen_uids: {chosen_uids}")
-        if len(chosen_uids) == 0:
+        if len(eligible_uids) == 0:
             bt.logging.error("\033[1;31mNo random qualified miners found - check your connectivity \033[0m")
             return
-        
-        chosen_uids = list(set(chosen_uids))
-        selected_miners = []
-        for uid in chosen_uids:            
-            bt.logging.trace(f"Checking uid: {uid} with stake {self.metagraph.S[uid]} and trust {self.metagraph.T[uid]}")
-            if uid == 0:
-                continue
-            if uid == self.uid:
-                continue
-            if not self.metagraph.axons[uid].is_serving:
-                continue
-            # if self.metagraph.S[uid] == 0:
-            #     bt.logging.trace(f"uid: {uid} stake 0T, skipping")
-            #     continue
-            this_stake = float(self.metagraph.S[uid])
-            stake_limit = float(self.config.neuron.vpermit_tao_limit)
-            if this_stake > stake_limit:
-                bt.logging.trace(f"uid: {uid} has stake {this_stake} > {stake_limit}, skipping")
-                continue
-
-            try:                
-                port = int(self.metagraph.axons[uid].port)
-                if ping_miner_uid(self, uid, port, 3):
-                    bt.logging.trace(f"\033[1;32m ping:{uid}:OK \033[0m")
-                    selected_miners.append(uid)
-                else:
-                    bt.logging.trace(f"\033[1;33m ping:{uid}:FALSE \033[0m")
-            except Exception as e:
-                bt.logging.trace(f"\033[1;33 {e} \033[0m")
-                continue
+
+        # Probe every eligible miner concurrently, then keep the best expected of the reachable ones
+        st = time.perf_counter()
+        rtts = await probe_miner_uids(self, eligible_uids, timeout=3, concurrency=self.config.neuron.probe_concurrency)
+        bt.logging.trace(f"Probed {len(eligible_uids)} miners, {len(rtts)} reachable in {time.perf_counter() - st:.2f}s")
+
+        sample_size = self.config.neuron.sample_size
+        ranked_uids = self.miner_stats.rank(list(rtts.keys()), k=sample_size, 
+                                            epsilon=self.config.neuron.exploration_epsilon, rtts=rtts)
+        selected_miners = ranked_uids[:sample_size]
+        for uid in selected_miners:
+            bt.logging.trace(f"\033[1;32m ping:{uid}:OK {rtts[uid] * 1000:.0f}ms \033[0m")
         if len(selected_miners) == 0:
             self.active_miners = []
             bt.logging.error("\033[31mNo active miners selected in round - check your connectivity \033[0m")
             return
         
-        self.active_miners = list(set(selected_miners))
+        self.active_miners = selected_miners
         bt.logging.info(f"\033[1;32m Active miners: {self.active_miners}  \033[0m")
+        for uid in self.active_miners:
+            stats = self.miner_stats.get(uid)
+            if stats:
+                bt.logging.trace(f"uid {uid} stats: {stats.summary()}")
         
 
-    @execute_periodically(timedelta(seconds=CONST.ACTION_SYNC_INTERVAL))
     async def action_sync(self):
         """
         Periodically fetch user actions 
         For mainnet, we retro 30 days as min end date
+        Only actions since the last sync are downloaded, the rest is loaded from the local store
         """
         #sd, ed = UserAction.get_default_range(days_ago=1)
         sd, ed = UserAction.get_retro_range()
         bt.logging.trace(f"Gathering user actions for range: {sd} to {ed}")
         try:
-            self.user_actions = UserAction.get_actions_range(start_date=sd, end_date=ed)
-            bt.logging.trace(f"Success - User actions size: \033[1;32m {len(self.user_actions)} \033[0m")
+            if self.action_store is None:
+                self.action_store = UserActionStore(os.path.join(self.config.neuron.full_path, ACTIONS_DB))
+                self.user_actions = await asyncio.to_thread(self.action_store.load_index)
+            await asyncio.to_thread(sync_user_actions, self.action_store, self.user_actions, sd, ed)
+            bt.logging.trace(f"Success - User actions size: \033[1;32m {len(self.user_actions)} \033[0m "
+                             f"miners: {len(self.user_actions.totals)}")
         except Exception as e:
             bt.logging.error(f"Failed to get user actions with exception: {e}")
         return
     
     
-    @execute_periodically(timedelta(seconds=CONST.R2_SYNC_INTERVAL))
     async def response_sync(self):
         """
         Periodically sync miner responses to R2
@@ -178,6 +182,9 @@ class Validator(BaseValidatorNeuron):
             bt.logging.trace(f"R2 Sync OFF at {int(time.time())}")        
             bt.logging.warning(f"R2 Sync is OFF set --r2.sync_on to enable")
             return
+        if not self.is_active():
+            bt.logging.trace("Standby instance, R2 sync skipped")
+            return
 
         start_time = time.perf_counter()
         bt.logging.info(f"Starting R2 Sync at {int(time.time())}")
@@ -196,7 +203,8 @@ class Validator(BaseValidatorNeuron):
                 llm_model="ignored"
             )
             bt.logging.trace(f"Sending response sync request: {update_request}")
-            sync_result = put_r2_upload(update_request, keypair)
+            sync_result = await asyncio.to_thread(put_r2_upload, update_request, keypair,
+                                                  self.config.r2.upload_format, self.config.r2.prune_uploaded)
             if sync_result:
                 bt.logging.trace(f"\033[1;32m Success - R2 updated sync_result: {sync_result} \033[0m")
             else:
@@ -208,29 +216,63 @@ class Validator(BaseValidatorNeuron):
             duration = time.perf_counter() - start_time
             bt.logging.info(f"R2 Sync complete in {duration:.2f} seconds")
     
+
+
+    async def retention_sync(self):
+        """
+        Periodically roll up and prune old miner responses, compact the database and remove old wandb runs
+        """
+        if not self.is_active():
+            bt.logging.trace("Standby instance, retention skipped")
+            return
+        policy = RetentionPolicy(
+            max_age_days=self.config.retention.days,
+            max_rows=self.config.retention.max_rows,
+            wandb_runs=self.config.retention.wandb_runs,
+            # Only segment uploads track a watermark, sqlite snapshots upload whatever is kept
+            keep_unuploaded=self.config.r2.sync_on and self.config.r2.upload_format == R2_FORMAT_NDJSON_GZ_V1
+        )
+        start_time = time.perf_counter()
+        try:
+            wandb_dir = os.path.join(os.getcwd(), "wandb") if self.config.wandb.enabled else None
+            result = await asyncio.to_thread(apply_retention, response_db_path(), policy, wandb_dir)
+            bt.logging.info(f"Retention removed {result.deleted} responses, freed {result.freed_pages} pages "
+                            f"in {time.perf_counter() - start_time:.2f} seconds")
+        except Exception as e:
+            bt.logging.error(f"Retention failed with exception: {e}")
     
 
 async def main():
     bt.logging.info(f"\033[32m Starting Bitrecs Validator\033[0m ... {int(time.time())}")    
     with Validator() as validator:
-        start_time = time.time()      
-        while True:
-            tasks = [
-                asyncio.create_task(validator.version_sync()),
-                asyncio.create_task(validator.miner_sync()),
-                # asyncio.create_task(validator.action_sync()),
-                asyncio.create_task(validator.response_sync())
-            ]                    
-            await asyncio.gather(*tasks)
-            
+        start_time = time.time()
+
+        async def heartbeat():
+            nonlocal start_time
             bt.logging.info(f"Validator {validator.uid} running... {int(time.time())}")
             if time.time() - start_time > 300:
                 bt.logging.info(
                     f"---Total request in last 5 minutes: {validator.total_request_in_interval}"
                 )
+                bt.logging.trace(f"Jobs: {scheduler.metrics()}")
                 start_time = time.time()
                 validator.total_request_in_interval = 0
-            await asyncio.sleep(15)
+
+        scheduler = JobScheduler()
+        scheduler.add("version_sync", validator.version_sync, CONST.VERSION_CHECK_INTERVAL, timeout=120)
+        scheduler.add("miner_sync", validator.miner_sync, CONST.MINER_BATTERY_INTERVAL, timeout=120)
+        # scheduler.add("action_sync", validator.action_sync, CONST.ACTION_SYNC_INTERVAL, timeout=1800)
+        scheduler.add("response_sync", validator.response_sync, CONST.R2_SYNC_INTERVAL, timeout=1800)
+        scheduler.add("retention_sync", validator.retention_sync, CONST.RETENTION_INTERVAL, timeout=1800)
+        scheduler.add("heartbeat", heartbeat, 15, jitter=0)
+
+        # pm2 stop/delete sends SIGINT: leave the with block so the API drains and state is saved.
+        # The auto-updater sends SIGUSR1 before starting a standby so it loads the latest scores.
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, scheduler.stop, True)
+        loop.add_signal_handler(signal.SIGUSR1, lambda: loop.run_in_executor(None, validator.save_state, True))
+        await scheduler.run()
 
 if __name__ == "__main__": 
     asyncio.run(main())
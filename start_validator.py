@@ -35,6 +35,13 @@ validator within virtual environment, run this auto-update script from the virtu
 
 This script will start a PM2 process using the name provided by the --pm2_name argument.
 
+Updates are zero downtime: the new version starts as a standby next to the old one under the
+alternate name (<pm2_name>_b) and binds the shared API port only once it is ready. As soon as its
+/ready endpoint answers, the old process is stopped and drains its in-flight requests. Until then
+only the old process sets weights, saves state, uploads and runs retention. If the standby is not
+ready in time it is removed, the old process keeps running and the update is retried on the next
+check. When the updater restarts it adopts whichever of the two names pm2 reports online.
+
 You should 'pm2 save' and reboot to make sure all processes are restarted on reboot
 
 """
@@ -50,9 +57,9 @@ import subprocess
 import requests
 import random
 from shlex import split
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from bitrecs.utils import constants as CONST
-from bitrecs.utils.version import LocalMetadata
+from bitrecs.utils.version import read_git_head
 from bitrecs import __version__ as this_version
 from dotenv import load_dotenv
 load_dotenv()
@@ -62,9 +69,9 @@ log = logging.getLogger(__name__)
 BITRECS_PROXY_URL = os.environ.get("BITRECS_PROXY_URL")
 if BITRECS_PROXY_URL:
     BITRECS_PROXY_URL = BITRECS_PROXY_URL.removesuffix("/")
-    bt.logging.info("BITRECS_PROXY_URL is set. Proxy functionality is enabled.")
+    log.info("BITRECS_PROXY_URL is set. Proxy functionality is enabled.")
 else:
-    bt.logging.warning("BITRECS_PROXY_URL environment variable is not set. Proxy functionality will be disabled.")
+    log.warning("BITRECS_PROXY_URL environment variable is not set. Proxy functionality will be disabled.")
 NETWORK = os.environ.get("NETWORK", "").strip().lower()
 
 
@@ -89,8 +96,8 @@ def read_node_info() -> Dict[str, Any]:
 
 
 def get_version() -> str:
-    v = LocalMetadata.local_metadata()
-    return v.head
+    head = read_git_head()
+    return head[:16] if head else "head error"
 
 
 def start_validator_process(pm2_name: str, args: List[str], current_version: str = "0") -> subprocess.Popen:
@@ -102,6 +109,7 @@ def start_validator_process(pm2_name: str, args: List[str], current_version: str
     assert sys.executable, "Failed to get python executable"
 
     log.info("Starting validator process with pm2, name: %s", pm2_name)
+    kill_timeout_ms = (CONST.API_DRAIN_TIMEOUT + 30) * 1000
     process = subprocess.Popen(
         (
             "pm2",
@@ -109,12 +117,15 @@ def start_validator_process(pm2_name: str, args: List[str], current_version: str
             sys.executable,
             "--name",
             pm2_name,
+            "--kill-timeout",
+            str(kill_timeout_ms),
             "--",
             "-m",
             "neurons.validator",
             *args,
         ),
         cwd=CONST.ROOT_DIR,
+        env={**os.environ, "BITRECS_INSTANCE": pm2_name},
     )
     process.pm2_name = pm2_name
     log.info("Started validator process with pm2, name: %s, version: %s", pm2_name, current_version)
@@ -122,6 +133,32 @@ def start_validator_process(pm2_name: str, args: List[str], current_version: str
     return process
 
 
+class AdoptedProcess:
+    """A validator already running under pm2 when the updater started, only its name is known"""
+
+    def __init__(self, pm2_name: str):
+        self.pm2_name = pm2_name
+
+
+def find_running_validator(pm2_name: str) -> Optional[str]:
+    """
+    Which of pm2_name and its standby name pm2 reports online. If a handover was interrupted and
+    both are up, the older one is the instance that was serving.
+    """
+    names = (pm2_name, standby_name(pm2_name, pm2_name))
+    try:
+        result = subprocess.run(("pm2", "jlist"), cwd=CONST.ROOT_DIR, capture_output=True, check=True)
+        processes = json.loads(result.stdout)
+    except (subprocess.CalledProcessError, OSError, ValueError) as exc:
+        log.warning("Could not list pm2 processes: %s", exc)
+        return None
+    online = [p for p in processes
+              if p.get("name") in names and p.get("pm2_env", {}).get("status") == "online"]
+    if not online:
+        return None
+    return min(online, key=lambda p: p.get("pm2_env", {}).get("pm_uptime", 0))["name"]
+
+
 
 def post_node_report(payload: Dict[str, Any]) -> bool:
     """Send node info"""
@@ -142,7 +179,7 @@ def post_node_report(payload: Dict[str, Any]) -> bool:
     log.info(f"Sending node report with payload: {post_data}")
 
     if not BITRECS_PROXY_URL:
-        bt.logging.warning("BITRECS_PROXY_URL is not set. Skipping node report.")
+        log.warning("BITRECS_PROXY_URL is not set. Skipping node report.")
         return False
         
     node_report_endpoint = f"{BITRECS_PROXY_URL}/node/report"
@@ -167,10 +204,62 @@ def post_node_report(payload: Dict[str, Any]) -> bool:
 
 
 def stop_validator_process(process: subprocess.Popen) -> None:
-    """Stop the validator process"""
+    """Stop the validator process, pm2 waits up to --kill-timeout for it to drain"""
     subprocess.run(("pm2", "delete", process.pm2_name), cwd=CONST.ROOT_DIR, check=True)
 
 
+def save_validator_state(process: subprocess.Popen) -> None:
+    """Ask the running validator to write its state now, so a standby starts from the latest scores"""
+    result = subprocess.run(("pm2", "sendSignal", "SIGUSR1", process.pm2_name), cwd=CONST.ROOT_DIR)
+    if result.returncode != 0:
+        log.warning("Could not signal %s to save state", process.pm2_name)
+
+
+def standby_name(pm2_name: str, current: str) -> str:
+    """Alternate between pm2_name and pm2_name_b so old and new can run side by side"""
+    return f"{pm2_name}_b" if current == pm2_name else pm2_name
+
+
+def wait_until_ready(instance: str, timeout: float = CONST.VALIDATOR_READY_TIMEOUT, interval: float = 5,
+                     url: str = f"http://127.0.0.1:{CONST.VALIDATOR_API_PORT}/ready") -> bool:
+    """
+    Poll /ready until the given instance answers ready. Old and new validator share the port,
+    so answers from the other instance are skipped.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = requests.get(url, timeout=5)
+            body = response.json()
+            if response.status_code == 200 and body.get("ready") and body.get("instance") == instance:
+                return True
+        except Exception as e:
+            log.debug("Readiness check failed: %s", e)
+        time.sleep(interval)
+    return False
+
+
+def handover(validator: subprocess.Popen, pm2_name: str, args: List[str], current_version: str) -> subprocess.Popen:
+    """
+    Start the new version next to the running one and stop the old one only once the new one is
+    ready. Returns the process that is serving afterwards.
+    """
+    save_validator_state(validator)
+    standby = start_validator_process(standby_name(pm2_name, validator.pm2_name), args, current_version)
+    if wait_until_ready(standby.pm2_name):
+        log.info("Standby %s is ready, stopping %s", standby.pm2_name, validator.pm2_name)
+        stop_validator_process(validator)
+        return standby
+
+    log.error("Standby %s not ready after %ss, keeping %s", standby.pm2_name, CONST.VALIDATOR_READY_TIMEOUT, validator.pm2_name)
+    post_node_report({"error": "standby not ready", "message": f"Kept {validator.pm2_name} running"})
+    try:
+        stop_validator_process(standby)
+    except subprocess.CalledProcessError as exc:
+        log.error("Failed to remove standby %s: %s", standby.pm2_name, exc)
+    return validator
+
+
 def pull_latest_version() -> None:
     """
     Pull the latest version from git.
@@ -213,7 +302,18 @@ def main(pm2_name: str, args: List[str]) -> None:
     if a new version is available. Update is performed as simple `git pull --rebase`.
     """
 
-    validator = start_validator_process(pm2_name, args)
+    # After a handover the live validator may run as <pm2_name>_b, adopt it instead of restarting.
+    # Any other instance is a leftover of an interrupted handover and would hold the API port.
+    running = find_running_validator(pm2_name)
+    for name in (pm2_name, standby_name(pm2_name, pm2_name)):
+        if name != running:
+            subprocess.run(("pm2", "delete", name), cwd=CONST.ROOT_DIR,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if running:
+        log.info("Adopting running validator process, name: %s", running)
+        validator = AdoptedProcess(running)
+    else:
+        validator = start_validator_process(pm2_name, args)
     current_version = get_version()
 
     log.info("Current version: %s", current_version)
@@ -239,10 +339,10 @@ def main(pm2_name: str, args: List[str]) -> None:
                     latest_version,
                 )
                 upgrade_packages()
-                current_version = get_version()
+                installed_version = get_version()
                 payload = {}
                 try:
-                    payload["current_version"] = str(current_version)
+                    payload["current_version"] = str(installed_version)
                     payload["latest_version"] = str(latest_version)
                     payload["time"] = str(datetime.datetime.now(datetime.timezone.utc))
                     payload["message"] = "end_validator_check_update"
@@ -251,9 +351,15 @@ def main(pm2_name: str, args: List[str]) -> None:
                     payload["error"] = str(e)
                 finally:
                     post_node_report(payload)
-                stop_validator_process(validator)
-                validator = start_validator_process(pm2_name, args, current_version)
-                current_version = latest_version
+                serving = handover(validator, pm2_name, args, installed_version)
+                if serving.pm2_name != validator.pm2_name:
+                    validator = serving
+                    current_version = latest_version
+                else:
+                    # Still on the old version, the next check retries the handover
+                    log.error("Handover to %s failed, %s keeps running %s", latest_version, validator.pm2_name, current_version)
+                    post_node_report({"error": "handover failed", "current_version": str(current_version),
+                                      "latest_version": str(latest_version)})
 
             #sleep = random.choice([60, 90, 120, 150, 180, 240, 300])            
             sleep = random.randint(300, 600)
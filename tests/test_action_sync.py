@@ -0,0 +1,124 @@
+import json
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bitrecs.commerce.action_store import UserActionStore, iter_json_array, sync_user_actions
+from bitrecs.commerce.user_action import ActionType, UserActionIndex
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_actions(days: int = 10, per_hour: int = 20) -> list:
+    names = [a.name for a in ActionType]
+    actions = []
+    base = int(START.timestamp())
+    for hour in range(days * 24):
+        for i in range(per_hour):
+            ts = base + hour * 3600 + i * 60
+            actions.append({
+                "ip": "127.0.0.1",
+                "site_info": "shop",
+                "user": f"user{i}",
+                "action": names[i % 3],
+                "sku": f"SKU-{hour}-{i}",
+                "hot_key": f"hk{i % 7}",
+                "created_at": datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+                "ts": ts
+            })
+    return actions
+
+
+class StandInProxy:
+    """Serves /miner/stats/from/{from}/to/{to} in small chunks, inclusive on both ends like the proxy"""
+
+    def __init__(self, actions: list):
+        self.actions = actions
+        self.requests = []
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = self.path.strip("/").split("/")
+                dt_from, dt_to = int(parts[3]), int(parts[5])
+                proxy.requests.append((dt_from, dt_to))
+                body = json.dumps([a for a in proxy.actions if dt_from <= a["ts"] <= dt_to]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                for i in range(0, len(body), 1000):
+                    self.wfile.write(body[i:i + 1000])
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+def test_iter_json_array_chunks():
+    items = [{"a": i, "s": "x,]}" * i} for i in range(50)]
+    body = json.dumps(items, indent=1)
+    for size in (1, 7, 4096):
+        assert list(iter_json_array(body[i:i + size] for i in range(0, len(body), size))) == items
+    assert list(iter_json_array([" [ ", " ] "])) == []
+
+
+def test_incremental_sync(tmp_path, monkeypatch):
+    actions = make_actions()
+    proxy = StandInProxy(actions)
+    monkeypatch.setenv("BITRECS_PROXY_URL", proxy.url + "/")
+    db_path = str(tmp_path / "user_actions.db")
+    try:
+        store = UserActionStore(db_path)
+        index = UserActionIndex()
+        end = datetime(2025, 1, 6, tzinfo=timezone.utc)
+        added = sync_user_actions(store, index, START, end)
+        assert added == 5 * 24 * 20 + 1
+        assert len(proxy.requests) == 20
+        assert all(b - a <= 6 * 3600 for a, b in proxy.requests)
+
+        proxy.requests.clear()
+        assert sync_user_actions(store, index, START, end) == 0
+        assert proxy.requests == []
+
+        end = datetime(2025, 1, 8, tzinfo=timezone.utc)
+        assert sync_user_actions(store, index, datetime(2025, 1, 3, tzinfo=timezone.utc), end) == 2 * 24 * 20
+        assert proxy.requests[0][0] == int(datetime(2025, 1, 6, tzinfo=timezone.utc).timestamp())
+        store.close()
+
+        expected = UserActionIndex.from_actions(a for a in actions if "2025-01-03" <= a["created_at"][:10] and a["ts"] <= int(end.timestamp()))
+        assert len(index) == len(expected)
+        assert index.totals == expected.totals
+
+        reopened = UserActionStore(db_path)
+        assert reopened.load_index().totals == expected.totals
+        assert reopened.synced_to() == int(end.timestamp())
+        reopened.close()
+    finally:
+        proxy.close()
+
+
+def test_actions_without_sku_or_user_are_deduped(tmp_path):
+    db_path = str(tmp_path / "user_actions.db")
+    legacy = UserActionStore(db_path)
+    legacy.conn.execute("INSERT INTO user_actions (hot_key, action, sku, user, created_at, day) "
+                        "VALUES ('hk1', 'VIEW_PRODUCT', NULL, NULL, '2025-01-01T00:00:00', '2025-01-01')")
+    legacy.conn.execute("INSERT INTO user_actions (hot_key, action, sku, user, created_at, day) "
+                        "VALUES ('hk1', 'VIEW_PRODUCT', '', NULL, '2025-01-01T00:00:00', '2025-01-01')")
+    legacy.conn.commit()
+    legacy.close()
+
+    store = UserActionStore(db_path)
+    try:
+        assert store.conn.execute("SELECT sku, user FROM user_actions").fetchall() == [("", "")]
+        action = {"hot_key": "hk1", "action": "VIEW_PRODUCT", "created_at": "2025-01-01T00:00:00"}
+        assert store.add([action, dict(action, sku=None)]) == 0
+        assert store.add([dict(action, user="u1"), dict(action, user="u1")]) == 1
+        assert store.conn.execute("SELECT COUNT(*) FROM user_actions").fetchone()[0] == 2
+    finally:
+        store.close()
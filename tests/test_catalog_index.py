@@ -0,0 +1,89 @@
+import json
+import time
+from dataclasses import asdict
+from bitrecs.commerce.product import CatalogProvider, ProductFactory
+from bitrecs.llms.prompt_factory import PromptFactory
+from bitrecs.commerce.catalog_index import (
+    CatalogIndex,
+    catalog_hash,
+    embed_texts,
+    get_catalog_index,
+    shortlist_context
+)
+from bitrecs.utils.misc import ttl_cache
+
+
+@ttl_cache(ttl=900)
+def woo_context() -> str:
+    woo_catalog = "./tests/data/woocommerce/product_catalog.csv"
+    catalog = ProductFactory.tryload_catalog_to_json(CatalogProvider.WOOCOMMERCE, woo_catalog)
+    products = ProductFactory.convert(catalog, CatalogProvider.WOOCOMMERCE)
+    return json.dumps([asdict(p) for p in products], separators=(',', ':'))
+
+
+def test_embed_texts_normalized():
+    vectors = embed_texts(["Abominable Hoodie", "Abominable Hoodies", "Sprite Foam Roller", ""])
+    assert vectors.shape[0] == 4
+    norms = (vectors ** 2).sum(axis=1)
+    assert abs(norms[0] - 1.0) < 1e-5
+    assert norms[3] == 0.0
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+
+def test_catalog_index_top_k_keeps_query():
+    products = ProductFactory.try_parse_context_strict(woo_context())
+    index = CatalogIndex(products)
+    query = products[10].sku
+    st = time.perf_counter()
+    candidates = index.top_k(query, 50)
+    et = time.perf_counter()
+    print(f"top_k over {len(index)} products in {et - st:.6f}s")
+    assert len(candidates) == 51
+    assert query in [p.sku for p in candidates]
+    assert index.top_k("NOT-A-REAL-SKU", 50) is None
+
+
+def test_get_catalog_index_cached():
+    context = woo_context()
+    first = get_catalog_index(context)
+    second = get_catalog_index(context)
+    assert first is second
+    assert len(catalog_hash(context)) == 64
+
+
+def test_shortlist_context():
+    context = woo_context()
+    products = ProductFactory.try_parse_context_strict(context)
+    query = products[0].sku
+    shortlist = shortlist_context(query, context, 20)
+    shortlisted = json.loads(shortlist)
+    assert len(shortlisted) == 21
+    assert len(shortlist) < len(context)
+    assert shortlist_context(query, context, 0) == context
+    assert len(json.loads(shortlist_context(query, context, 3, num_recs=10))) == 11
+    assert shortlist_context("NOT-A-REAL-SKU", context, 20) == context
+
+
+def test_normalize_llm_results_drops_invalid_skus():
+    context = woo_context()
+    products = ProductFactory.try_parse_context_strict(context)
+    index = get_catalog_index(context)
+    query = products[0].sku
+    parsed = [
+        {"sku": products[1].sku.lower(), "name": "Good & <Item>", "price": "10", "reason": "Nice, really!"},
+        {"sku": "HALLUCINATED-123", "name": "Fake", "price": "1", "reason": "made up"},
+        {"sku": query, "name": "Query item", "price": "1", "reason": "same as query"},
+        {"sku": products[1].sku, "name": "Duplicate", "price": "10", "reason": "dupe"},
+        {"name": "No sku", "price": "1"},
+        json.dumps({"sku": products[2].sku, "name": products[2].name, "price": "5", "reason": "ok"}),
+    ]
+    results = PromptFactory.normalize_llm_results(parsed, catalog=index, query=query, num_recs=5)
+    assert len(results) == 2
+    first = json.loads(results[0])
+    assert first["sku"] == products[1].sku
+    assert first["name"] == "Good  Item"
+    assert first["reason"] == "Nice really"
+    assert json.loads(results[1])["sku"] == products[2].sku
+
+    capped = PromptFactory.normalize_llm_results(parsed, catalog=index, query=query, num_recs=1)
+    assert len(capped) == 1
@@ -0,0 +1,86 @@
+import time
+import asyncio
+import threading
+import numpy as np
+from types import SimpleNamespace
+from bitrecs.base.utils.metagraph_utils import MetagraphSnapshot
+from bitrecs.base.validator import BaseValidatorNeuron
+from bitrecs.validator.miner_stats import MinerStatsStore
+from tests.test_metagraph_diff import make_metagraph
+
+
+def make_validator(metagraph) -> SimpleNamespace:
+    metagraph.n = len(metagraph.hotkeys)
+    snapshot = MetagraphSnapshot.capture(metagraph)
+    return SimpleNamespace(
+        should_exit=False,
+        chain_sync_requested=threading.Event(),
+        scores_lock=threading.Lock(),
+        scores=np.ones(metagraph.n, dtype=np.float32),
+        metagraph=metagraph,
+        metagraph_snapshot=snapshot,
+        hotkeys=list(snapshot.hotkeys),
+        miner_stats=MinerStatsStore(),
+        config=SimpleNamespace(netuid=1)
+    )
+
+
+def test_chain_sync_runs_off_the_event_loop():
+    validator = make_validator(make_metagraph(4))
+    synced = []
+
+    def slow_sync():
+        # Blocking chain I/O, e.g. set_weights waiting for inclusion
+        synced.append(threading.get_ident())
+        time.sleep(0.5)
+
+    validator.sync = slow_sync
+    worker = threading.Thread(target=BaseValidatorNeuron.chain_worker, args=(validator,), daemon=True)
+    worker.start()
+
+    async def main_loop():
+        validator.chain_sync_requested.set()
+        gaps = []
+        last = time.perf_counter()
+        end = last + 0.6
+        while time.perf_counter() < end:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+        return threading.get_ident(), max(gaps)
+
+    loop_thread, max_gap = asyncio.run(main_loop())
+    validator.should_exit = True
+    validator.chain_sync_requested.set()
+    worker.join(2)
+
+    assert not worker.is_alive()
+    assert len(synced) == 1 and synced[0] != loop_thread
+    assert max_gap < 0.1
+
+
+def test_resync_swaps_metagraph_and_scores_under_lock():
+    validator = make_validator(make_metagraph(4))
+    old_metagraph = validator.metagraph
+    new_metagraph = make_metagraph(6)
+    new_metagraph.n = 6
+    new_metagraph.hotkeys[2] = "new_hotkey"
+    validator.subtensor = SimpleNamespace(metagraph=lambda netuid: new_metagraph)
+
+    validator.scores_lock.acquire()
+    resync = threading.Thread(target=BaseValidatorNeuron.resync_metagraph, args=(validator,))
+    resync.start()
+    time.sleep(0.1)
+    try:
+        # Nothing is swapped while another thread holds the scores
+        assert validator.metagraph is old_metagraph
+        assert len(validator.scores) == 4
+    finally:
+        validator.scores_lock.release()
+    resync.join(2)
+
+    assert validator.metagraph is new_metagraph
+    assert len(validator.scores) == new_metagraph.n
+    assert validator.scores.tolist() == [1, 1, 0, 1, 0, 0]
+    assert validator.hotkeys == new_metagraph.hotkeys
@@ -0,0 +1,187 @@
+import json
+import time
+import socket
+import threading
+import pytest
+import requests
+import numpy as np
+from fastapi import FastAPI
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from uvicorn import Config, Server
+import start_validator
+from bitrecs.api.api_server import ApiServer, bind_api_socket
+from bitrecs.base.validator import BaseValidatorNeuron
+from bitrecs.validator.active_lock import ACTIVE_LOCK_FILE, ActiveLock
+from bitrecs.validator.miner_stats import MinerStatsStore
+
+
+class StandInReady:
+    """Answers /ready for two instances sharing a port, the standby turns ready after a few polls"""
+
+    def __init__(self, ready_after: int):
+        self.polls = 0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.polls += 1
+                if stand_in.polls % 2:
+                    status, body = 200, {"ready": True, "instance": "sn122val"}
+                else:
+                    ready = stand_in.polls >= ready_after
+                    status, body = (200 if ready else 503), {"ready": ready, "instance": "sn122val_b"}
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/ready"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+def test_api_socket_shared_between_instances():
+    old = bind_api_socket("127.0.0.1", 0)
+    port = old.getsockname()[1]
+    new = bind_api_socket("127.0.0.1", port)
+    try:
+        old.listen()
+        new.listen()
+        old.close()
+        with socket.create_connection(("127.0.0.1", port), timeout=2):
+            conn, _ = new.accept()
+            conn.close()
+    finally:
+        new.close()
+
+
+def test_wait_until_ready_skips_other_instance():
+    stand_in = StandInReady(ready_after=6)
+    try:
+        assert start_validator.wait_until_ready("sn122val_b", timeout=5, interval=0, url=stand_in.url)
+        assert stand_in.polls == 6
+        assert not start_validator.wait_until_ready("sn122val_c", timeout=0.2, interval=0.05, url=stand_in.url)
+    finally:
+        stand_in.close()
+
+
+def test_handover_and_rollback(monkeypatch):
+    calls = []
+
+    class Process:
+        def __init__(self, name):
+            self.pm2_name = name
+
+    monkeypatch.setattr(start_validator, "save_validator_state", lambda p: calls.append(("save", p.pm2_name)))
+    monkeypatch.setattr(start_validator, "start_validator_process", lambda name, args, v: calls.append(("start", name)) or Process(name))
+    monkeypatch.setattr(start_validator, "stop_validator_process", lambda p: calls.append(("stop", p.pm2_name)))
+    monkeypatch.setattr(start_validator, "post_node_report", lambda payload: None)
+
+    monkeypatch.setattr(start_validator, "wait_until_ready", lambda name: True)
+    serving = start_validator.handover(Process("sn122val"), "sn122val", [], "v2")
+    assert serving.pm2_name == "sn122val_b"
+    assert calls == [("save", "sn122val"), ("start", "sn122val_b"), ("stop", "sn122val")]
+
+    calls.clear()
+    serving = start_validator.handover(serving, "sn122val", [], "v3")
+    assert serving.pm2_name == "sn122val"
+
+    calls.clear()
+    monkeypatch.setattr(start_validator, "wait_until_ready", lambda name: False)
+    old = Process("sn122val")
+    assert start_validator.handover(old, "sn122val", [], "v4") is old
+    assert calls == [("save", "sn122val"), ("start", "sn122val_b"), ("stop", "sn122val_b")]
+
+
+def test_active_lock_single_owner(tmp_path):
+    path = str(tmp_path / ACTIVE_LOCK_FILE)
+    old, standby = ActiveLock(path), ActiveLock(path)
+    assert old.acquire()
+    assert not standby.acquire() and not standby.held
+    assert old.acquire()
+    old.release()
+    assert standby.acquire() and standby.held
+    standby.release()
+
+
+def test_standby_skips_state_and_weights(tmp_path):
+    path = str(tmp_path / ACTIVE_LOCK_FILE)
+    owner = ActiveLock(path)
+    assert owner.acquire()
+    saved = []
+    standby = SimpleNamespace(active_lock=ActiveLock(path), scores_lock=threading.Lock(),
+                              state_store=SimpleNamespace(save=lambda state, force: saved.append(state) or True),
+                              scores=np.ones(2), step=3, hotkeys=["a", "b"], miner_stats=MinerStatsStore(),
+                              state_loaded=True)
+    standby.is_active = lambda: BaseValidatorNeuron.is_active(standby)
+
+    BaseValidatorNeuron.save_state(standby, force=True)
+    BaseValidatorNeuron.set_weights(standby)
+    assert saved == []
+
+    owner.release()
+    BaseValidatorNeuron.save_state(standby, force=True)
+    assert len(saved) == 1 and saved[0].step == 3
+    standby.active_lock.release()
+
+
+def test_api_binds_after_startup_without_miners():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    app = FastAPI()
+    app.get("/ping")(lambda: {"detail": "pong"})
+    server = ApiServer.__new__(ApiServer)
+    server.validator = SimpleNamespace(startup_complete=threading.Event(), is_running=True, should_exit=False,
+                                       active_miners=[])
+    server.config = Config(app=app, host="127.0.0.1", port=port, log_level="critical", timeout_graceful_shutdown=1)
+    server.server = Server(config=server.config)
+    server._server_thread = None
+    server._stop_event = threading.Event()
+
+    server.start()
+    try:
+        time.sleep(1.5)
+        with pytest.raises(ConnectionRefusedError):
+            socket.create_connection(("127.0.0.1", port), timeout=1)
+
+        # Zero active miners, the port is bound once startup completed so /ping and /ready answer
+        server.validator.startup_complete.set()
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                assert requests.get(f"http://127.0.0.1:{port}/ping", timeout=1).json() == {"detail": "pong"}
+                break
+            except requests.ConnectionError:
+                assert time.monotonic() < deadline
+                time.sleep(0.1)
+    finally:
+        server.stop()
+
+
+def test_find_running_validator(monkeypatch):
+    processes = [
+        {"name": "sn122val", "pm2_env": {"status": "stopped", "pm_uptime": 1}},
+        {"name": "sn122val_b", "pm2_env": {"status": "online", "pm_uptime": 2}},
+        {"name": "other", "pm2_env": {"status": "online", "pm_uptime": 0}},
+    ]
+    monkeypatch.setattr(start_validator.subprocess, "run",
+                        lambda *a, **k: SimpleNamespace(stdout=json.dumps(processes).encode()))
+    # After a handover the live validator runs under the standby name
+    assert start_validator.find_running_validator("sn122val") == "sn122val_b"
+
+    # Interrupted handover, both are up and the older one was serving
+    processes[0]["pm2_env"]["status"] = "online"
+    assert start_validator.find_running_validator("sn122val") == "sn122val"
+
+    processes[:2] = []
+    assert start_validator.find_running_validator("sn122val") is None
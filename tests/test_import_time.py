@@ -0,0 +1,54 @@
+import os
+import sys
+import pytest
+import subprocess
+from bitrecs.utils import constants as CONST
+
+HEAVY_MODULES = ("pandas", "openai", "jsonschema", "wandb", "tiktoken")
+
+# Import time of each entry point on top of bittensor itself, in seconds
+IMPORT_BUDGETS = {
+    "bitrecs.protocol": 0.15,
+    "bitrecs.commerce.product": 0.15,
+    "bitrecs.llms.factory": 0.15,
+    "bitrecs.validator.reward": 0.15,
+    "bitrecs.base.validator": 0.6,
+}
+
+
+def import_times(module: str) -> dict:
+    """
+    Cumulative import time in seconds per top level module from python -X importtime.
+    bittensor is imported first so everything under bitrecs is what the module adds on top.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import bittensor; import {module}"],
+        capture_output=True, text=True, cwd=CONST.ROOT_DIR, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.rstrip()[1:]
+        if name.startswith(" "):
+            continue
+        times[name] = times.get(name, 0) + int(cumulative) / 1e6
+    return times
+
+
+def test_entry_points_skip_heavy_imports():
+    for module in IMPORT_BUDGETS:
+        code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=CONST.ROOT_DIR, check=True).stdout.strip().splitlines()[-1:]
+        assert loaded in ([], [""]), f"{module} imports {loaded}"
+
+
+@pytest.mark.skipif(not os.getenv("BITRECS_IMPORT_BUDGETS"), reason="wall clock budgets, set BITRECS_IMPORT_BUDGETS=1 to check")
+def test_import_time_budget():
+    for module, budget in IMPORT_BUDGETS.items():
+        times = import_times(module)
+        overhead = sum(t for name, t in times.items() if name.split(".")[0] in ("bitrecs", "neurons"))
+        slowest = sorted(times.items(), key=lambda kv: kv[1], reverse=True)[:5]
+        assert overhead < budget, f"{module} import overhead {overhead:.3f}s over budget {budget}s, slowest {slowest}"
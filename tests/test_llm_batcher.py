@@ -0,0 +1,126 @@
+import time
+import asyncio
+import threading
+import pytest
+from bitrecs.llms.factory import LLM, LLMFactory
+from bitrecs.llms.batcher import LLMBatcher
+
+
+class FakeServer:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def query_llm(self, server, model, system_prompt="", temp=0.0, user_prompt=""):
+        with self.lock:
+            self.calls.append(user_prompt)
+        time.sleep(self.delay)
+        if user_prompt == "boom":
+            raise RuntimeError("server error")
+        return f"{model}:{user_prompt}"
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    server = FakeServer()
+    monkeypatch.setattr(LLMFactory, "query_llm", server.query_llm)
+    return server
+
+
+def test_batcher_dedupes_identical_prompts(fake_server):
+    batcher = LLMBatcher(server=LLM.VLLM, window_ms=50, max_batch_size=8)
+
+    async def run():
+        prompts = ["a", "a", "b", "a", "c"]
+        return await asyncio.gather(*[
+            batcher.submit(model="m", system_prompt="s", temp=0.0, user_prompt=p) for p in prompts
+        ])
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        batcher.stop()
+    assert results == ["m:a", "m:a", "m:b", "m:a", "m:c"]
+    assert sorted(fake_server.calls) == ["a", "b", "c"]
+
+
+def test_batcher_runs_sequences_in_parallel(fake_server):
+    fake_server.delay = 0.2
+    batcher = LLMBatcher(server=LLM.OLLAMA_LOCAL, window_ms=20, max_batch_size=4)
+
+    async def run():
+        return await asyncio.gather(*[
+            batcher.submit(model="m", system_prompt="s", temp=0.0, user_prompt=str(i)) for i in range(4)
+        ])
+
+    st = time.perf_counter()
+    try:
+        results = asyncio.run(run())
+    finally:
+        batcher.stop()
+    et = time.perf_counter()
+    assert results == [f"m:{i}" for i in range(4)]
+    assert et - st < 0.6
+
+
+def test_batcher_propagates_errors(fake_server):
+    batcher = LLMBatcher(server=LLM.VLLM, window_ms=10)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit(model="m", system_prompt="s", temp=0.0, user_prompt="boom"),
+            batcher.submit(model="m", system_prompt="s", temp=0.0, user_prompt="ok"),
+            return_exceptions=True
+        )
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        batcher.stop()
+    assert isinstance(results[0], RuntimeError)
+    assert results[1] == "m:ok"
+
+
+def test_batcher_rejects_bad_window():
+    with pytest.raises(ValueError):
+        LLMBatcher(server=LLM.VLLM, window_ms=0)
+
+
+def test_batcher_cancelled_caller_does_not_block_group(fake_server):
+    fake_server.delay = 0.2
+    batcher = LLMBatcher(server=LLM.VLLM, window_ms=50, max_batch_size=8)
+
+    async def run():
+        tasks = [asyncio.create_task(
+            batcher.submit(model="m", system_prompt="s", temp=0.0, user_prompt="a")) for _ in range(3)]
+        await asyncio.sleep(0.1)
+        tasks[0].cancel()
+        return await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=2)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        batcher.stop()
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1:] == ["m:a", "m:a"]
+    assert fake_server.calls == ["a"]
+
+
+def test_batcher_stop_fails_pending_requests(fake_server):
+    fake_server.delay = 1.0
+    batcher = LLMBatcher(server=LLM.VLLM, window_ms=10, max_batch_size=1)
+
+    async def run():
+        tasks = [asyncio.create_task(
+            batcher.submit(model="m", system_prompt="s", temp=0.0, user_prompt=str(i))) for i in range(4)]
+        await asyncio.sleep(0.1)
+        await asyncio.get_running_loop().run_in_executor(None, batcher.stop)
+        return await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=2)
+
+    results = asyncio.run(run())
+    # The prompt already running finishes, queued and not yet started prompts fail instead of hanging
+    assert results[0] == "m:0"
+    assert all(isinstance(r, RuntimeError) for r in results[1:])
+    with pytest.raises(RuntimeError):
+        asyncio.run(batcher.submit(model="m", system_prompt="s", temp=0.0, user_prompt="late"))
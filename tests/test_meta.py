@@ -53,4 +53,57 @@ def test_version_spec_returns_ok():
     assert isinstance(s, str)   
     assert len(s) > 0
     print(f"Spec: {s}")
-    
\ No newline at end of file
+    
+
+def test_read_git_head_matches_rev_parse():
+    import time
+    import subprocess
+    from bitrecs.utils import constants as CONST
+    from bitrecs.utils.version import read_git_head
+    expected = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, cwd=CONST.ROOT_DIR).stdout.decode().strip()
+    st = time.perf_counter()
+    head = read_git_head()
+    print(f"read_git_head {head} in {(time.perf_counter() - st) * 1e6:.0f}us")
+    assert head == expected
+
+
+def test_remote_head_cache_ttl(monkeypatch):
+    import time
+    import asyncio
+    from bitrecs.utils import version as version_module
+    calls = []
+
+    def fake_run(*args, **kwargs):
+        calls.append(args)
+        return type("Result", (), {"stdout": b"a" * 40 + b"\trefs/heads/main\n"})()
+
+    monkeypatch.setattr(version_module.subprocess, "run", fake_run)
+    cache = version_module.RemoteHeadCache(ttl=60)
+    # The first get seeds the cache with a blocking lookup instead of returning None
+    assert cache.get() == "a" * 40
+    assert cache.get() == "a" * 40
+    assert cache.refresh_thread is None
+    assert len(calls) == 1
+
+    cache.expires_at = 0
+    async def fake_exec(*args, **kwargs):
+        class Process:
+            returncode = 0
+            async def communicate(self):
+                return b"b" * 40 + b"\trefs/heads/main\n", b""
+        return Process()
+    monkeypatch.setattr(version_module.asyncio, "create_subprocess_exec", fake_exec)
+    assert asyncio.run(cache.refresh_async()) == "b" * 40
+    assert not cache.stale()
+
+    cache.expires_at = 0
+    def failing_run(*args, **kwargs):
+        time.sleep(0.5)
+        raise version_module.subprocess.CalledProcessError(128, "git")
+    monkeypatch.setattr(version_module.subprocess, "run", failing_run)
+    st = time.perf_counter()
+    assert cache.get() == "b" * 40
+    assert time.perf_counter() - st < 0.1
+    cache.refresh_thread.join(2)
+    assert cache.get() == "b" * 40
+    assert not cache.stale()
@@ -0,0 +1,34 @@
+import copy
+import time
+import bittensor as bt
+from types import SimpleNamespace
+from bitrecs.base.utils.metagraph_utils import MetagraphSnapshot, diff_snapshots
+
+
+def make_metagraph(n: int):
+    hotkeys = [f"hk{i}" for i in range(n)]
+    axons = [bt.AxonInfo(version=1, ip=f"10.0.{i // 256}.{i % 256}", port=8091, ip_type=4,
+                         hotkey=hotkeys[i], coldkey=f"ck{i}") for i in range(n)]
+    return SimpleNamespace(hotkeys=hotkeys, axons=axons)
+
+
+def test_snapshot_diff():
+    metagraph = make_metagraph(256)
+    st = time.perf_counter()
+    before = MetagraphSnapshot.capture(metagraph)
+    et = time.perf_counter()
+    print(f"snapshot of 256 uids in {et - st:.6f}s")
+
+    assert not diff_snapshots(before, MetagraphSnapshot.capture(metagraph)).changed
+
+    metagraph.hotkeys[5] = "new_hotkey"
+    metagraph.axons[5] = bt.AxonInfo(version=1, ip="10.1.1.1", port=8091, ip_type=4, hotkey="new_hotkey", coldkey="ck")
+    metagraph.axons[9] = bt.AxonInfo(version=1, ip="10.9.9.9", port=9000, ip_type=4, hotkey="hk9", coldkey="ck9")
+    metagraph.hotkeys.append("hk256")
+    metagraph.axons.append(copy.copy(metagraph.axons[0]))
+
+    changes = diff_snapshots(before, MetagraphSnapshot.capture(metagraph))
+    assert changes.changed
+    assert changes.replaced_uids == [5]
+    assert changes.axon_changed_uids == [9]
+    assert changes.new_uids == [256]
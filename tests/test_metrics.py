@@ -0,0 +1,73 @@
+import time
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from bitrecs.api.utils import metrics_middleware
+from bitrecs.utils.metrics import API_REQUESTS, Counter, Gauge, Histogram, Registry, REGISTRY
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    requests = Counter("requests_total", "Requests", ("status",), registry=registry)
+    Gauge("queue_depth", "Queue depth", fn=lambda: 3, registry=registry)
+    Counter("cache_hits_total", "Hits", ("cache",), fn=lambda: {"catalog": 5, ("tokens",): 1}, registry=registry)
+    latency = Histogram("stage_seconds", "Stage latency", ("stage",), buckets=(0.1, 1.0), registry=registry)
+
+    requests.inc("200")
+    requests.inc("200")
+    requests.inc("500", amount=3)
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value, "reward")
+    with latency.time("forward"):
+        pass
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{status="200"} 2' in lines
+    assert 'requests_total{status="500"} 3' in lines
+    assert "queue_depth 3" in lines
+    assert 'cache_hits_total{cache="catalog"} 5' in lines
+    assert 'cache_hits_total{cache="tokens"} 1' in lines
+    assert 'stage_seconds_bucket{stage="reward",le="0.1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="reward",le="1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="reward",le="+Inf"} 4' in lines
+    assert 'stage_seconds_sum{stage="reward"} 2.65' in lines
+    assert 'stage_seconds_count{stage="reward"} 4' in lines
+    assert 'stage_seconds_count{stage="forward"} 1' in lines
+    assert latency.count("reward") == 4
+
+
+def test_observe_overhead():
+    latency = Histogram("overhead_seconds", "Overhead", ("stage",), registry=None)
+    n = 100_000
+    st = time.perf_counter()
+    for i in range(n):
+        with latency.time("reward"):
+            pass
+    per_call = (time.perf_counter() - st) / n
+    print(f"timed block overhead: {per_call * 1e6:.2f}us")
+    assert latency.count("reward") == n
+    assert per_call < 20e-6
+
+
+def test_metrics_middleware():
+    app = FastAPI()
+    app.middleware("http")(metrics_middleware)
+
+    @app.post("/rec")
+    async def rec(ok: bool = True):
+        return JSONResponse(status_code=200 if ok else 400, content={})
+
+    @app.get("/metrics")
+    async def metrics():
+        return REGISTRY.render()
+
+    before = {s: API_REQUESTS.samples().get((s,), 0) for s in ("200", "400")}
+    client = TestClient(app)
+    response = client.post("/rec")
+    assert len(response.headers["x-request-id"]) == 32
+    client.post("/rec?ok=false")
+    client.get("/metrics")
+    assert API_REQUESTS.samples()[("200",)] == before["200"] + 1
+    assert API_REQUESTS.samples()[("400",)] == before["400"] + 1
+    assert "bitrecs_api_request_seconds_count" in REGISTRY.render()
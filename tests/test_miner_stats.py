@@ -0,0 +1,83 @@
+import asyncio
+import numpy as np
+import bittensor as bt
+from types import SimpleNamespace
+from bitrecs.base.validator import BaseValidatorNeuron
+from bitrecs.protocol import BitrecsRequest
+from bitrecs.validator.miner_stats import MinerStatsStore
+
+
+def make_response(status_code: int, process_time: float) -> BitrecsRequest:
+    response = BitrecsRequest(
+        created_at="",
+        user="",
+        num_results=1,
+        query="sku",
+        context="",
+        site_key="",
+        results=[""],
+        models_used=[""],
+        miner_uid="",
+        miner_hotkey=""
+    )
+    response.dendrite = bt.TerminalInfo(status_code=status_code, process_time=process_time)
+    return response
+
+
+def test_record_round_stats():
+    store = MinerStatsStore(window=3)
+    for _ in range(4):
+        responses = [make_response(200, 1.0), make_response(200, 2.0), make_response(408, None)]
+        store.record_round([1, 2, 3], responses, np.array([0.8, 0.0, 0.0]), consensus_uids=[1])
+
+    fast = store.get(1)
+    assert fast.rounds == 3
+    assert fast.success_rate == 1.0
+    assert fast.consensus_rate == 1.0
+    assert fast.latency_percentile(90) == 1.0
+
+    rejected = store.get(2)
+    assert rejected.schema_failure_rate == 1.0
+    assert rejected.valid_rate == 0.0
+
+    timed_out = store.get(3)
+    assert timed_out.success_rate == 0.0
+    assert timed_out.schema_failure_rate == 0.0
+    print(fast.summary())
+
+    # get() hands out a snapshot, later rounds don't mutate it under the reader
+    store.record_round([1], [make_response(408, None)], np.array([0.0]))
+    assert fast.success_rate == 1.0
+    assert store.get(1).success_rate < 1.0
+
+
+def test_rank_prefers_utility_and_explores():
+    store = MinerStatsStore()
+    store.record_round([1, 2], [make_response(200, 1.0), make_response(200, 4.0)], np.array([0.8, 0.8]), [1])
+    store.record_round([3], [make_response(200, 1.0)], np.array([0.0]))
+
+    ranked = store.rank([3, 2, 1, 4], k=2, epsilon=0.0)
+    assert ranked[:2] == [4, 1] # unseen miners are tried first
+    assert ranked == [4, 1, 2, 3]
+
+    explored = [tuple(store.rank([1, 2, 3, 4, 5], k=2, epsilon=1.0)[:2]) for _ in range(20)]
+    assert any(pair != (4, 5) and pair != (5, 4) for pair in explored)
+
+    store.reset(1)
+    assert store.get(1) is None
+
+
+def test_failed_round_is_recorded():
+    class FailedFanout:
+        async def wait_all(self):
+            return [make_response(408, None), make_response(200, 1.0)], np.array([0.0, 0.0])
+
+    store = MinerStatsStore()
+    validator = SimpleNamespace(miner_stats=store)
+    for _ in range(3):
+        asyncio.run(BaseValidatorNeuron.record_failed_round(validator, FailedFanout(), [1, 2]))
+
+    assert store.get(1).rounds == 3 and store.get(1).success_rate == 0.0
+    assert store.get(2).schema_failure_rate == 1.0
+    assert store.rank([1, 2, 3], k=1, epsilon=0.0)[0] == 3
+    assert store.expected_utility(1) == 0.0
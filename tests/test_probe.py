@@ -0,0 +1,48 @@
+import time
+import asyncio
+from types import SimpleNamespace
+from bitrecs.utils.uids import probe_miner_uids
+
+
+class FakeWriter:
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+def make_validator(ips):
+    axons = [SimpleNamespace(ip=ip, port=8091) for ip in ips]
+    return SimpleNamespace(metagraph=SimpleNamespace(axons=axons))
+
+
+def test_probe_miner_uids_concurrent(monkeypatch):
+    in_flight = {"now": 0, "max": 0}
+
+    async def fake_open_connection(host, port):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        try:
+            if host == "10.0.0.99":
+                raise ConnectionRefusedError()
+            if host == "10.0.0.98":
+                await asyncio.sleep(10)
+            await asyncio.sleep(0.1)
+            return None, FakeWriter()
+        finally:
+            in_flight["now"] -= 1
+
+    monkeypatch.setattr(asyncio, "open_connection", fake_open_connection)
+    ips = [f"10.0.1.{i}" for i in range(20)] + ["10.0.0.99", "10.0.0.98", "127.0.0.1"]
+    validator = make_validator(ips)
+
+    st = time.perf_counter()
+    rtts = asyncio.run(probe_miner_uids(validator, list(range(len(ips))), timeout=0.5, concurrency=10))
+    et = time.perf_counter()
+    print(f"probed {len(ips)} uids in {et - st:.3f}s")
+
+    assert sorted(rtts.keys()) == list(range(20))
+    assert all(0.1 <= rtt < 0.5 for rtt in rtts.values())
+    assert in_flight["max"] <= 10
+    assert et - st < 1.5
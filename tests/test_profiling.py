@@ -0,0 +1,76 @@
+import os
+import time
+import threading
+from bitrecs.utils.profiling import Profiler
+
+
+def busy_request(seconds: float = 0.1):
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += sum(i * i for i in range(200))
+    return n
+
+
+def window_work(seconds: float):
+    return busy_request(seconds)
+
+
+def read_collapsed(path: str) -> dict:
+    stacks = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stack, count = line.rstrip("\n").rsplit(" ", 1)
+            stacks[stack] = int(count)
+    return stacks
+
+
+def test_profile_every_nth_request(tmp_path):
+    profiler = Profiler(str(tmp_path), "validator", every_n=2, interval=0.001, flush_every=1)
+    profiler.start()
+    idle = threading.Thread(target=window_work, args=(1.0,), name="other_work")
+    idle.start()
+    try:
+        for _ in range(4):
+            profiled = profiler.request()
+            busy_request()
+            if profiled is not None:
+                profiled.end()
+    finally:
+        profiler.close()
+        idle.join()
+
+    assert profiler.requests == 4 and profiler.profiled == 2
+    stacks = read_collapsed(profiler.request_path)
+    samples = sum(stacks.values())
+    print(f"{samples} samples, {len(stacks)} unique stacks")
+    assert samples >= 5
+    assert all(stack.startswith("MainThread;") for stack in stacks)
+    assert sum(c for s, c in stacks.items() if "busy_request (test_profiling.py" in s) >= samples * 0.8
+    assert not any("other_work" in s for s in stacks)
+
+
+def test_profile_window(tmp_path):
+    profiler = Profiler(str(tmp_path), "miner", window=0.3, interval=0.001)
+    assert profiler.enabled
+    worker = threading.Thread(target=window_work, args=(0.6,), name="window_worker")
+    worker.start()
+    profiler.start()
+    worker.join()
+    time.sleep(0.1)
+    profiler.close()
+
+    assert os.path.exists(profiler.window_path)
+    assert not os.path.exists(profiler.request_path)
+    stacks = read_collapsed(profiler.window_path)
+    worker_stacks = [s for s in stacks if s.startswith("window_worker;")]
+    assert worker_stacks and all("window_work (test_profiling.py" in s for s in worker_stacks)
+    assert sum(stacks[s] for s in worker_stacks) >= 10
+
+
+def test_profiler_disabled(tmp_path):
+    profiler = Profiler(str(tmp_path), "validator")
+    profiler.start()
+    assert not profiler.enabled and profiler.request() is None
+    profiler.close()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,125 @@
+import json
+import time
+import asyncio
+import bittensor as bt
+from dataclasses import asdict
+from datetime import datetime
+from typing import List
+from bitrecs.commerce.product import CatalogProvider, Product, ProductFactory
+from bitrecs.protocol import BitrecsRequest
+from bitrecs.validator.quorum import QuorumFanout
+from bitrecs.validator.reward import get_catalog_validator
+from bitrecs.utils.misc import ttl_cache
+
+
+@ttl_cache(ttl=900)
+def woo_products() -> List[Product]:
+    woo_catalog = "./tests/data/woocommerce/product_catalog.csv"
+    catalog = ProductFactory.tryload_catalog_to_json(CatalogProvider.WOOCOMMERCE, woo_catalog)
+    return ProductFactory.dedupe(ProductFactory.convert(catalog, CatalogProvider.WOOCOMMERCE))
+
+
+def make_request(products: List[Product], num_recs: int) -> BitrecsRequest:
+    return BitrecsRequest(
+        created_at=datetime.now().isoformat(),
+        user="",
+        num_results=num_recs,
+        query=products[0].sku,
+        context=json.dumps([asdict(p) for p in products]),
+        site_key="",
+        results=[""],
+        models_used=[""],
+        miner_uid="",
+        miner_hotkey=""
+    )
+
+
+class FakeDendrite:
+    """Answers each axon after a fixed delay with a fixed set of SKUs"""
+
+    def __init__(self, plan: dict):
+        self.plan = plan
+
+    async def call(self, target_axon, synapse: BitrecsRequest, timeout: float, deserialize: bool):
+        delay, products = self.plan[target_axon.port]
+        await asyncio.sleep(delay)
+        synapse.results = [json.dumps({"sku": p.sku, "name": p.name, "price": p.price, "reason": "ok"}) for p in products]
+        synapse.miner_uid = str(target_axon.port)
+        synapse.dendrite = bt.TerminalInfo(status_code=200, process_time=delay)
+        return synapse
+
+
+def make_axons(n: int) -> List[bt.AxonInfo]:
+    return [bt.AxonInfo(version=1, ip="127.0.0.1", port=i, ip_type=4, hotkey=f"hk{i}", coldkey=f"ck{i}") for i in range(n)]
+
+
+def test_quorum_answers_before_stragglers():
+    products = woo_products()
+    num_recs = 5
+    request = make_request(products, num_recs)
+    catalog_validator = get_catalog_validator(num_recs, request)
+    assert catalog_validator is not None
+
+    same = products[1:6]
+    plan = {
+        0: (0.05, same),
+        1: (0.10, same),
+        2: (0.15, same),
+        3: (1.50, products[10:15]),
+    }
+
+    async def run():
+        fanout = QuorumFanout(FakeDendrite(plan), make_axons(4), request, num_recs, catalog_validator, quorum=3)
+        st = time.perf_counter()
+        reached = await fanout.wait_for_quorum()
+        quorum_time = time.perf_counter() - st
+        good = fanout.good_responses()
+        responses, rewards = await fanout.wait_all()
+        return reached, quorum_time, good, responses, rewards
+
+    reached, quorum_time, good, responses, rewards = asyncio.run(run())
+    print(f"quorum in {quorum_time:.3f}s")
+    assert reached
+    assert quorum_time < 1.0
+    assert [r.miner_uid for r in good] == ["0", "1", "2"]
+    assert [r.miner_uid for r in responses] == ["0", "1", "2", "3"]
+    assert (rewards > 0).all()
+
+
+def test_quorum_disabled_waits_for_all():
+    products = woo_products()
+    num_recs = 5
+    request = make_request(products, num_recs)
+    catalog_validator = get_catalog_validator(num_recs, request)
+    plan = {i: (0.05 * (i + 1), products[1:6]) for i in range(3)}
+
+    async def run():
+        fanout = QuorumFanout(FakeDendrite(plan), make_axons(3), request, num_recs, catalog_validator, quorum=0)
+        reached = await fanout.wait_for_quorum()
+        return reached, fanout.completed
+
+    reached, completed = asyncio.run(run())
+    assert not reached
+    assert completed == 3
+
+
+def test_quorum_requires_similarity():
+    products = woo_products()
+    num_recs = 5
+    request = make_request(products, num_recs)
+    catalog_validator = get_catalog_validator(num_recs, request)
+    plan = {
+        0: (0.05, products[1:6]),
+        1: (0.10, products[6:11]),
+        2: (0.15, products[11:16]),
+        3: (0.30, products[16:21]),
+    }
+
+    async def run():
+        fanout = QuorumFanout(FakeDendrite(plan), make_axons(4), request, num_recs, catalog_validator,
+                              quorum=2, min_similarity=0.5)
+        return await fanout.wait_for_quorum(), fanout.completed
+
+    reached, completed = asyncio.run(run())
+    assert not reached
+    assert completed == 4
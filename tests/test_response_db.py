@@ -0,0 +1,235 @@
+import os
+import gzip
+import json
+import time
+import sqlite3
+import bittensor as bt
+from bitrecs.protocol import BitrecsRequest
+from bitrecs.utils import response_db
+from bitrecs.utils.metrics import RESPONSES_DROPPED
+from bitrecs.utils.response_db import MinerResponseWriter, ensure_schema, insert_round, export_segment, get_watermark, SCHEMA_VERSION
+
+
+def make_response(uid: int, num_recs: int = 3) -> BitrecsRequest:
+    response = BitrecsRequest(
+        created_at="2025-01-01T00:00:00",
+        user="",
+        num_results=num_recs,
+        query="SKU-1",
+        context="",
+        site_key="batch",
+        results=[f'{{"sku":"SKU-{uid}-{i}","name":"item","price":"1","reason":"ok"}}' for i in range(num_recs)],
+        models_used=["model"],
+        miner_uid=str(uid),
+        miner_hotkey=f"hk{uid}"
+    )
+    response.dendrite = bt.TerminalInfo(status_code=200, process_time=1.5)
+    return response
+
+
+def test_writer_batches_rounds(tmp_path):
+    db_path = str(tmp_path / "miner_responses.db")
+    writer = MinerResponseWriter(db_path, batch_size=32, flush_interval=0.2)
+    try:
+        st = time.perf_counter()
+        for step in range(20):
+            writer.submit(step, [make_response(uid) for uid in range(8)] + [None])
+        submitted = time.perf_counter() - st
+        assert writer.flush(10)
+        print(f"20 rounds submitted in {submitted:.4f}s, flushed in {time.perf_counter() - st:.4f}s")
+    finally:
+        writer.stop()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("SELECT COUNT(*) FROM requests").fetchone()[0] == 20
+        assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 160
+        assert conn.execute("SELECT COUNT(*) FROM recommendations").fetchone()[0] == 480
+        row = conn.execute("SELECT step, miner_uid, num_results, process_time "
+                           "FROM responses WHERE step = 19 AND miner_uid = 7").fetchone()
+        assert row == (19, 7, 3, 1.5)
+        skus = [r[0] for r in conn.execute("SELECT c.sku FROM recommendations c JOIN responses r ON r.id = c.response_id "
+                                           "WHERE r.step = 19 AND r.miner_uid = 7 ORDER BY c.rank")]
+        assert skus == ["SKU-7-0", "SKU-7-1", "SKU-7-2"]
+        plan = " ".join(str(r) for r in conn.execute("EXPLAIN QUERY PLAN SELECT * FROM responses WHERE miner_uid = 7"))
+        assert "idx_responses_miner_uid" in plan
+        view = conn.execute("SELECT miner_hotkey, results FROM miner_responses WHERE step = 19 AND miner_uid = 7").fetchone()
+        assert view[0] == "hk7" and "SKU-7-2" in view[1]
+    finally:
+        conn.close()
+
+
+def test_writer_survives_unavailable_db(tmp_path):
+    db_dir = tmp_path / "missing"
+    db_path = str(db_dir / "miner_responses.db")
+    writer = MinerResponseWriter(db_path, batch_size=1, flush_interval=0, max_queue=2)
+    try:
+        for step in range(4):
+            writer.submit(step, [make_response(0)])
+        assert writer.dropped == 2
+        assert not writer.flush(0.5)
+        assert writer.thread.is_alive()
+
+        db_dir.mkdir()
+        assert writer.flush(10)
+    finally:
+        writer.stop()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert [r[0] for r in conn.execute("SELECT step FROM requests ORDER BY step")] == [0, 1]
+    finally:
+        conn.close()
+
+
+def test_writer_retries_locked_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(response_db, "WRITER_WRITE_BACKOFF", 0.01)
+    failures = {"locked": 2}
+
+    def flaky_insert(conn, step, created_at, responses):
+        if step == 0 and failures["locked"] > 0:
+            failures["locked"] -= 1
+            raise sqlite3.OperationalError("database is locked")
+        if step == 1:
+            raise sqlite3.IntegrityError("constraint failed")
+        return insert_round(conn, step, created_at, responses)
+
+    monkeypatch.setattr(response_db, "insert_round", flaky_insert)
+    dropped = RESPONSES_DROPPED.samples().get(("write_error",), 0)
+    db_path = str(tmp_path / "miner_responses.db")
+    writer = MinerResponseWriter(db_path, batch_size=1, flush_interval=0)
+    try:
+        writer.submit(0, [make_response(0)])
+        assert writer.flush(10)
+        writer.submit(1, [make_response(1)])
+        assert writer.flush(10)
+    finally:
+        writer.stop()
+
+    # The locked write went through on the third try, the constraint error is dropped without retrying
+    assert failures["locked"] == 0
+    assert writer.dropped == 1
+    assert RESPONSES_DROPPED.samples()[("write_error",)] == dropped + 1
+    conn = sqlite3.connect(db_path)
+    try:
+        assert [r[0] for r in conn.execute("SELECT step FROM requests")] == [0]
+    finally:
+        conn.close()
+
+
+def test_migrate_legacy_table(tmp_path):
+    db_path = str(tmp_path / "miner_responses.db")
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("CREATE TABLE miner_responses (step TEXT, created_at TEXT, user TEXT, query TEXT, site_key TEXT, "
+                     "num_results TEXT, context TEXT, miner_uid TEXT, miner_hotkey TEXT, models_used TEXT, "
+                     "bt_header_dendrite_status_code TEXT, bt_header_dendrite_process_time TEXT, "
+                     "computed_body_hash TEXT, results TEXT)")
+        rows = []
+        for step in range(3):
+            for uid in range(4):
+                results = str([f'{{"sku":"SKU-{uid}-{i}","name":"item","price":"1","reason":"ok"}}' for i in range(2)])
+                rows.append((str(step), "2025-01-01 00:00:00", "", "SKU-1", "batch", "2", "", str(uid), f"hk{uid}",
+                             "['model']", "200", "1.25", "", results))
+        rows.append(("3", "2025-01-01 00:00:00", "", "SKU-2", "batch", "2", "", "9", "hk9", "", "", "", "", "not a list"))
+        conn.executemany("INSERT INTO miner_responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+
+        ensure_schema(conn)
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert conn.execute("SELECT type FROM sqlite_master WHERE name = 'miner_responses'").fetchone()[0] == "view"
+        assert conn.execute("SELECT COUNT(*) FROM requests").fetchone()[0] == 4
+        assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 13
+        assert conn.execute("SELECT COUNT(*) FROM recommendations").fetchone()[0] == 24
+        row = conn.execute("SELECT step, miner_uid, status_code, process_time FROM responses "
+                           "WHERE step = 2 AND miner_uid = 3").fetchone()
+        assert row == (2, 3, 200, 1.25)
+
+        ensure_schema(conn)
+        assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 13
+    finally:
+        conn.close()
+
+
+def test_r2_upload_incremental(tmp_path, monkeypatch):
+    monkeypatch.setenv("BITRECS_PROXY_URL", "http://localhost:7779")
+    monkeypatch.chdir(tmp_path)
+    from bitrecs.utils import r2
+
+    conn = sqlite3.connect(str(tmp_path / "miner_responses.db"))
+    ensure_schema(conn)
+    with conn:
+        for step in range(5):
+            insert_round(conn, step, "2025-01-01 00:00:00", [make_response(uid) for uid in range(4)])
+
+    uploads, signed = [], []
+    def fake_put(url, data, headers, timeout):
+        assert not isinstance(data, bytes)
+        body = gzip.decompress(data.read()).decode()
+        uploads.append([json.loads(line) for line in body.splitlines()])
+        assert headers["Content-Type"] == "application/gzip" and "Content-Encoding" not in headers
+        return type("Response", (), {"status_code": 200})()
+
+    def fake_upload_url(request, keypair):
+        signed.append(request)
+        return "https://r2.local/upload"
+
+    monkeypatch.setattr(r2, "get_r2_upload_url", fake_upload_url)
+    monkeypatch.setattr(r2.requests, "put", fake_put)
+    monkeypatch.setattr(r2.CONST, "R2_SEGMENT_MAX_ROWS", 8)
+    request = r2.ValidatorUploadRequest(hot_key="hk", step="5")
+
+    assert r2.put_r2_upload(request, keypair=object(), upload_format=r2.R2_FORMAT_NDJSON_GZ_V1, prune=True)
+    assert [len(u) for u in uploads] == [8, 8, 4]
+    assert [(s.upload_format, s.segment_from, s.segment_to) for s in signed] == [
+        ("ndjson-gz-v1", 0, 8), ("ndjson-gz-v1", 8, 16), ("ndjson-gz-v1", 16, 20)]
+    assert uploads[0][0]["results"][0]["sku"] == "SKU-0-0"
+    assert uploads[-1][-1]["step"] == 4 and uploads[-1][-1]["miner_uid"] == 3
+    assert get_watermark(conn) == 20
+    assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM recommendations").fetchone()[0] == 0
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".gz")]
+
+    with conn:
+        insert_round(conn, 5, "2025-01-01 00:00:00", [make_response(uid) for uid in range(2)])
+    monkeypatch.setattr(r2.requests, "put", lambda *args, **kwargs: type("Response", (), {"status_code": 500, "headers": {}, "text": ""})())
+    assert not r2.put_r2_upload(request, keypair=object(), upload_format=r2.R2_FORMAT_NDJSON_GZ_V1, prune=True)
+    assert get_watermark(conn) == 20
+    assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 2
+
+    last_id, count = export_segment(conn, str(tmp_path / "segment.ndjson.gz"), get_watermark(conn), 100)
+    assert (last_id, count) == (22, 2)
+    conn.close()
+
+
+def test_r2_upload_sqlite_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setenv("BITRECS_PROXY_URL", "http://localhost:7779")
+    monkeypatch.chdir(tmp_path)
+    from bitrecs.utils import r2
+
+    conn = sqlite3.connect(str(tmp_path / "miner_responses.db"))
+    ensure_schema(conn)
+    with conn:
+        insert_round(conn, 1, "2025-01-01 00:00:00", [make_response(uid) for uid in range(3)])
+
+    uploads, signed = [], []
+    def fake_put(url, data, headers, timeout):
+        snapshot = tmp_path / "uploaded.db"
+        snapshot.write_bytes(data.read())
+        assert headers["Content-Type"] == "application/x-sqlite3"
+        uploaded = sqlite3.connect(str(snapshot))
+        uploads.append(uploaded.execute("SELECT COUNT(*) FROM miner_responses").fetchone()[0])
+        uploaded.close()
+        return type("Response", (), {"status_code": 200})()
+
+    monkeypatch.setattr(r2, "get_r2_upload_url", lambda request, keypair: signed.append(request) or "https://r2.local/upload")
+    monkeypatch.setattr(r2.requests, "put", fake_put)
+
+    assert r2.put_r2_upload(r2.ValidatorUploadRequest(hot_key="hk", step="1"), keypair=object())
+    assert uploads == [3]
+    assert signed[0].upload_format == "sqlite"
+    assert get_watermark(conn) == 0
+    assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 3
+    assert sorted(os.listdir(tmp_path)) == ["miner_responses.db", "uploaded.db"]
+    conn.close()
@@ -0,0 +1,78 @@
+import os
+import time
+import sqlite3
+from datetime import datetime, timezone
+from bitrecs.utils.response_db import ensure_schema, insert_round, set_watermark
+from bitrecs.utils.retention import RetentionPolicy, apply_retention, prune_cutoff, prune_wandb_runs, rollup_and_prune
+from tests.test_response_db import make_response
+
+
+def make_db(path: str, days: int = 10, rounds_per_day: int = 50, miners: int = 4) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    ensure_schema(conn)
+    with conn:
+        for day in range(days):
+            for step in range(rounds_per_day):
+                created_at = f"2025-01-{day + 1:02d} 12:00:00"
+                insert_round(conn, day * rounds_per_day + step, created_at, [make_response(uid) for uid in range(miners)])
+    return conn
+
+
+def test_rollup_by_age(tmp_path):
+    conn = make_db(str(tmp_path / "miner_responses.db"))
+    policy = RetentionPolicy(max_age_days=3, max_rows=0)
+    cutoff_id = prune_cutoff(conn, policy, now=datetime(2025, 1, 10, 13, tzinfo=timezone.utc))
+    result = rollup_and_prune(conn, cutoff_id)
+
+    assert result.deleted == 7 * 50 * 4
+    assert conn.execute("SELECT MIN(created_at) FROM responses").fetchone()[0] == "2025-01-08 12:00:00"
+    assert conn.execute("SELECT COUNT(*) FROM requests").fetchone()[0] == 3 * 50
+    assert conn.execute("SELECT COUNT(*) FROM recommendations").fetchone()[0] == 3 * 50 * 4 * 3
+    row = conn.execute("SELECT responses, successes, total_process_time, recommendations FROM daily_miner_stats "
+                       "WHERE day = '2025-01-02' AND miner_uid = 3").fetchone()
+    assert row == (50, 50, 75.0, 150)
+    assert conn.execute("SELECT COUNT(*) FROM daily_miner_stats").fetchone()[0] == 7 * 4
+
+    assert rollup_and_prune(conn, prune_cutoff(conn, policy, now=datetime(2025, 1, 10, 13, tzinfo=timezone.utc))).deleted == 0
+    conn.close()
+
+
+def test_rollup_by_rows_keeps_unuploaded(tmp_path):
+    conn = make_db(str(tmp_path / "miner_responses.db"), days=2)
+    policy = RetentionPolicy(max_age_days=0, max_rows=100, keep_unuploaded=True)
+    assert prune_cutoff(conn, policy) == 0
+
+    set_watermark(conn, 250)
+    rollup_and_prune(conn, prune_cutoff(conn, policy))
+    assert conn.execute("SELECT MIN(id), COUNT(*) FROM responses").fetchone() == (251, 150)
+
+    policy.keep_unuploaded = False
+    rollup_and_prune(conn, prune_cutoff(conn, policy))
+    assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 100
+    assert conn.execute("SELECT SUM(responses) FROM daily_miner_stats").fetchone()[0] == 300
+    conn.close()
+
+
+def test_apply_retention_compacts(tmp_path):
+    db_path = str(tmp_path / "miner_responses.db")
+    make_db(db_path, days=10, rounds_per_day=100).close()
+    size_before = os.path.getsize(db_path)
+
+    wandb_dir = tmp_path / "wandb"
+    for i in range(4):
+        run = wandb_dir / f"run-2025010{i}_000000-abc{i}"
+        run.mkdir(parents=True)
+        os.utime(run, (time.time() - 100 + i, time.time() - 100 + i))
+    os.symlink(wandb_dir / "run-20250100_000000-abc0", wandb_dir / "latest-run")
+
+    st = time.perf_counter()
+    result = apply_retention(db_path, RetentionPolicy(max_age_days=0, max_rows=400, wandb_runs=2), str(wandb_dir))
+    print(f"retention of {result.deleted} rows in {time.perf_counter() - st:.3f}s, {result}")
+
+    assert result.deleted == 3600
+    assert result.freed_pages > 0
+    assert os.path.getsize(db_path) < size_before / 2
+    assert result.wandb_runs_removed == 1
+    assert sorted(os.listdir(wandb_dir)) == ["latest-run", "run-20250100_000000-abc0",
+                                             "run-20250102_000000-abc2", "run-20250103_000000-abc3"]
+    assert prune_wandb_runs(str(wandb_dir), 0) == 0
@@ -0,0 +1,55 @@
+import time
+import asyncio
+from bitrecs.utils.runtime import JobScheduler
+
+
+def test_scheduler_jobs():
+    calls = {"fast": 0, "ticks": 0}
+    max_tick_gap = 0.0
+
+    async def fast():
+        calls["fast"] += 1
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    def blocking():
+        time.sleep(0.5)
+
+    async def ticker():
+        nonlocal max_tick_gap
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            max_tick_gap = max(max_tick_gap, now - last)
+            last = now
+            calls["ticks"] += 1
+
+    async def run():
+        scheduler = JobScheduler()
+        scheduler.add("fast", fast, 0.1)
+        scheduler.add("failing", failing, 0.1)
+        scheduler.add("slow", slow, 0.1, timeout=0.2)
+        scheduler.add("blocking", blocking, 0.1, timeout=0.1, blocking=True)
+        tick = asyncio.create_task(ticker())
+        asyncio.get_running_loop().call_later(1.5, scheduler.stop)
+        await scheduler.run()
+        tick.cancel()
+        return scheduler.metrics()
+
+    st = time.perf_counter()
+    metrics = asyncio.run(run())
+    print(f"scheduler ran in {time.perf_counter() - st:.2f}s, max loop gap {max_tick_gap * 1000:.1f}ms, {metrics}")
+
+    assert 8 <= metrics["fast"]["runs"] <= 17 and metrics["fast"]["failures"] == 0
+    assert metrics["failing"]["failures"] == metrics["failing"]["runs"] >= 8
+    assert "boom" in metrics["failing"]["last_error"]
+    assert metrics["slow"]["timeouts"] >= 3
+    assert metrics["slow"]["last_duration"] < 0.5
+    assert metrics["blocking"]["timeouts"] >= 1
+    assert metrics["blocking"]["skipped"] >= 1
+    assert max_tick_gap < 0.2
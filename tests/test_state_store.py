@@ -0,0 +1,115 @@
+import os
+import time
+import threading
+import numpy as np
+from types import SimpleNamespace
+from bitrecs.base.validator import BaseValidatorNeuron
+from bitrecs.validator.active_lock import ACTIVE_LOCK_FILE, ActiveLock
+from bitrecs.validator.miner_stats import MinerStatsStore
+from bitrecs.validator.state_store import StateStore, ValidatorState, STATE_SCHEMA_VERSION
+
+
+def test_state_roundtrip(tmp_path):
+    stats = MinerStatsStore()
+    stats.load_dict({"5": [[1.5, True, True, False], [5.0, False, False, False]]})
+    store = StateStore(str(tmp_path), min_interval=0)
+    state = ValidatorState(
+        step=42,
+        scores=np.linspace(0, 1, 256, dtype=np.float32),
+        hotkeys=[f"hk{i}" for i in range(256)],
+        miner_stats=stats.to_dict()
+    )
+    st = time.perf_counter()
+    assert store.save(state)
+    print(f"state saved in {time.perf_counter() - st:.4f}s")
+    assert os.listdir(tmp_path) == ["state.npz"]
+
+    loaded = StateStore(str(tmp_path)).load()
+    assert loaded.schema_version == STATE_SCHEMA_VERSION
+    assert loaded.step == 42
+    np.testing.assert_array_equal(loaded.scores, state.scores)
+    assert loaded.hotkeys == state.hotkeys
+    assert loaded.saved_at == state.saved_at
+
+    restored = MinerStatsStore()
+    restored.load_dict(loaded.miner_stats)
+    assert restored.get(5).summary() == stats.get(5).summary()
+
+
+def test_state_save_skips_unchanged_and_rate_limits(tmp_path):
+    store = StateStore(str(tmp_path), min_interval=0)
+    state = ValidatorState(step=1, scores=np.zeros(4, dtype=np.float32), hotkeys=["a", "b", "c", "d"])
+    assert store.save(state)
+    assert not store.save(state)
+    state.step += 1
+    assert not store.save(state)
+    state.scores[1] = 0.5
+    assert store.save(state)
+
+    store.min_interval = 3600
+    state.scores[2] = 0.5
+    assert not store.save(state)
+    assert store.save(state, force=True)
+
+
+def test_state_loads_legacy_file(tmp_path):
+    np.savez(str(tmp_path / "state.npz"), step=7, scores=np.ones(3, dtype=np.float32), hotkeys=["a", "b", "c"])
+    loaded = StateStore(str(tmp_path)).load()
+    assert loaded.schema_version == 0
+    assert loaded.step == 7
+    assert loaded.hotkeys == ["a", "b", "c"]
+    assert loaded.miner_stats == {}
+
+
+def test_state_concurrent_saves(tmp_path):
+    store = StateStore(str(tmp_path), min_interval=0)
+    n = 256
+
+    def writer(value: float):
+        for i in range(20):
+            state = ValidatorState(step=i, scores=np.full(n, value + i, dtype=np.float32),
+                                   hotkeys=[f"hk{j}" for j in range(n)])
+            store.save(state, force=True)
+
+    threads = [threading.Thread(target=writer, args=(k * 100.0,)) for k in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert os.listdir(tmp_path) == ["state.npz"]
+    loaded = StateStore(str(tmp_path)).load()
+    assert len(np.unique(loaded.scores)) == 1
+    assert loaded.hotkeys == [f"hk{j}" for j in range(n)]
+
+
+def test_state_survives_validator_startup(tmp_path):
+    saved = ValidatorState(step=9, scores=np.array([0.5, 0.0, 0.7], dtype=np.float32), hotkeys=["a", "b", "c"])
+    assert StateStore(str(tmp_path), min_interval=0).save(saved)
+
+    # What BaseValidatorNeuron.__init__ has before its first sync
+    validator = SimpleNamespace(
+        step=0,
+        scores=np.zeros(3, dtype=np.float32),
+        scores_lock=threading.Lock(),
+        hotkeys=["a", "b", "c"],
+        metagraph_snapshot=SimpleNamespace(hotkeys=["a", "b", "c"]),
+        miner_stats=MinerStatsStore(),
+        state_store=StateStore(str(tmp_path), min_interval=0),
+        active_lock=ActiveLock(str(tmp_path / ACTIVE_LOCK_FILE)),
+        state_loaded=False
+    )
+    validator.is_active = lambda: BaseValidatorNeuron.is_active(validator)
+    try:
+        # A save before load_state (e.g. from the first sync) must not write the blank scores
+        BaseValidatorNeuron.save_state(validator, force=True)
+        np.testing.assert_array_equal(StateStore(str(tmp_path)).load().scores, saved.scores)
+
+        BaseValidatorNeuron.load_state(validator)
+        assert validator.step == 9
+        np.testing.assert_array_equal(validator.scores, saved.scores)
+
+        BaseValidatorNeuron.save_state(validator, force=True)
+        np.testing.assert_array_equal(StateStore(str(tmp_path)).load().scores, saved.scores)
+    finally:
+        validator.active_lock.release()
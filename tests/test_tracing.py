@@ -0,0 +1,107 @@
+import io
+import json
+import asyncio
+import threading
+from bitrecs.base.validator import api_forward, api_queue
+from bitrecs.utils import tracing
+from bitrecs.utils.metrics import STAGE_SECONDS
+from bitrecs.utils.tracing import OtlpJsonExporter, Span, SpanExporter, span, stage
+from bitrecs.validator.quorum import QuorumFanout
+from bitrecs.validator.reward import get_catalog_validator
+from tests.test_quorum import FakeDendrite, make_axons, make_request, woo_products
+
+
+class MemoryExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+
+def by_name(spans):
+    return {s.name: s for s in spans}
+
+
+def test_request_trace_crosses_api_queue():
+    exporter = MemoryExporter()
+    tracing.set_exporter(exporter)
+    products = woo_products()
+    request = make_request(products[:40], 5)
+    forward_before = STAGE_SECONDS.count("forward")
+
+    def validator_loop():
+        synapse_with_event = api_queue.get(timeout=10)
+        request_span = Span("validator.request", parent=synapse_with_event.span, request_id=synapse_with_event.request_id)
+
+        async def fanout():
+            with stage("forward", parent=request_span):
+                plan = {i: (0.01 * i, products[:5]) for i in range(4)}
+                quorum = QuorumFanout(FakeDendrite(plan), make_axons(4), request, 5,
+                                      get_catalog_validator(5, request), quorum=0)
+                await quorum.wait_all()
+
+        asyncio.run(fanout())
+        request_span.end()
+        synapse_with_event.event.set()
+
+    worker = threading.Thread(target=validator_loop)
+    worker.start()
+
+    async def handler():
+        with span("api.rec") as root:
+            with stage("verify_signature"):
+                pass
+            with span("api.forward"):
+                await api_forward(request)
+        return root
+
+    try:
+        root = asyncio.run(handler())
+        worker.join(10)
+    finally:
+        tracing.set_exporter(None)
+
+    spans = exporter.spans
+    assert {s.trace_id for s in spans} == {root.request_id}
+    names = by_name(spans)
+    assert names["verify_signature"].parent_id == root.span_id
+    assert names["api.forward"].parent_id == root.span_id
+    assert names["validator.request"].parent_id == names["api.forward"].span_id
+    assert names["validator.request"].attributes["request_id"] == root.request_id
+    assert names["forward"].parent_id == names["validator.request"].span_id
+    calls = [s for s in spans if s.name == "dendrite.call"]
+    rewards = [s for s in spans if s.name == "reward"]
+    assert len(calls) == 4 and len(rewards) == 4
+    assert all(s.parent_id == names["forward"].span_id for s in calls + rewards)
+    assert all(s.end_ns >= s.start_ns for s in spans)
+    assert names["api.rec"].end_ns >= names["validator.request"].end_ns
+    assert STAGE_SECONDS.count("forward") == forward_before + 1
+
+
+def test_otlp_json_export():
+    stream = io.StringIO()
+    tracing.set_exporter(OtlpJsonExporter(stream, "test-service"))
+    try:
+        with span("root", uid=3, ok=True):
+            try:
+                with span("child", ratio=0.5):
+                    raise ValueError("bad catalog")
+            except ValueError:
+                pass
+    finally:
+        tracing.set_exporter(None)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(lines) == 2
+    child, root = (line["resourceSpans"][0]["scopeSpans"][0]["spans"][0] for line in lines)
+    resource = lines[0]["resourceSpans"][0]["resource"]["attributes"]
+    assert resource == [{"key": "service.name", "value": {"stringValue": "test-service"}}]
+    assert child["parentSpanId"] == root["spanId"] and child["traceId"] == root["traceId"]
+    assert "parentSpanId" not in root
+    assert len(root["traceId"]) == 32 and len(root["spanId"]) == 16
+    assert child["status"]["code"] == 2 and "bad catalog" in child["status"]["message"]
+    assert root["status"] == {"code": 1}
+    assert {"key": "uid", "value": {"intValue": "3"}} in root["attributes"]
+    assert {"key": "ok", "value": {"boolValue": True}} in root["attributes"]
+    assert int(root["endTimeUnixNano"]) >= int(child["endTimeUnixNano"])
@@ -0,0 +1,65 @@
+import time
+import random
+import numpy as np
+from types import SimpleNamespace
+from bitrecs.utils.uids import (
+    check_uid_availability,
+    get_random_miner_uids,
+    get_random_miner_uids2,
+    availability_mask,
+    serving_mask
+)
+
+
+def make_validator(n: int, seed: int = 7, vpermit_tao_limit: int = 1024):
+    rng = np.random.default_rng(seed)
+    axons = [SimpleNamespace(is_serving=bool(s)) for s in rng.random(n) > 0.2]
+    metagraph = SimpleNamespace(
+        n=np.int64(n),
+        block=np.int64(100),
+        axons=axons,
+        validator_permit=rng.random(n) > 0.8,
+        S=rng.random(n) * 4096
+    )
+    config = SimpleNamespace(neuron=SimpleNamespace(vpermit_tao_limit=vpermit_tao_limit))
+    return SimpleNamespace(metagraph=metagraph, config=config)
+
+
+def test_availability_mask_matches_check_uid_availability():
+    validator = make_validator(1024)
+    mask = availability_mask(validator.metagraph, 1024)
+    expected = [check_uid_availability(validator.metagraph, uid, 1024) for uid in range(1024)]
+    assert mask.tolist() == expected
+    assert availability_mask(validator.metagraph, 1024) is mask
+
+    validator.metagraph.block = np.int64(101)
+    assert availability_mask(validator.metagraph, 1024) is not mask
+
+
+def test_get_random_miner_uids():
+    validator = make_validator(4096)
+    available = set(np.flatnonzero(availability_mask(validator.metagraph, 1024)).tolist())
+    exclude = random.sample(sorted(available), 100)
+
+    st = time.perf_counter()
+    for _ in range(100):
+        uids = get_random_miner_uids(validator, k=16, exclude=exclude)
+    et = time.perf_counter()
+    print(f"get_random_miner_uids x100 at n=4096 in {et - st:.4f}s")
+
+    assert len(uids) == 16 == len(set(uids.tolist()))
+    assert set(uids.tolist()) <= available
+    assert not set(uids.tolist()) & set(exclude)
+
+    # Falls back to excluded uids when there are not enough candidates
+    uids = get_random_miner_uids(validator, k=len(available), exclude=exclude)
+    assert set(uids.tolist()) == available
+
+
+def test_get_random_miner_uids2():
+    validator = make_validator(256)
+    serving = set(np.flatnonzero(serving_mask(validator.metagraph)).tolist())
+    uids = get_random_miner_uids2(validator, k=16)
+    assert len(uids) == 16 and set(uids) <= serving
+    assert all(isinstance(u, int) for u in uids)
+    assert set(get_random_miner_uids2(validator, k=1000)) == serving
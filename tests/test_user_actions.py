@@ -0,0 +1,62 @@
+import time
+import random
+from bitrecs.commerce.user_action import ActionType, UserAction, UserActionIndex
+from bitrecs.validator.reward import calculate_miner_boost
+
+
+def make_actions(n: int, miners: int = 64, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    names = [a.name for a in ActionType]
+    return [
+        {
+            "hot_key": f"5Hotkey{rng.randrange(miners)}".upper() if i % 3 == 0 else f"5Hotkey{rng.randrange(miners)}",
+            "action": rng.choices(names, weights=[90, 8, 2])[0],
+            "sku": f"SKU-{i}",
+            "created_at": f"2025-01-{rng.randrange(1, 31):02d}T10:00:00"
+        }
+        for i in range(n)
+    ]
+
+
+def test_index_matches_list_scan():
+    actions = make_actions(20_000)
+    index = UserActionIndex.from_actions(actions)
+    assert len(index) == 20_000
+
+    for m in range(64):
+        hotkey = f"5Hotkey{m}"
+        miner_actions = [a for a in actions if a["hot_key"].lower() == hotkey.lower()]
+        for action_type in ActionType:
+            expected = sum(1 for a in miner_actions if a["action"] == action_type.name)
+            assert index.get(hotkey).get(action_type.name, 0) == expected
+        assert calculate_miner_boost(hotkey, index) == calculate_miner_boost(hotkey, actions)
+    assert calculate_miner_boost("unknown", index) == 0.0
+    assert calculate_miner_boost("5Hotkey1", UserActionIndex()) == 0.0
+
+    st = time.perf_counter()
+    for m in range(64):
+        calculate_miner_boost(f"5Hotkey{m}", actions)
+    list_time = time.perf_counter() - st
+    st = time.perf_counter()
+    for m in range(64):
+        calculate_miner_boost(f"5Hotkey{m}", index)
+    index_time = time.perf_counter() - st
+    print(f"64 boosts: list {list_time:.4f}s, index {index_time:.6f}s")
+    assert index_time < list_time
+
+
+def test_index_incremental_add_and_evict():
+    actions = make_actions(5_000)
+    early = [a for a in actions if a["created_at"] < "2025-01-15"]
+    late = [a for a in actions if a["created_at"] >= "2025-01-15"]
+
+    index = UserActionIndex()
+    assert index.add(early) == len(early)
+    assert index.add([UserAction(hot_key=a["hot_key"], action=a["action"], created_at=a["created_at"]) for a in late]) == len(late)
+    assert index.add([{"hot_key": None, "action": "PURCHASE"}, {"hot_key": "x", "action": ""}]) == 0
+    assert len(index) == len(actions)
+
+    assert index.evict_before("2025-01-15") == len(early)
+    expected = UserActionIndex.from_actions(late)
+    assert len(index) == len(late)
+    assert index.totals == expected.totals
@@ -0,0 +1,95 @@
+import time
+import numpy as np
+from typing import List, Tuple
+from bitrecs.base.utils.weight_utils import (
+    U16_MAX,
+    normalize_max_weight,
+    convert_weights_and_uids_for_emit
+)
+
+
+def reference_normalize_max_weight(x: np.ndarray, limit: float = 0.1) -> np.ndarray:
+    """Loop based implementation the vectorized version must match"""
+    epsilon = 1e-7
+    weights = x.copy()
+    values = np.sort(weights)
+    if x.sum() == 0 or len(x) * limit <= 1:
+        return np.ones_like(x) / x.size
+    estimation = values / values.sum()
+    if estimation.max() <= limit:
+        return weights / weights.sum()
+    cumsum = np.cumsum(estimation, 0)
+    estimation_sum = np.array([(len(values) - i - 1) * estimation[i] for i in range(len(values))])
+    n_values = (estimation / (estimation_sum + cumsum + epsilon) < limit).sum()
+    cutoff_scale = (limit * cumsum[n_values - 1] - epsilon) / (1 - (limit * (len(estimation) - n_values)))
+    cutoff = cutoff_scale * values.sum()
+    weights[weights > cutoff] = cutoff
+    return weights / weights.sum()
+
+
+def reference_convert(uids: np.ndarray, weights: np.ndarray) -> Tuple[List[int], List[int]]:
+    if np.sum(weights) == 0:
+        return [], []
+    max_weight = float(np.max(weights))
+    weights = [float(value) / max_weight for value in weights]
+    weight_vals, weight_uids = [], []
+    for weight_i, uid_i in zip(weights, uids):
+        uint16_val = round(float(weight_i) * int(U16_MAX))
+        if uint16_val != 0:
+            weight_vals.append(uint16_val)
+            weight_uids.append(int(uid_i))
+    return weight_uids, weight_vals
+
+
+def random_weights(rng: np.random.Generator, n: int) -> np.ndarray:
+    kind = rng.integers(0, 4)
+    if kind == 0:
+        return rng.random(n).astype(np.float32)
+    if kind == 1:
+        return (rng.pareto(1.5, n)).astype(np.float32)
+    if kind == 2:
+        w = np.zeros(n, dtype=np.float32)
+        w[rng.integers(0, n, 3)] = rng.random(3)
+        return w
+    return np.where(rng.random(n) > 0.7, rng.random(n), 0).astype(np.float32)
+
+
+def test_normalize_max_weight_matches_reference():
+    rng = np.random.default_rng(42)
+    for _ in range(300):
+        n = int(rng.integers(1, 600))
+        limit = float(rng.choice([0.01, 0.05, 0.1, 0.5, 1.0]))
+        x = random_weights(rng, n)
+        expected = reference_normalize_max_weight(x, limit)
+        actual = normalize_max_weight(x, limit)
+        np.testing.assert_allclose(actual, expected, rtol=1e-6, atol=1e-9)
+        if x.sum() > 0 and n * limit > 1:
+            assert abs(actual.sum() - 1.0) < 1e-4
+            assert actual.max() <= limit + 1e-4
+
+
+def test_convert_weights_matches_reference():
+    rng = np.random.default_rng(7)
+    for _ in range(300):
+        n = int(rng.integers(1, 600))
+        uids = np.arange(n)
+        weights = random_weights(rng, n)
+        assert convert_weights_and_uids_for_emit(uids, weights) == reference_convert(uids, weights)
+
+
+def test_weight_pipeline_benchmark():
+    rng = np.random.default_rng(1)
+    for n in (256, 1024, 4096):
+        x = rng.pareto(1.5, n).astype(np.float32)
+        uids = np.arange(n)
+
+        st = time.perf_counter()
+        for _ in range(20):
+            reference_convert(uids, reference_normalize_max_weight(x, 0.05))
+        reference = (time.perf_counter() - st) / 20
+
+        st = time.perf_counter()
+        for _ in range(20):
+            convert_weights_and_uids_for_emit(uids, normalize_max_weight(x, 0.05))
+        vectorized = (time.perf_counter() - st) / 20
+        print(f"n={n} reference {reference * 1000:.3f}ms vectorized {vectorized * 1000:.3f}ms ({reference / vectorized:.1f}x)")